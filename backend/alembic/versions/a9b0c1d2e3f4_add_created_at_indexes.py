@@ -0,0 +1,27 @@
+"""add created_at indexes for the admin dashboard's 24-hour windows
+
+Revision ID: a9b0c1d2e3f4
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9b0c1d2e3f4'
+down_revision: Union[str, None] = 'e7f8a9b0c1d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_attendance_records_created_at', 'attendance_records', ['created_at'], unique=False)
+    op.create_index('ix_attendance_sessions_created_at', 'attendance_sessions', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attendance_sessions_created_at', table_name='attendance_sessions')
+    op.drop_index('ix_attendance_records_created_at', table_name='attendance_records')
@@ -0,0 +1,64 @@
+"""add attendance_rollups and rollup_watermarks
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-19
+
+Hourly/daily attendance counts for the trend analytics endpoints, plus the
+watermark table the aggregator uses to process only what changed. The
+tables start empty; the first run of ``scripts/attendance_rollup_worker.py``
+fills them. Also indexes ``attendance_records.updated_at``, which the
+aggregator scans for changes since its watermark.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b0c1d2e3f4a5'
+down_revision: Union[str, None] = 'a9b0c1d2e3f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'attendance_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('granularity', sa.String(length=8), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('course_id', sa.Integer(), sa.ForeignKey('courses.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('programme', sa.String(length=100), nullable=True),
+        sa.Column('level', sa.Integer(), nullable=True),
+        sa.Column('lecturer_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_attendance_rollups_granularity_bucket', 'attendance_rollups', ['granularity', 'bucket_start'])
+    op.create_index(
+        'ix_attendance_rollups_course_granularity_bucket',
+        'attendance_rollups',
+        ['course_id', 'granularity', 'bucket_start'],
+    )
+    op.create_index(
+        'ix_attendance_rollups_lecturer_granularity_bucket',
+        'attendance_rollups',
+        ['lecturer_id', 'granularity', 'bucket_start'],
+    )
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('name', sa.String(length=50), primary_key=True),
+        sa.Column('processed_until', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_attendance_records_updated_at', 'attendance_records', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attendance_records_updated_at', table_name='attendance_records')
+    op.drop_table('rollup_watermarks')
+    op.drop_index('ix_attendance_rollups_lecturer_granularity_bucket', table_name='attendance_rollups')
+    op.drop_index('ix_attendance_rollups_course_granularity_bucket', table_name='attendance_rollups')
+    op.drop_index('ix_attendance_rollups_granularity_bucket', table_name='attendance_rollups')
+    op.drop_table('attendance_rollups')
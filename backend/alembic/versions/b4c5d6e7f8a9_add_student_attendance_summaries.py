@@ -0,0 +1,80 @@
+"""add student_attendance_summaries
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-19
+
+Per-(student, course) attendance counters read by the student dashboard.
+The table is backfilled here from existing records, sessions and
+enrolments; afterwards the app keeps it current.
+``scripts/rebuild_attendance_summaries.py`` recomputes it at any time.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b4c5d6e7f8a9"
+down_revision: Union[str, None] = "a3b4c5d6e7f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _status_count(status: str) -> str:
+    return f"""
+        (SELECT COUNT(r.id) FROM attendance_records r
+         JOIN attendance_sessions s ON s.id = r.session_id
+         WHERE r.student_id = e.student_id AND s.course_id = e.course_id
+           AND r.status = '{status}')"""
+
+
+BACKFILL = f"""
+INSERT INTO student_attendance_summaries (
+    student_id, course_id, confirmed_count, flagged_count, pending_count,
+    absent_count, unmarked_count, updated_at
+)
+SELECT
+    e.student_id,
+    e.course_id,
+    {_status_count("confirmed")},
+    {_status_count("flagged")},
+    {_status_count("pending_verification")},
+    {_status_count("absent")},
+    (SELECT COUNT(s.id) FROM attendance_sessions s
+     WHERE s.course_id = e.course_id
+       AND s.ends_at IS NOT NULL
+       AND (u.programme IS NULL OR s.programme IS NULL OR s.programme = u.programme)
+       AND NOT EXISTS (
+           SELECT 1 FROM attendance_records r
+           WHERE r.session_id = s.id AND r.student_id = e.student_id
+       )),
+    CURRENT_TIMESTAMP
+FROM student_course_enrollments e
+JOIN users u ON u.id = e.student_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "student_attendance_summaries",
+        sa.Column("student_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("course_id", sa.Integer(), sa.ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("confirmed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("flagged_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("pending_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("absent_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("unmarked_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_student_attendance_summaries_course_id",
+        "student_attendance_summaries",
+        ["course_id"],
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_student_attendance_summaries_course_id", table_name="student_attendance_summaries")
+    op.drop_table("student_attendance_summaries")
@@ -0,0 +1,51 @@
+"""add semester_close_jobs
+
+Revision ID: c1d2e3f4a5b6
+Revises: b0c1d2e3f4a5
+Create Date: 2026-10-19
+
+Semester close now runs as a background job; this table holds its progress
+so the admin UI can poll it and an interrupted run can resume.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1d2e3f4a5b6'
+down_revision: Union[str, None] = 'b0c1d2e3f4a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'semester_close_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('semester', sa.String(length=30), nullable=False),
+        sa.Column('academic_year', sa.String(length=20), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('pending', 'running', 'done', 'failed', name='semesterclosejobstatus'),
+            nullable=False,
+        ),
+        sa.Column('step', sa.String(length=32), nullable=False),
+        sa.Column('level_cursor', sa.Integer(), nullable=False),
+        sa.Column('sessions_closed', sa.Integer(), nullable=False),
+        sa.Column('enrollments_total', sa.Integer(), nullable=True),
+        sa.Column('students_unenrolled', sa.Integer(), nullable=False),
+        sa.Column('levels_updated', sa.Integer(), nullable=False),
+        sa.Column('requested_by', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint('semester', 'academic_year', name='uq_semester_close_jobs_semester_year'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('semester_close_jobs')
+    op.execute("DROP TYPE IF EXISTS semesterclosejobstatus")
@@ -0,0 +1,39 @@
+"""add indexes backing the absence anti-joins
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d6e7f8a9b0'
+down_revision: Union[str, None] = 'b4c5d6e7f8a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOT EXISTS (record for session, student) probes
+    op.create_index(
+        'ix_attendance_records_session_student',
+        'attendance_records',
+        ['session_id', 'student_id'],
+        unique=False,
+    )
+    # EXISTS (enrolment for course, student) probes; uq_student_course is student-first
+    op.create_index(
+        'ix_student_course_enrollments_course_student',
+        'student_course_enrollments',
+        ['course_id', 'student_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_student_course_enrollments_course_student', table_name='student_course_enrollments')
+    op.drop_index('ix_attendance_records_session_student', table_name='attendance_records')
@@ -0,0 +1,103 @@
+"""add attendance archive tables
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-19
+
+Archive tables for closed-semester sessions, records and verification logs
+(filled by the semester close job), plus the job's archive counters. Rows
+already in the hot tables move the next time their semester is closed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e3f4a5b6c7'
+down_revision: Union[str, None] = 'c1d2e3f4a5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _archive_columns() -> list:
+    return [
+        sa.Column('semester', sa.String(length=30), nullable=False),
+        sa.Column('academic_year', sa.String(length=20), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    # Reuse the live table's enum type on PostgreSQL
+    status_type = sa.Enum(
+        'confirmed', 'flagged', 'absent', 'pending_verification', name='attendancestatus'
+    ).with_variant(
+        postgresql.ENUM(name='attendancestatus', create_type=False), 'postgresql'
+    )
+
+    op.create_table(
+        'attendance_sessions_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('lecturer_id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=True),
+        sa.Column('programme', sa.String(length=100), nullable=True),
+        sa.Column('code', sa.String(length=16), nullable=False),
+        sa.Column('starts_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('ends_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('geofence_radius_m', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        *_archive_columns(),
+    )
+    op.create_index('ix_attendance_sessions_archive_course_ends_at', 'attendance_sessions_archive', ['course_id', 'ends_at'])
+    op.create_index('ix_attendance_sessions_archive_lecturer_id', 'attendance_sessions_archive', ['lecturer_id'])
+    op.create_index('ix_attendance_sessions_archive_semester_year', 'attendance_sessions_archive', ['academic_year', 'semester'])
+
+    op.create_table(
+        'attendance_records_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('device_id_hash', sa.String(length=64), nullable=False),
+        sa.Column('selfie_image_path', sa.String(length=255), nullable=True),
+        sa.Column('presence_image_path', sa.String(length=255), nullable=True),
+        sa.Column('status', status_type, nullable=False),
+        sa.Column('flag_reasons', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        *_archive_columns(),
+    )
+    op.create_index('ix_attendance_records_archive_student_session', 'attendance_records_archive', ['student_id', 'session_id'])
+    op.create_index('ix_attendance_records_archive_session_id', 'attendance_records_archive', ['session_id'])
+
+    op.create_table(
+        'verification_logs_archive',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('verified', sa.Boolean(), nullable=True),
+        sa.Column('distance', sa.Float(), nullable=True),
+        sa.Column('threshold', sa.Float(), nullable=True),
+        sa.Column('model', sa.String(length=64), nullable=True),
+        sa.Column('notes', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        *_archive_columns(),
+    )
+    op.create_index('ix_verification_logs_archive_session_user_id', 'verification_logs_archive', ['session_id', 'user_id', 'id'])
+    op.create_index('ix_verification_logs_archive_user_id', 'verification_logs_archive', ['user_id'])
+
+    op.add_column('semester_close_jobs', sa.Column('sessions_archived', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('semester_close_jobs', sa.Column('records_archived', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('semester_close_jobs', 'records_archived')
+    op.drop_column('semester_close_jobs', 'sessions_archived')
+    op.drop_table('verification_logs_archive')
+    op.drop_table('attendance_records_archive')
+    op.drop_table('attendance_sessions_archive')
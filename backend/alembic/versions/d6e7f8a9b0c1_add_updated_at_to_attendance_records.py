@@ -0,0 +1,31 @@
+"""add updated_at to attendance_records
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-19
+
+Lets session analytics derive an ETag from the newest record change.
+Existing rows are backfilled with their created_at.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6e7f8a9b0c1'
+down_revision: Union[str, None] = 'c5d6e7f8a9b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('attendance_records') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE attendance_records SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('attendance_records') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,28 @@
+"""drop the redundant attendance_records.session_id index
+
+Revision ID: e3f4a5b6c7d8
+Revises: d2e3f4a5b6c7
+Create Date: 2026-10-19
+
+ix_attendance_records_session_status and ix_attendance_records_session_student
+both lead with session_id, so the single-column index only costs writes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f4a5b6c7d8'
+down_revision: Union[str, None] = 'd2e3f4a5b6c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Created by create_all from the model's index=True, so not every database has it
+    op.drop_index('ix_attendance_records_session_id', table_name='attendance_records', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_attendance_records_session_id', 'attendance_records', ['session_id'], unique=False)
@@ -0,0 +1,40 @@
+"""covering index for the newest verification log per session+student
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-19
+
+Replaces ix_verification_logs_session_user (session_id, user_id), which only
+existed on databases created from the models, with (session_id, user_id, id)
+so the flagged review queue reads max(id) straight from the index.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f8a9b0c1d2'
+down_revision: Union[str, None] = 'd6e7f8a9b0c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_verification_logs_session_user_id',
+        'verification_logs',
+        ['session_id', 'user_id', 'id'],
+        unique=False,
+    )
+    op.drop_index('ix_verification_logs_session_user', table_name='verification_logs', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_verification_logs_session_user',
+        'verification_logs',
+        ['session_id', 'user_id'],
+        unique=False,
+    )
+    op.drop_index('ix_verification_logs_session_user_id', table_name='verification_logs')
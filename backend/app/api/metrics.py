@@ -0,0 +1,65 @@
+"""``/metrics`` scrape endpoint (Prometheus text format).
+
+Served at the app root rather than under ``/api/v1`` so Nginx, which only
+proxies ``/api/`` and ``/uploads/``, never exposes it publicly. It is off
+unless ``METRICS_ENABLED=true`` and additionally requires
+``Authorization: Bearer <METRICS_TOKEN>``.
+"""
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings
+from ..core.metrics import DB_POOL_CONNECTIONS, FACE_JOBS, FACE_OLDEST_PENDING_AGE, registry
+from ..db.deps import get_db
+from ..db.session import engine
+from ..models.face_verification_job import FaceVerificationJob, FaceVerificationJobStatus
+from ..services.utils import seconds_until
+
+router = APIRouter()
+
+
+def _collect_pool() -> None:
+    pool = engine.pool
+    for state, attr in (("size", "size"), ("checked_out", "checkedout"), ("idle", "checkedin"), ("overflow", "overflow")):
+        fn = getattr(pool, attr, None)
+        if callable(fn):
+            DB_POOL_CONNECTIONS.set(fn(), state)
+
+
+registry.add_collector(_collect_pool)
+
+
+def _collect_face_queue(db: Session) -> None:
+    counts = dict(
+        db.query(FaceVerificationJob.status, func.count(FaceVerificationJob.id))
+        .group_by(FaceVerificationJob.status)
+        .all()
+    )
+    for status in FaceVerificationJobStatus:
+        FACE_JOBS.set(counts.get(status, 0), status.value)
+    oldest = (
+        db.query(func.min(FaceVerificationJob.created_at))
+        .filter(FaceVerificationJob.status == FaceVerificationJobStatus.pending)
+        .scalar()
+    )
+    FACE_OLDEST_PENDING_AGE.set(max(0, -seconds_until(oldest)) if oldest else 0)
+
+
+def _require_metrics_access(request: Request) -> None:
+    settings = Settings()
+    if not settings.metrics_enabled or not settings.metrics_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(_require_metrics_access)])
+def metrics(db: Session = Depends(get_db)):
+    _collect_face_queue(db)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
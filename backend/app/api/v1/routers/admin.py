@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from itertools import islice
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Path, Query, Response, UploadFile
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
 from typing import List, Optional
@@ -14,15 +17,66 @@ from ....models.course import Course, CourseLecturer, CourseProgramme
 from ....models.student_course_enrollment import StudentCourseEnrollment
 from ....models.school_settings import SchoolSettings, get_or_create_settings
 from ....models.programme import Programme
+from ....models.semester_close_job import SemesterCloseJob
+from ....models.attendance_archive import ArchivedAttendanceSession
 from ....schemas.admin import CourseCreate, CourseUpdate, DeviceResetApprove, ProgrammeCreate
+from ....schemas.attendance import BulkManualMark, BulkStatusUpdate
+from ....services.admin_dashboard import admin_dashboard_cache
+from ....services.attendance_rollups import (
+    DAY,
+    GRANULARITY_PATTERN,
+    attendance_heatmap,
+    attendance_trend,
+    week_over_week,
+)
 from ....services.audit import write_audit
+from ....services.bulk_attendance import bulk_manual_mark, bulk_set_status
+from ....services.catalogue_cache import catalogue_cache
+from ....services.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    decode_cursor,
+    encode_cursor,
+    estimated_count,
+    keyset_page,
+)
+from ....services.exports import EXPORT_FORMAT_PATTERN, attendance_export_statement, streaming_export
+from ....services.import_jobs import (
+    get_import_job,
+    import_job_dict,
+    import_job_result,
+    run_import_job,
+    start_import_job,
+)
+from ....services.imports import IMPORT_KIND_PATTERN, ImportResult, read_rows, run_import
+from ....services.semester_close import run_semester_close, semester_close_job_dict, start_semester_close
+from ....services.school_settings import (
+    notify_school_settings_changed,
+    school_settings_cache,
+    school_settings_snapshot,
+)
+from ....services.course_serialization import (
+    course_summary,
+    lecturer_ids,
+    lecturer_names,
+    programme_names,
+    with_course_relations,
+)
 from ....api.deps.auth import role_required
 from ....services.face_verification import FaceVerificationService
 from ....services.utils import hash_device_id, utcnow, to_utc_iso
-from ....services.programmes import ensure_programmes_seeded, is_valid_programme
+from ....services.programmes import (
+    ensure_programmes_seeded,
+    is_valid_programme,
+    notify_programmes_changed,
+    programme_registry,
+)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Upper bound for ``limit`` on the paginated admin lists
+MAX_PAGE_SIZE = 500
+
 
 def get_current_admin(current: User = Depends(role_required(UserRole.admin))) -> User:
     return current
@@ -33,20 +87,22 @@ def get_current_admin(current: User = Depends(role_required(UserRole.admin))) ->
 
 @router.get("/courses", response_model=List[dict])
 def get_all_courses(
+    response: Response,
     search: Optional[str] = None,
     semester: Optional[str] = None,
-    limit: int = 100,
-    offset: int = 0,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_admin),
 ):
-    """List all courses with optional search and semester filters"""
-    from sqlalchemy.orm import selectinload
+    """List all courses with optional search and semester filters
 
-    query = db.query(Course).options(
-        selectinload(Course.programmes),
-        selectinload(Course.lecturers)
-    )
+    Ordered by code and keyset-paginated: pass the ``X-Next-Cursor`` header
+    of one page as ``cursor`` for the next. ``offset`` still works for old
+    clients. ``X-Total-Count-Estimate`` carries the approximate total.
+    """
+    query = with_course_relations(db.query(Course))
 
     if search:
         pattern = f"%{search}%"
@@ -56,7 +112,10 @@ def get_all_courses(
     if semester:
         query = query.filter(Course.semester == semester)
 
-    courses = query.order_by(Course.code).offset(offset).limit(limit).all()
+    response.headers[TOTAL_COUNT_HEADER] = str(estimated_count(db, query))
+    courses, next_cursor = keyset_page(query, Course.code, Course.id, limit=limit, cursor=cursor, offset=offset)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
     # Bulk fetch enrolled_count and session_count for all matched courses
     course_ids = [c.id for c in courses]
@@ -83,25 +142,21 @@ def get_all_courses(
         )
         session_counts = {cid: count for cid, count in session_data}
 
-    write_audit(db, "admin.get_all_courses", current.id, f"search={search}, semester={semester}")
-    
-    result = []
-    for c in courses:
-        result.append({
-            "id": c.id,
-            "code": c.code,
-            "name": c.name,
-            "description": c.description,
-            "semester": c.semester,
+    result = [
+        {
+            **course_summary(c),
             "level": c.level,
-            "programmes": [p.programme for p in c.programmes],
-            "lecturer_ids": [l.id for l in c.lecturers],
-            "lecturer_names": [l.full_name for l in c.lecturers if l.full_name],
+            "programmes": programme_names(c),
+            "lecturer_ids": lecturer_ids(c),
+            "lecturer_names": lecturer_names(c),
             "is_active": c.is_active,
             "enrolled_count": enrolled_counts.get(c.id, 0),
             "session_count": session_counts.get(c.id, 0),
             "created_at": to_utc_iso(c.created_at),
-        })
+        }
+        for c in courses
+    ]
+    write_audit(db, "admin.get_all_courses", current.id, f"search={search}, semester={semester}")
     return result
 
 
@@ -232,6 +287,7 @@ def create_course(
     db.commit()
     db.refresh(course)
 
+    catalogue_cache.invalidate()
     write_audit(db, "admin.create_course", current.id, f"course_id={course.id}")
     return {
         "id": course.id,
@@ -296,6 +352,7 @@ def update_course(
     db.commit()
     db.refresh(course)
 
+    catalogue_cache.invalidate()
     write_audit(db, "admin.update_course", current.id, f"course_id={course_id}")
     return {
         "id": course.id,
@@ -328,6 +385,7 @@ def delete_course(
     db.delete(course)
     db.commit()
 
+    catalogue_cache.invalidate()
     write_audit(db, "admin.delete_course", current.id, f"course_id={course_id}")
     return {"deleted": True, "course_id": course_id}
 
@@ -397,8 +455,10 @@ def create_programme(
         raise HTTPException(status_code=400, detail="Programme already exists")
     programme = Programme(name=name)
     db.add(programme)
+    notify_programmes_changed(db)
     db.commit()
     db.refresh(programme)
+    programme_registry.invalidate()
     write_audit(db, "admin.create_programme", current.id, f"name={name}")
     return {"id": programme.id, "name": programme.name}
 
@@ -426,53 +486,93 @@ def delete_programme(
         )
 
     db.delete(programme)
+    notify_programmes_changed(db)
     db.commit()
+    programme_registry.invalidate()
     write_audit(db, "admin.delete_programme", current.id, f"name={programme.name}")
     return {"deleted": True, "id": programme_id}
 
 
+FLAGGED_PAGE_SIZE = 50
+MAX_FLAGGED_PAGE_SIZE = 200
+
+
 @router.get("/flagged", response_model=list[dict])
-def list_all_flagged(db: Session = Depends(get_db), current: User = Depends(get_current_admin)):
-    records = db.query(AttendanceRecord).filter(AttendanceRecord.status == AttendanceStatus.flagged).all()
-    
-    result: list[dict] = []
-    if not records:
-        write_audit(db, "admin.list_flagged", current.id)
-        return result
-        
-    session_ids = list({r.session_id for r in records})
-    student_ids = list({r.student_id for r in records})
-    
-    # Batch fetch sessions
-    sessions = db.query(AttendanceSession).filter(AttendanceSession.id.in_(session_ids)).all()
-    session_map = {s.id: s for s in sessions}
-    
-    # Batch fetch verification logs (newest per user-session)
-    # Using window function equivalent or simple bulk fetch and sort
-    vlogs = (
-        db.query(VerificationLog)
-        .filter(VerificationLog.session_id.in_(session_ids), VerificationLog.user_id.in_(student_ids))
-        .order_by(VerificationLog.id.asc())  # Ascending so when we put in dict, last one overwrites
-        .all()
+def list_all_flagged(
+    response: Response,
+    limit: int = Query(FLAGGED_PAGE_SIZE, ge=1, le=MAX_FLAGGED_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    course_id: Optional[int] = None,
+    lecturer_id: Optional[int] = None,
+    flag_reason: Optional[str] = Query(None, pattern="^[a-z_]+$"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Flagged-record review queue, newest first.
+
+    Keyset-paginated on the record id: the ``X-Next-Cursor`` response header
+    carries the cursor for the next page and ``X-Total-Count-Estimate`` the
+    size of the whole (filtered) queue. Filters: course, lecturer, flag
+    reason (e.g. ``outside_geofence``) and a submission date range. Each
+    row's newest verification log is joined in SQL via a correlated
+    ``max(id)`` lookup on ``ix_verification_logs_session_user_id``.
+    """
+    from sqlalchemy import String, and_, cast
+
+    latest_log_id = (
+        db.query(func.max(VerificationLog.id))
+        .filter(
+            VerificationLog.session_id == AttendanceRecord.session_id,
+            VerificationLog.user_id == AttendanceRecord.student_id,
+        )
+        .correlate(AttendanceRecord)
+        .scalar_subquery()
+    )
+    query = (
+        db.query(AttendanceRecord, AttendanceSession.lecturer_id, AttendanceSession.course_id, VerificationLog)
+        .join(AttendanceSession, AttendanceSession.id == AttendanceRecord.session_id)
+        .outerjoin(VerificationLog, VerificationLog.id == latest_log_id)
+        .filter(AttendanceRecord.status == AttendanceStatus.flagged)
     )
-    vlog_map = {(log.session_id, log.user_id): log for log in vlogs}
+    if course_id is not None:
+        query = query.filter(AttendanceSession.course_id == course_id)
+    if lecturer_id is not None:
+        query = query.filter(AttendanceSession.lecturer_id == lecturer_id)
+    if flag_reason:
+        # flag_reasons is a JSON list of identifiers; match the quoted element
+        query = query.filter(cast(AttendanceRecord.flag_reasons, String).like(f'%"{flag_reason}"%'))
+    if date_from is not None:
+        query = query.filter(AttendanceRecord.created_at >= date_from)
+    if date_to is not None:
+        query = query.filter(AttendanceRecord.created_at <= date_to)
+    response.headers[TOTAL_COUNT_HEADER] = str(estimated_count(db, query))
+    if cursor:
+        query = query.filter(AttendanceRecord.id < decode_cursor(cursor, "id")["id"])
+
+    rows = query.order_by(AttendanceRecord.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(id=rows[-1][0].id)
 
-    for r in records:
-        session = session_map.get(r.session_id)
-        v = vlog_map.get((r.session_id, r.student_id))
-        
+    result: list[dict] = []
+    for r, session_lecturer_id, session_course_id, v in rows:
         result.append({
             "record_id": r.id,
             "session_id": r.session_id,
+            "course_id": session_course_id,
             "student_id": r.student_id,
-            "lecturer_id": None if not session else session.lecturer_id,
+            "lecturer_id": session_lecturer_id,
             "device_id_hash": r.device_id_hash[:8] + "..." if r.device_id_hash else None,  # Show partial hash for debugging
+            "flag_reasons": r.flag_reasons or [],
+            "submitted_at": to_utc_iso(r.created_at),
             "face_verified": None if not v else v.verified,
             "face_distance": None if not v else v.distance,
             "face_threshold": None if not v else v.threshold,
             "face_model": None if not v else v.model,
         })
-    write_audit(db, "admin.list_flagged", current.id)
+    write_audit(db, "admin.list_flagged", current.id, f"returned={len(result)}")
     return result
 
 
@@ -498,15 +598,34 @@ def set_attendance_status(
     return {"record_id": record.id, "session_id": record.session_id, "student_id": record.student_id, "status": record.status.value}
 
 
+@router.post("/attendance/bulk-set-status", response_model=dict)
+def bulk_set_attendance_status(
+    payload: BulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Override the status of many records in one transaction; reports each record's outcome."""
+    try:
+        new_status = AttendanceStatus(payload.status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status '{payload.status}'. Must be one of: confirmed, flagged, absent, pending_verification")
+    return bulk_set_status(db, payload.record_ids, new_status, actor=current)
+
+
 @router.get("/sessions", response_model=List[dict])
 def get_all_sessions(
+    response: Response,
     active_only: bool = False,
-    limit: int = 100,
-    offset: int = 0,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_admin)
 ):
-    """Get all attendance sessions with optional filtering"""
+    """Get all attendance sessions with optional filtering
+
+    Newest first, keyset-paginated on (created_at, id); see ``get_all_courses``.
+    """
     from sqlalchemy.orm import joinedload
     
     query = db.query(AttendanceSession).options(joinedload(AttendanceSession.lecturer))
@@ -514,7 +633,13 @@ def get_all_sessions(
     if active_only:
         query = query.filter(AttendanceSession.is_active == True)
     
-    sessions = query.order_by(desc(AttendanceSession.created_at)).offset(offset).limit(limit).all()
+    response.headers[TOTAL_COUNT_HEADER] = str(estimated_count(db, query))
+    sessions, next_cursor = keyset_page(
+        query, AttendanceSession.created_at, AttendanceSession.id,
+        limit=limit, cursor=cursor, offset=offset, descending=True,
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     result = []
     if sessions:
@@ -612,15 +737,190 @@ def get_session_attendance(
     return result
 
 
+@router.get("/exports/attendance")
+def export_semester_attendance(
+    semester: Optional[str] = None,
+    academic_year: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_archived: bool = False,
+    fmt: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Download attendance for every session of a semester's courses (default: the current semester and year).
+
+    Sessions still in the hot tables belong to the current academic year;
+    ``include_archived`` adds the sessions archived when that semester of
+    ``academic_year`` was closed. An earlier ``academic_year`` only exists
+    in the archive, so it implies ``include_archived``.
+    ``date_from``/``date_to`` narrow it to sessions starting in that range.
+    """
+    settings = school_settings_snapshot(db)
+    semester = semester or settings.current_semester
+    academic_year = academic_year or settings.academic_year
+    live = academic_year == settings.academic_year
+    include_archived = include_archived or not live
+    course_ids = db.query(Course.id).filter(Course.semester == semester)
+
+    def date_filters(sessions):
+        filters = []
+        if date_from is not None:
+            filters.append(sessions.starts_at >= date_from)
+        if date_to is not None:
+            filters.append(sessions.starts_at <= date_to)
+        return filters
+
+    archived_filters = None
+    if include_archived:
+        archived_filters = [
+            ArchivedAttendanceSession.semester == semester,
+            ArchivedAttendanceSession.academic_year == academic_year,
+            *date_filters(ArchivedAttendanceSession),
+        ]
+    response = streaming_export(
+        db.get_bind(),
+        attendance_export_statement(
+            AttendanceSession.course_id.in_(course_ids),
+            *date_filters(AttendanceSession),
+            archived_filters=archived_filters,
+            live=live,
+        ),
+        "attendance-" + f"{semester}-{academic_year}".lower().replace(" ", "-").replace("/", "-"),
+        fmt,
+    )
+    write_audit(
+        db, "admin.export_attendance", current.id,
+        f"semester={semester}, academic_year={academic_year}, format={fmt}, include_archived={include_archived}",
+    )
+    return response
+
+
+def _import_result_response(result: ImportResult, summary: dict, fmt: str) -> Response:
+    """The error report (``csv``) or the generated initial passwords (``credentials``) as a download."""
+    counts = {k: v for k, v in summary.items() if k not in ("errors", "errors_truncated", "credentials")}
+    content, name = (
+        (result.error_report_csv(), "errors") if fmt == "csv" else (result.credentials_csv(), "credentials")
+    )
+    return Response(
+        content=content,
+        media_type="text/csv; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="import-{result.kind}-{name}.csv"',
+            "X-Import-Summary": json.dumps(counts, separators=(",", ":")),
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+@router.post("/imports/{kind}")
+def import_records(
+    response: Response,
+    background_tasks: BackgroundTasks,
+    kind: str = Path(..., pattern=IMPORT_KIND_PATTERN),
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    fmt: str = Query("json", alias="format", pattern="^(json|csv|credentials)$"),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Bulk-load users, courses, course programmes/lecturers or enrolments from a CSV/XLSX file.
+
+    Valid rows are upserted; invalid rows are reported and skipped (see
+    ``services.imports`` for the columns of each kind). ``dry_run`` only
+    validates. ``format=csv`` returns the full error report as a download
+    instead of the JSON summary (the summary is then in ``X-Import-Summary``).
+
+    A users import that is not a dry run hashes a password per new account,
+    which takes minutes for a cohort, so it runs in the background: the
+    response is a 202 with the job; poll ``/imports/jobs/{id}``, which also
+    serves the error report and, once, the generated initial passwords.
+    """
+    from ....core.config import Settings
+
+    max_rows = Settings().import_max_rows
+    if kind == "users" and not dry_run:
+        rows = list(islice(read_rows(file.file, file.filename or ""), max_rows + 1))
+        if len(rows) > max_rows:
+            raise HTTPException(status_code=400, detail=f"Import files are limited to {max_rows} rows")
+        job = start_import_job(db, kind, len(rows), current)
+        payload = import_job_dict(job)
+        background_tasks.add_task(run_import_job, db.get_bind(), job.id, rows)
+        write_audit(db, "admin.import", current.id, f"kind={kind}, rows={len(rows)}, job={job.id}")
+        response.status_code = 202
+        response.headers["Cache-Control"] = "no-store"
+        return payload
+
+    result = run_import(
+        db,
+        kind,
+        read_rows(file.file, file.filename or ""),
+        dry_run=dry_run,
+        max_rows=max_rows,
+    )
+    if not dry_run:
+        catalogue_cache.invalidate()
+    summary = result.summary()
+    write_audit(
+        db, "admin.import", current.id,
+        f"kind={kind}, rows={result.rows}, created={result.created}, updated={result.updated}, "
+        f"failed={result.failed}, dry_run={dry_run}",
+    )
+    if fmt in ("csv", "credentials"):
+        return _import_result_response(result, summary, fmt)
+    response.headers["Cache-Control"] = "no-store"
+    return summary
+
+
+@router.get("/imports/jobs/{job_id}")
+def get_import_job_status(
+    response: Response,
+    job_id: int,
+    fmt: str = Query("json", alias="format", pattern="^(json|csv|credentials)$"),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Progress and result of a background import.
+
+    ``format=csv`` downloads the error report of a finished job and
+    ``format=credentials`` the generated initial passwords, which are erased
+    from the server once downloaded (410 after that).
+    """
+    job = get_import_job(db, job_id)
+    if fmt == "json":
+        response.headers["Cache-Control"] = "no-store"
+        return import_job_dict(job)
+    if job.summary is None:
+        raise HTTPException(status_code=409, detail=f"The import is {job.status.value}; there is no result to download")
+    summary = json.loads(job.summary)
+    if fmt == "credentials":
+        if job.credentials is None:
+            raise HTTPException(status_code=410, detail="The initial passwords were already downloaded")
+        result = import_job_result(job)
+        job.credentials = None
+        write_audit(
+            db, "admin.import.credentials", current.id,
+            f"job={job.id}, initial_passwords={len(result.credentials)}",
+        )
+    else:
+        result = import_job_result(job)
+    return _import_result_response(result, summary, fmt)
+
+
 @router.get("/users", response_model=List[dict])
 def get_all_users(
+    response: Response,
     role: Optional[str] = None,
-    limit: int = 100,
-    offset: int = 0,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_admin)
 ):
-    """Get all users with optional role filtering"""
+    """Get all users with optional role filtering
+
+    Newest first, keyset-paginated on (created_at, id); see ``get_all_courses``.
+    """
     query = db.query(User)
     
     if role:
@@ -630,7 +930,13 @@ def get_all_users(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid role")
     
-    users = query.order_by(desc(User.created_at)).offset(offset).limit(limit).all()
+    response.headers[TOTAL_COUNT_HEADER] = str(estimated_count(db, query))
+    users, next_cursor = keyset_page(
+        query, User.created_at, User.id,
+        limit=limit, cursor=cursor, offset=offset, descending=True,
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     result = []
     if not users:
@@ -806,6 +1112,20 @@ def manual_mark_attendance(
     }
 
 
+@router.post("/attendance/bulk-manual-mark", response_model=dict)
+def bulk_manual_mark_attendance(
+    payload: BulkManualMark,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Manually mark many (session, student, status) items at once, e.g. after a QR failure.
+
+    Items are validated together and written in one transaction; invalid
+    items are reported in ``results`` without failing the others.
+    """
+    return bulk_manual_mark(db, payload.items, actor=current, reason=payload.reason)
+
+
 @router.get("/activity", response_model=dict)
 def get_system_activity(
     hours: int = 24,
@@ -924,95 +1244,84 @@ def get_system_activity(
 
 @router.get("/dashboard", response_model=dict)
 def admin_dashboard(db: Session = Depends(get_db), current: User = Depends(get_current_admin)):
-    """Get comprehensive admin dashboard data"""
-    # Single grouped query for user role counts (replaces 3 separate count queries)
-    role_counts_raw = (
-        db.query(User.role, func.count(User.id))
-        .group_by(User.role)
-        .all()
-    )
-    role_counts = {role: cnt for role, cnt in role_counts_raw}
-    total_users = sum(role_counts.values())
-    total_students = role_counts.get(UserRole.student, 0)
-    total_lecturers = role_counts.get(UserRole.lecturer, 0)
-
-    # Single grouped query for session active/total counts
-    session_counts_raw = (
-        db.query(AttendanceSession.is_active, func.count(AttendanceSession.id))
-        .group_by(AttendanceSession.is_active)
-        .all()
-    )
-    session_counts = {is_active: cnt for is_active, cnt in session_counts_raw}
-    total_sessions = sum(session_counts.values())
-    active_sessions = session_counts.get(True, 0)
-
-    # Single grouped query for attendance status counts
-    status_counts = (
-        db.query(AttendanceRecord.status, func.count(AttendanceRecord.id))
-        .group_by(AttendanceRecord.status)
-        .all()
-    )
-    status_breakdown = {status.value: count for status, count in status_counts}
-    total_attendance = sum(status_breakdown.values())
-    flagged_attendance = status_breakdown.get(AttendanceStatus.flagged.value, 0)
-
-    # Recent activity (last 24 hours)
-    since = utcnow() - timedelta(hours=24)
-    recent_sessions = db.query(func.count(AttendanceSession.id)).filter(AttendanceSession.created_at >= since).scalar() or 0
-    recent_attendance = db.query(func.count(AttendanceRecord.id)).filter(AttendanceRecord.created_at >= since).scalar() or 0
-
-    # Top lecturers by session count
-    lecturer_stats = (
-        db.query(User.full_name, func.count(AttendanceSession.id))
-        .join(AttendanceSession, User.id == AttendanceSession.lecturer_id)
-        .group_by(User.id, User.full_name)
-        .order_by(desc(func.count(AttendanceSession.id)))
-        .limit(5)
-        .all()
-    )
+    """Get comprehensive admin dashboard data
 
+    Served from the per-worker snapshot in ``services.admin_dashboard``;
+    ``generated_at`` says when it was computed.
+    """
+    snapshot = admin_dashboard_cache.get(db)
     write_audit(db, "admin.dashboard", current.id)
-
-    return {
-        "overview": {
-            "total_users": total_users,
-            "total_students": total_students,
-            "total_lecturers": total_lecturers,
-            "total_sessions": total_sessions,
-            "active_sessions": active_sessions,
-            "total_attendance": total_attendance,
-            "flagged_attendance": flagged_attendance
-        },
-        "recent_activity": {
-            "sessions_last_24h": recent_sessions,
-            "attendance_last_24h": recent_attendance
-        },
-        "status_breakdown": status_breakdown,
-        "top_lecturers": [{"name": name, "session_count": count} for name, count in lecturer_stats]
-    }
+    return snapshot.dashboard()
 
 
 @router.get("/analytics", response_model=dict)
 def admin_analytics(db: Session = Depends(get_db), current: User = Depends(get_current_admin)):
     """Lightweight analytics overview (alias of key dashboard stats)."""
-    role_counts_raw = (
-        db.query(User.role, func.count(User.id))
-        .group_by(User.role)
-        .all()
+    return admin_dashboard_cache.get(db).analytics()
+
+
+@router.get("/analytics/trends", response_model=List[dict])
+def admin_attendance_trends(
+    granularity: str = Query(DAY, pattern=GRANULARITY_PATTERN),
+    course_id: Optional[int] = None,
+    lecturer_id: Optional[int] = None,
+    programme: Optional[str] = None,
+    level: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Status counts and attendance rate per hour/day, from the attendance rollups.
+
+    Buckets are by session start; figures trail live data by up to one
+    aggregator interval.
+    """
+    return attendance_trend(
+        db,
+        granularity,
+        course_ids=None if course_id is None else [course_id],
+        lecturer_id=lecturer_id,
+        programme=programme,
+        level=level,
+        date_from=date_from,
+        date_to=date_to,
     )
-    role_counts = {role: cnt for role, cnt in role_counts_raw}
-    total_users = sum(role_counts.values())
-    total_sessions = db.query(func.count(AttendanceSession.id)).scalar() or 0
-    total_attendance = db.query(func.count(AttendanceRecord.id)).scalar() or 0
-    flagged = db.query(func.count(AttendanceRecord.id)).filter(
-        AttendanceRecord.status == AttendanceStatus.flagged
-    ).scalar() or 0
-    return {
-        "total_users": total_users,
-        "total_sessions": total_sessions,
-        "total_attendance": total_attendance,
-        "flagged_attendance": flagged,
-    }
+
+
+@router.get("/analytics/heatmap", response_model=List[dict])
+def admin_attendance_heatmap(
+    course_id: Optional[int] = None,
+    lecturer_id: Optional[int] = None,
+    programme: Optional[str] = None,
+    level: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Attendance by weekday (0 = Monday) and hour of day, e.g. for one course."""
+    return attendance_heatmap(
+        db,
+        course_ids=None if course_id is None else [course_id],
+        lecturer_id=lecturer_id,
+        programme=programme,
+        level=level,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get("/analytics/week-over-week", response_model=List[dict])
+def admin_week_over_week(
+    lecturer_id: Optional[int] = None,
+    programme: Optional[str] = None,
+    level: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Per course: attendance over the last 7 days against the 7 days before."""
+    return week_over_week(db, lecturer_id=lecturer_id, programme=programme, level=level)
 
 
 
@@ -1026,7 +1335,7 @@ def get_school_settings(
     current: User = Depends(get_current_admin),
 ):
     """Return the current academic calendar settings (singleton)."""
-    settings = get_or_create_settings(db)
+    settings = school_settings_snapshot(db)
     write_audit(db, "admin.get_school_settings", current.id)
     return {
         "current_semester": settings.current_semester,
@@ -1061,7 +1370,9 @@ def update_school_settings(
     if academic_year is not None:
         settings.academic_year = academic_year
 
+    notify_school_settings_changed(db)
     db.commit()
+    school_settings_cache.invalidate()
     db.refresh(settings)
     write_audit(db, "admin.update_school_settings", current.id,
                 f"semester={settings.current_semester}, break={settings.is_on_break}, enroll_open={settings.enrollment_open}")
@@ -1074,103 +1385,42 @@ def update_school_settings(
     }
 
 
-@router.post("/semester/close", response_model=dict)
+@router.post("/semester/close", response_model=dict, status_code=202)
 def close_semester(
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_admin),
 ):
-    """End the current semester.
-
-    Actions performed:
-    1. Close all active AttendanceSessions for courses in the current semester.
-    2. Delete all StudentCourseEnrollments for those courses.
-    3. Auto-increment each student's level (100→200→300→400; 400 unchanged).
-    4. Mark the school as on break with enrolment closed.
+    """End the current semester in the background; poll ``/semester/close/jobs/{id}``.
+
+    The job:
+    1. Marks the school as on break with enrolment closed and closes all
+       active AttendanceSessions for courses in the current semester.
+    2. Deletes all StudentCourseEnrollments for those courses, in chunks.
+    3. At the end of the 2nd Semester, advances each student's level
+       (100→200→300→400; 400 unchanged).
+    4. Advances the semester pointer (and academic year).
+
+    Calling this again while the job is unfinished returns the same job and
+    resumes it if it failed or its worker died.
     """
-    settings = get_or_create_settings(db)
-    semester = settings.current_semester
+    job = start_semester_close(db, current)
+    payload = semester_close_job_dict(job)
+    background_tasks.add_task(run_semester_close, db.get_bind(), job.id)
+    write_audit(db, "admin.close_semester", current.id, f"semester={job.semester}, job={job.id}")
+    return payload
 
-    # 1. Find all courses for this semester
-    courses = db.query(Course).filter(Course.semester == semester).all()
-    course_ids = [c.id for c in courses]
 
-    sessions_closed = 0
-    if course_ids:
-        # Close active sessions
-        active_sessions = (
-            db.query(AttendanceSession)
-            .filter(
-                AttendanceSession.course_id.in_(course_ids),
-                AttendanceSession.is_active == True,
-            )
-            .all()
-        )
-        for s in active_sessions:
-            s.is_active = False
-            s.qr_nonce = None
-            s.qr_expires_at = None
-        sessions_closed = len(active_sessions)
-
-    # 2. Delete all enrolments for these courses
-    students_unenrolled = 0
-    if course_ids:
-        students_unenrolled = (
-            db.query(StudentCourseEnrollment)
-            .filter(StudentCourseEnrollment.course_id.in_(course_ids))
-            .delete(synchronize_session=False)
-        )
-
-    # 3. Auto-increment student levels ONLY at end of 2nd Semester.
-    #    There are two semesters per academic year, so students advance
-    #    after completing both (i.e., when 2nd Semester closes).
-    levels_updated = 0
-    is_end_of_year = semester == "2nd Semester"
-    if is_end_of_year:
-        level_map = {100: 200, 200: 300, 300: 400}
-        students = (
-            db.query(User)
-            .filter(User.role == UserRole.student, User.level.in_([100, 200, 300]))
-            .all()
-        )
-        for student in students:
-            new_level = level_map.get(student.level)
-            if new_level:
-                student.level = new_level
-                levels_updated += 1
-
-    # 4. Advance the semester pointer and (if year-end) the academic year.
-    if semester == "1st Semester":
-        next_semester = "2nd Semester"
-        next_year = settings.academic_year  # same academic year
-    else:
-        next_semester = "1st Semester"
-        # Increment academic year string, e.g. "2024/2025" → "2025/2026"
-        try:
-            start, end = settings.academic_year.split("/")
-            next_year = f"{int(end)}/{int(end) + 1}"
-        except Exception:
-            next_year = settings.academic_year  # fallback: keep as-is
-
-    # 5. Mark school as on break, close enrolment, advance semester
-    settings.is_on_break = True
-    settings.enrollment_open = False
-    settings.current_semester = next_semester
-    settings.academic_year = next_year
-
-    db.commit()
-
-    write_audit(
-        db, "admin.close_semester", current.id,
-        f"semester={semester}, sessions_closed={sessions_closed}, "
-        f"students_unenrolled={students_unenrolled}, levels_updated={levels_updated}",
-    )
-    return {
-        "semester_closed": semester,
-        "next_semester": next_semester,
-        "sessions_closed": sessions_closed,
-        "students_unenrolled": students_unenrolled,
-        "levels_updated": levels_updated,
-        "school_status": "on_break",
-    }
+@router.get("/semester/close/jobs/{job_id}", response_model=dict)
+def get_semester_close_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_admin),
+):
+    """Progress of a semester close job."""
+    job = db.get(SemesterCloseJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Semester close job not found")
+    return semester_close_job_dict(job)
 
 
@@ -1,16 +1,16 @@
 import re
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from ....schemas.auth import Token, UserCreate, UserRead, UserProfileRead, UserUpdate, PasswordChange, AuthResponse
 from ....services.security import (
     get_password_hash,
     verify_password,
+    verify_and_update_password,
     create_access_token,
     create_refresh_token,
-    decode_token,
-    is_refresh_token,
+    decode_token_claims,
 )
 from ....db.deps import get_db
 from ....api.deps.auth import get_current_user
@@ -23,7 +23,10 @@ from ....services.face_storage import has_face_enrolled
 from ....services.audit import write_audit
 from ....services.rate_limit import rate_limit
 from ....services.programmes import is_valid_programme, list_programme_names
+from ....services.http_cache import cached_json_response
+from ....services.attendance_archive import delete_archived_user_data
 from ....services.user_deletion import delete_user_uploads
+from ....services.attendance_summaries import refresh_attendance_summaries
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -38,9 +41,9 @@ LECTURER_ID_PATTERN = r"^\d{7}$"
 
 
 @router.get("/programmes", response_model=list)
-def list_programmes(db: Session = Depends(get_db)):
+def list_programmes(request: Request, db: Session = Depends(get_db)):
     """Public list of valid programme names (for registration/profile forms)."""
-    return list_programme_names(db)
+    return cached_json_response(request, list_programme_names(db), cache_control="public, max-age=300")
 
 
 @router.post("/register", response_model=UserRead)
@@ -152,8 +155,15 @@ def login(
     if not user:
         user = db.query(User).filter(User.user_id == form_data.username).first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email/user ID or password")
+    verified, new_hash = verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email/user ID or password")
+    if new_hash:
+        # KDF parameters changed since this hash was made; upgrade it in place
+        user.hashed_password = new_hash
+        db.commit()
 
     access = create_access_token(subject=str(user.id))
     refresh = create_refresh_token(subject=str(user.id))
@@ -270,11 +280,10 @@ def change_password(
 
 @router.post("/refresh", response_model=Token)
 def refresh_token(token: str = Depends(oauth2_scheme)):
-    if not is_refresh_token(token):
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
-    sub = decode_token(token)
-    if not sub:
+    claims = decode_token_claims(token)
+    if not claims or claims.get("type") != "refresh" or not claims.get("sub"):
         raise HTTPException(status_code=401, detail="Invalid refresh token")
+    sub = claims["sub"]
     access = create_access_token(subject=sub)
     return Token(access_token=access)
 
@@ -308,11 +317,21 @@ def delete_account(
         db.query(CourseLecturer).filter(CourseLecturer.lecturer_id == user_id).delete(
             synchronize_session=False
         )
+        session_course_ids = [
+            course_id
+            for (course_id,) in db.query(AttendanceSession.course_id)
+            .filter(AttendanceSession.lecturer_id == user_id, AttendanceSession.course_id != None)
+            .distinct()
+            .all()
+        ]
         db.query(AttendanceSession).filter(AttendanceSession.lecturer_id == user_id).delete(
             synchronize_session=False
         )
+        # Bulk delete skips the flush hook that maintains dashboard counters
+        refresh_attendance_summaries(db, course_ids=session_course_ids)
 
     db.query(Device).filter(Device.user_id == user_id).delete(synchronize_session=False)
+    delete_archived_user_data(db, user_id)
 
     write_audit(db, "auth.delete_account", user_id, f"email={email}", auto_commit=False)
     db.delete(current)
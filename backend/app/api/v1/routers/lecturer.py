@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
+from datetime import datetime
 from ....db.deps import get_db
 from ....models.user import UserRole, User
 from ....models.course import Course, CourseLecturer, CourseProgramme
@@ -8,10 +9,31 @@ from ....models.device import Device
 from ....models.attendance_session import AttendanceSession
 from ....models.attendance_record import AttendanceRecord, AttendanceStatus
 from ....models.verification_log import VerificationLog
+from ....models.attendance_archive import ArchivedAttendanceSession
 from ....schemas.auth import UserRead
+from ....schemas.attendance import BulkManualMark, BulkStatusUpdate
 from ....schemas.lecturer import QRStatusResponse, QRDisplayResponse, QRPayload, SessionCreate
 from ....services.utils import generate_session_code, generate_session_nonce, utcnow, to_utc_iso, seconds_until
+from ....services.absence import absent_counts_by_session, absent_students
+from ....services.attendance_rollups import (
+    DAY,
+    GRANULARITY_PATTERN,
+    attendance_heatmap,
+    attendance_trend,
+    week_over_week,
+)
 from ....services.audit import write_audit
+from ....services.bulk_attendance import bulk_manual_mark, bulk_set_status
+from ....services.catalogue_cache import catalogue_cache
+from ....services.exports import EXPORT_FORMAT_PATTERN, attendance_export_statement, streaming_export
+from ....services.http_cache import cached_json_response, compute_etag, not_modified
+from ....services.course_serialization import (
+    course_summary,
+    lecturer_ids,
+    lecturer_names,
+    programme_names,
+    with_course_relations,
+)
 from ....services.qr_rotation import add_session_to_rotation, remove_session_from_rotation, ensure_qr_valid
 from ....api.deps.auth import role_required
 
@@ -26,13 +48,8 @@ def get_current_lecturer(current: User = Depends(role_required(UserRole.lecturer
 @router.get("/courses", response_model=List[dict])
 def get_lecturer_courses(db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
     """Get all courses taught by the current lecturer"""
-    from sqlalchemy.orm import selectinload
     courses = (
-        db.query(Course)
-        .options(
-            selectinload(Course.programmes),
-            selectinload(Course.lecturers)
-        )
+        with_course_relations(db.query(Course))
         .join(CourseLecturer, Course.id == CourseLecturer.course_id)
         .filter(
             CourseLecturer.lecturer_id == current.id,
@@ -55,22 +72,19 @@ def get_lecturer_courses(db: Session = Depends(get_db), current: User = Depends(
         )
         session_counts = {cid: count for cid, count in session_data}
     
-    write_audit(db, "lecturer.get_courses", current.id)
-    return [
+    result = [
         {
-            "id": course.id,
-            "code": course.code,
-            "name": course.name,
-            "description": course.description,
-            "semester": course.semester,
+            **course_summary(course),
             "is_active": course.is_active,
             "created_at": to_utc_iso(course.created_at),
             "session_count": session_counts.get(course.id, 0),
-            "programmes": [p.programme for p in course.programmes],
-            "lecturer_names": [l.full_name for l in course.lecturers if l.full_name],
+            "programmes": programme_names(course),
+            "lecturer_names": lecturer_names(course),
         }
         for course in courses
     ]
+    write_audit(db, "lecturer.get_courses", current.id)
+    return result
 
 
 @router.get("/courses/all", response_model=List[dict])
@@ -88,11 +102,7 @@ def browse_all_courses(
     Returns all courses with optional search (code or name) and semester filters.
     Multiple lecturers can claim the same course.
     """
-    from sqlalchemy.orm import selectinload
-    query = db.query(Course).options(
-        selectinload(Course.programmes),
-        selectinload(Course.lecturers)
-    ).filter(Course.is_active == True)
+    query = with_course_relations(db.query(Course)).filter(Course.is_active == True)
 
     if search:
         pattern = f"%{search}%"
@@ -104,24 +114,21 @@ def browse_all_courses(
 
     courses = query.order_by(Course.code).offset(offset).limit(limit).all()
 
-    write_audit(db, "lecturer.browse_all_courses", current.id, f"search={search}, semester={semester}")
-    return [
+    result = [
         {
-            "id": c.id,
-            "code": c.code,
-            "name": c.name,
-            "description": c.description,
-            "semester": c.semester,
-            "lecturer_ids": [l.id for l in c.lecturers],
-            "lecturer_names": [l.full_name for l in c.lecturers if l.full_name],
+            **course_summary(c),
+            "lecturer_ids": lecturer_ids(c),
+            "lecturer_names": lecturer_names(c),
             "is_active": c.is_active,
             "is_claimed": len(c.lecturers) > 0,
             "is_mine": any(l.id == current.id for l in c.lecturers),
-            "programmes": [p.programme for p in c.programmes],
+            "programmes": programme_names(c),
             "created_at": to_utc_iso(c.created_at),
         }
         for c in courses
     ]
+    write_audit(db, "lecturer.browse_all_courses", current.id, f"search={search}, semester={semester}")
+    return result
 
 
 @router.post("/courses/{course_id}/claim", response_model=dict)
@@ -156,6 +163,7 @@ def claim_course(
     db.commit()
     db.refresh(course)
 
+    catalogue_cache.invalidate()
     write_audit(db, "lecturer.claim_course", current.id, f"course_id={course_id}")
     return {
         "id": course.id,
@@ -192,6 +200,7 @@ def unclaim_course(
     db.delete(link)
     db.commit()
 
+    catalogue_cache.invalidate()
     write_audit(db, "lecturer.unclaim_course", current.id, f"course_id={course_id}")
     return {
         "id": course.id,
@@ -263,6 +272,7 @@ def get_course_details(course_id: int, db: Session = Depends(get_db), current: U
             .all()
         )
         att_counts = {sid: count for sid, count in att_data}
+        absent_counts = absent_counts_by_session(db, session_ids)
         
         for session in recent_sessions:
             recent_sessions_data.append({
@@ -271,7 +281,8 @@ def get_course_details(course_id: int, db: Session = Depends(get_db), current: U
                 "is_active": session.is_active,
                 "starts_at": to_utc_iso(session.starts_at),
                 "ends_at": to_utc_iso(session.ends_at),
-                "attendance_count": att_counts.get(session.id, 0)
+                "attendance_count": att_counts.get(session.id, 0),
+                "absent_count": absent_counts.get(session.id, 0),
             })
     
     write_audit(db, "lecturer.get_course_details", current.id, f"course_id={course_id}")
@@ -292,6 +303,92 @@ def get_course_details(course_id: int, db: Session = Depends(get_db), current: U
     }
 
 
+@router.get("/courses/{course_id}/export")
+def export_course_attendance(
+    course_id: int,
+    include_archived: bool = False,
+    fmt: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Download attendance for every session of a course the lecturer teaches.
+
+    ``include_archived`` adds sessions archived at the close of past semesters.
+    """
+    teaches = db.query(CourseLecturer).filter(
+        CourseLecturer.course_id == course_id,
+        CourseLecturer.lecturer_id == current.id,
+    ).first()
+    if not teaches:
+        raise HTTPException(status_code=404, detail="Course not found")
+    response = streaming_export(
+        db.get_bind(),
+        attendance_export_statement(
+            AttendanceSession.course_id == course_id,
+            archived_filters=[ArchivedAttendanceSession.course_id == course_id] if include_archived else None,
+        ),
+        f"attendance-course-{course_id}",
+        fmt,
+    )
+    write_audit(
+        db, "lecturer.export_course", current.id,
+        f"course_id={course_id}, format={fmt}, include_archived={include_archived}",
+    )
+    return response
+
+
+def _require_taught_course(db: Session, course_id: int, lecturer: User) -> None:
+    teaches = db.query(CourseLecturer).filter(
+        CourseLecturer.course_id == course_id,
+        CourseLecturer.lecturer_id == lecturer.id,
+    ).first()
+    if not teaches:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+
+@router.get("/courses/{course_id}/trends", response_model=List[dict])
+def get_course_trends(
+    course_id: int,
+    granularity: str = Query(DAY, pattern=GRANULARITY_PATTERN),
+    programme: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Attendance rate per hour/day for a course, from the attendance rollups."""
+    _require_taught_course(db, course_id, current)
+    return attendance_trend(
+        db, granularity, course_ids=[course_id], programme=programme, date_from=date_from, date_to=date_to
+    )
+
+
+@router.get("/courses/{course_id}/heatmap", response_model=List[dict])
+def get_course_heatmap(
+    course_id: int,
+    programme: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Attendance for a course by weekday (0 = Monday) and hour of day."""
+    _require_taught_course(db, course_id, current)
+    return attendance_heatmap(
+        db, course_ids=[course_id], programme=programme, date_from=date_from, date_to=date_to
+    )
+
+
+@router.get("/analytics/week-over-week", response_model=List[dict])
+def get_week_over_week(db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
+    """This week against last week for every course the lecturer teaches."""
+    course_ids = [
+        course_id for (course_id,) in
+        db.query(CourseLecturer.course_id).filter(CourseLecturer.lecturer_id == current.id)
+    ]
+    return week_over_week(db, course_ids=course_ids)
+
+
 @router.put("/courses/{course_id}", response_model=dict)
 def update_course(
     course_id: int,
@@ -338,6 +435,7 @@ def update_course(
     db.commit()
     db.refresh(course)
     
+    catalogue_cache.invalidate()
     write_audit(db, "lecturer.update_course", current.id, f"course_id={course_id}")
     return {
         "id": course.id,
@@ -471,7 +569,7 @@ def create_session(
 def rotate_qr(session_id: int, ttl_seconds: int = 30, db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
     """Manually rotate QR code (optional - QR is automatically managed, this is for manual override)"""
     from datetime import timedelta
-    session = db.get(AttendanceSession, session_id)
+    session = db.get(AttendanceSession, session_id, options=[joinedload(AttendanceSession.course)])
     if not session or session.lecturer_id != current.id:
         raise HTTPException(status_code=404, detail="Session not found")
     if not session.is_active:
@@ -480,21 +578,17 @@ def rotate_qr(session_id: int, ttl_seconds: int = 30, db: Session = Depends(get_
     session.qr_previous_nonce = session.qr_nonce
     session.qr_nonce = generate_session_nonce()
     session.qr_expires_at = utcnow() + timedelta(seconds=ttl_seconds)
-    db.commit()
-    
-    # Ensure session is in rotation
-    add_session_to_rotation(session.id)
-    
-    write_audit(db, "lecturer.rotate_qr", current.id, f"session_id={session_id}")
-    
-    # Enhanced QR payload with session context
+
+    # Enhanced QR payload with session context. Built before the commit,
+    # which would expire the session and reload it (and its course) on access.
+    course = session.course
     qr_payload = {
         "session_id": session.id,
         "nonce": session.qr_nonce,
         "expires_at": to_utc_iso(session.qr_expires_at),
         "lecturer_name": current.full_name or current.email,
-        "course_code": session.course.code if session.course else None,
-        "course_name": session.course.name if session.course else "General Session",
+        "course_code": course.code if course else None,
+        "course_name": course.name if course else "General Session",
         "location": {
             "latitude": session.latitude,
             "longitude": session.longitude,
@@ -502,11 +596,17 @@ def rotate_qr(session_id: int, ttl_seconds: int = 30, db: Session = Depends(get_
         } if session.latitude else None,
         "session_code": session.code  # Include for display purposes
     }
-    
+
+    write_audit(db, "lecturer.rotate_qr", current.id, f"session_id={session_id}", auto_commit=False)
+    db.commit()
+
+    # Ensure session is in rotation
+    add_session_to_rotation(session_id)
+
     return {
-        "session_id": session.id,
-        "nonce": session.qr_nonce,
-        "expires_at": to_utc_iso(session.qr_expires_at),
+        "session_id": qr_payload["session_id"],
+        "nonce": qr_payload["nonce"],
+        "expires_at": qr_payload["expires_at"],
         "qr_payload": qr_payload  # This is what gets encoded in QR
     }
 
@@ -660,20 +760,57 @@ def get_geofence(
     }
 
 
+def _has_ended(ends_at, now) -> bool:
+    ends_at_naive = ends_at.replace(tzinfo=None) if ends_at and ends_at.tzinfo else ends_at
+    now_naive = now.replace(tzinfo=None) if now.tzinfo else now
+    return bool(ends_at_naive and ends_at_naive < now_naive)
+
+
 @router.get("/sessions", response_model=List[dict])
-def list_sessions(db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
+def list_sessions(request: Request, db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
+    """List the lecturer's sessions with per-status attendance counts.
+
+    Polled by the reports page. The ETag covers the sessions' own fields,
+    the newest record change and the newest course edit, so an unchanged
+    list answers 304 before the course and count queries run.
+    ``time_remaining_seconds`` is left out of the ETag; clients anchor
+    countdowns on ``ends_at`` and ``X-Server-Time``.
+    """
     from sqlalchemy import func
 
+    now = utcnow()
     sessions = (
         db.query(AttendanceSession)
         .filter(AttendanceSession.lecturer_id == current.id)
         .order_by(AttendanceSession.id.desc())
         .all()
     )
-    write_audit(db, "lecturer.list_sessions", current.id)
+    lecturer_session_ids = db.query(AttendanceSession.id).filter(AttendanceSession.lecturer_id == current.id)
+    lecturer_course_ids = db.query(AttendanceSession.course_id).filter(AttendanceSession.lecturer_id == current.id)
+    course_changed = (
+        db.query(func.max(Course.updated_at)).filter(Course.id.in_(lecturer_course_ids)).scalar_subquery()
+    )
+    record_count, record_changed, course_changed = (
+        db.query(func.count(AttendanceRecord.id), func.max(AttendanceRecord.updated_at), course_changed)
+        .filter(AttendanceRecord.session_id.in_(lecturer_session_ids))
+        .one()
+    )
+    etag = compute_etag([
+        [(s.id, s.code, s.is_active and not _has_ended(s.ends_at, now), s.programme, s.course_id, to_utc_iso(s.ends_at))
+         for s in sessions],
+        record_count, to_utc_iso(record_changed), to_utc_iso(course_changed),
+    ])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    # Committed with any expired sessions below; committing here would expire
+    # the loaded sessions and reload each one on first access.
+    write_audit(db, "lecturer.list_sessions", current.id, auto_commit=False)
 
     if not sessions:
-        return []
+        db.commit()
+        return cached_json_response(request, [], etag=etag)
 
     session_ids = [s.id for s in sessions]
     course_ids = list({s.course_id for s in sessions if s.course_id})
@@ -692,17 +829,13 @@ def list_sessions(db: Session = Depends(get_db), current: User = Depends(get_cur
     for sid, status, cnt in count_rows:
         counts.setdefault(sid, {})[status.value] = cnt
 
-    now = utcnow()
     result = []
     for s in sessions:
         is_actually_active = s.is_active
-        ends_at_naive = s.ends_at.replace(tzinfo=None) if s.ends_at and s.ends_at.tzinfo else s.ends_at
-        now_naive = now.replace(tzinfo=None) if now.tzinfo else now
-        if ends_at_naive and ends_at_naive < now_naive:
+        if _has_ended(s.ends_at, now):
             is_actually_active = False
             if s.is_active:
                 s.is_active = False
-                db.commit()
 
         course = course_map.get(s.course_id) if s.course_id else None
         session_counts = counts.get(s.id, {})
@@ -731,22 +864,42 @@ def list_sessions(db: Session = Depends(get_db), current: User = Depends(get_cur
                 "absent": absent,
             },
         })
+    db.commit()
 
-    return result
+    return cached_json_response(request, result, etag=etag)
 
 
 @router.get("/sessions/{session_id}/attendance", response_model=List[dict])
-def get_attendance(session_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
+def get_attendance(
+    session_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Records submitted for a session; answers 304 while no record or student has changed."""
+    from sqlalchemy import func
+
     session = db.get(AttendanceSession, session_id)
     if not session or session.lecturer_id != current.id:
         raise HTTPException(status_code=404, detail="Session not found")
-    
+
+    version = (
+        db.query(func.count(AttendanceRecord.id), func.max(AttendanceRecord.updated_at), func.max(User.updated_at))
+        .outerjoin(User, User.id == AttendanceRecord.student_id)
+        .filter(AttendanceRecord.session_id == session_id)
+        .one()
+    )
+    etag = compute_etag([session_id, version[0], to_utc_iso(version[1]), to_utc_iso(version[2])])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     records = db.query(AttendanceRecord).filter(AttendanceRecord.session_id == session_id).all()
     
     result = []
     if not records:
         write_audit(db, "lecturer.get_attendance", current.id, f"session_id={session_id}")
-        return result
+        return cached_json_response(request, result, etag=etag)
         
     student_ids = [r.student_id for r in records]
     students = db.query(User).filter(User.id.in_(student_ids)).all()
@@ -765,7 +918,28 @@ def get_attendance(session_id: int, db: Session = Depends(get_db), current: User
         })
         
     write_audit(db, "lecturer.get_attendance", current.id, f"session_id={session_id}")
-    return result
+    return cached_json_response(request, result, etag=etag)
+
+
+@router.get("/sessions/{session_id}/export")
+def export_session_attendance(
+    session_id: int,
+    fmt: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Download a session's attendance (absent students included) as CSV or Parquet."""
+    session = db.get(AttendanceSession, session_id)
+    if not session or session.lecturer_id != current.id:
+        raise HTTPException(status_code=404, detail="Session not found")
+    response = streaming_export(
+        db.get_bind(),
+        attendance_export_statement(AttendanceSession.id == session_id),
+        f"attendance-session-{session_id}",
+        fmt,
+    )
+    write_audit(db, "lecturer.export_session", current.id, f"session_id={session_id}, format={fmt}")
+    return response
 
 
 @router.get("/sessions/{session_id}/flagged", response_model=List[dict])
@@ -853,6 +1027,34 @@ def reject_flagged_attendance(record_id: int, db: Session = Depends(get_db), cur
     return {"record_id": record.id, "status": record.status.value}
 
 
+# Lecturers can only confirm or reject, as with the single-record endpoints
+_LECTURER_BULK_STATUSES = (AttendanceStatus.confirmed, AttendanceStatus.absent)
+
+
+@router.post("/attendance/bulk-status", response_model=dict)
+def bulk_review_attendance(
+    payload: BulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Confirm (``confirmed``) or reject (``absent``) many records of the lecturer's sessions at once."""
+    if payload.status not in {s.value for s in _LECTURER_BULK_STATUSES}:
+        raise HTTPException(status_code=400, detail="Status must be 'confirmed' or 'absent'")
+    return bulk_set_status(
+        db, payload.record_ids, AttendanceStatus(payload.status), actor=current, lecturer_id=current.id
+    )
+
+
+@router.post("/attendance/bulk-manual-mark", response_model=dict)
+def bulk_manual_mark_attendance(
+    payload: BulkManualMark,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Mark many students in the lecturer's own sessions by hand (e.g. the QR display failed)."""
+    return bulk_manual_mark(db, payload.items, actor=current, reason=payload.reason, lecturer_id=current.id)
+
+
 @router.get("/dashboard", response_model=dict)
 def dashboard(db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
     from datetime import datetime
@@ -899,46 +1101,89 @@ def dashboard(db: Session = Depends(get_db), current: User = Depends(get_current
     }
 
 
+ANALYTICS_RECENT_RECORDS = 10
+
+
 @router.get("/sessions/{session_id}/analytics", response_model=dict)
-def get_session_analytics(session_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
-    """Get detailed analytics for a specific session - web-friendly endpoint"""
+def get_session_analytics(
+    session_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_lecturer),
+):
+    """Get detailed analytics for a specific session - web-friendly endpoint
+
+    The reports page polls this. The ETag is derived from a cheap version
+    probe (enrolment count, record count, newest record change, newest
+    verification log) so an unchanged session answers 304 without
+    recomputing anything.
+    """
+    from sqlalchemy import func
     from ....models.student_course_enrollment import StudentCourseEnrollment
 
     session = db.get(AttendanceSession, session_id)
     if not session or session.lecturer_id != current.id:
         raise HTTPException(status_code=404, detail="Session not found")
-    
+
     # Total = enrolled students in the course
-    total_students = (
-        db.query(User)
-        .join(StudentCourseEnrollment, User.id == StudentCourseEnrollment.student_id)
+    enrolled_sq = (
+        db.query(func.count(StudentCourseEnrollment.id))
         .filter(StudentCourseEnrollment.course_id == session.course_id)
-        .count()
+        .scalar_subquery()
     )
-    
-    # Get attendance records for this session
-    records = db.query(AttendanceRecord).filter(AttendanceRecord.session_id == session_id).all()
-    present_count = len([r for r in records if r.status == AttendanceStatus.confirmed])
-    flagged_count = len([r for r in records if r.status == AttendanceStatus.flagged])
-    pending_count = len([r for r in records if r.status == AttendanceStatus.pending_verification])
+    records_sq = (
+        db.query(func.count(AttendanceRecord.id), func.max(AttendanceRecord.updated_at))
+        .filter(AttendanceRecord.session_id == session_id)
+        .subquery()
+    )
+    vlog_sq = (
+        db.query(func.max(VerificationLog.id))
+        .filter(VerificationLog.session_id == session_id)
+        .scalar_subquery()
+    )
+    total_students, record_count, last_change, last_vlog = db.query(
+        enrolled_sq, *records_sq.c, vlog_sq
+    ).one()
+    etag = compute_etag([
+        session.id, session.is_active, to_utc_iso(session.ends_at),
+        total_students, record_count, to_utc_iso(last_change), last_vlog,
+    ])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    status_counts = dict(
+        db.query(AttendanceRecord.status, func.count(AttendanceRecord.id))
+        .filter(AttendanceRecord.session_id == session_id)
+        .group_by(AttendanceRecord.status)
+        .all()
+    )
+    present_count = status_counts.get(AttendanceStatus.confirmed, 0)
+    flagged_count = status_counts.get(AttendanceStatus.flagged, 0)
+    pending_count = status_counts.get(AttendanceStatus.pending_verification, 0)
     absent_count = max(0, total_students - present_count - flagged_count - pending_count)
-    
+
     # Attendance rate = present / total enrolled
     attendance_rate = (present_count / total_students * 100) if total_students > 0 else 0
-    
+
     # Recent attendance (last 10 records)
-    recent_records = sorted(records, key=lambda x: x.created_at, reverse=True)[:10]
+    recent_records = (
+        db.query(AttendanceRecord)
+        .filter(AttendanceRecord.session_id == session_id)
+        .order_by(AttendanceRecord.created_at.desc(), AttendanceRecord.id.desc())
+        .limit(ANALYTICS_RECENT_RECORDS)
+        .all()
+    )
 
     # Batch-fetch devices and verification logs for all recent records
     recent_student_ids = [r.student_id for r in recent_records]
-    recent_device_hashes = [(r.student_id, r.device_id_hash) for r in recent_records]
 
     # Batch devices: fetch all active devices for the students in the recent set
     devices_batch = (
         db.query(Device)
         .filter(Device.user_id.in_(recent_student_ids), Device.is_active == True)
         .all()
-    )
+    ) if recent_student_ids else []
     # Key: (user_id, device_id_hash)
     device_hash_set = {(d.user_id, d.device_id_hash) for d in devices_batch}
 
@@ -951,7 +1196,7 @@ def get_session_analytics(session_id: int, db: Session = Depends(get_db), curren
         )
         .order_by(VerificationLog.id.asc())  # asc so last entry wins in dict
         .all()
-    )
+    ) if recent_student_ids else []
     vlog_map = {v.user_id: v for v in vlogs_batch}  # keeps last (highest id) per user
 
     recent_attendance = []
@@ -970,9 +1215,8 @@ def get_session_analytics(session_id: int, db: Session = Depends(get_db), curren
                 "face_valid": face_valid,
             },
         })
-    
-    write_audit(db, "lecturer.session_analytics", current.id, f"session_id={session_id}")
-    return {
+
+    payload = {
         "session": {
             "id": session.id,
             "code": session.code,
@@ -991,6 +1235,8 @@ def get_session_analytics(session_id: int, db: Session = Depends(get_db), curren
         },
         "recent_attendance": recent_attendance
     }
+    write_audit(db, "lecturer.session_analytics", current.id, f"session_id={session_id}")
+    return cached_json_response(request, payload, etag=etag)
 
 
 @router.get("/qr/{session_id}/display", response_model=QRDisplayResponse)
@@ -1050,47 +1296,11 @@ def get_qr_display_data(session_id: int, db: Session = Depends(get_db), current:
 @router.get("/sessions/{session_id}/absent", response_model=List[dict])
 def get_absent_students(session_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_lecturer)):
     """Get list of students who are absent: either no record, or record with status=absent (rejected)"""
-    from ....models.student_course_enrollment import StudentCourseEnrollment
-
     session = db.get(AttendanceSession, session_id)
     if not session or session.lecturer_id != current.id:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    # Get all enrolled students for the course (scoped to the session's
-    # programme when set, so other programmes aren't marked absent)
-    enrolled_q = (
-        db.query(User)
-        .join(StudentCourseEnrollment, User.id == StudentCourseEnrollment.student_id)
-        .filter(StudentCourseEnrollment.course_id == session.course_id)
-    )
-    if session.programme:
-        enrolled_q = enrolled_q.filter(User.programme == session.programme)
-    enrolled_students = enrolled_q.all()
-    
-    # Students who submitted: confirmed, flagged, or awaiting face verification
-    present_or_flagged_ids = {
-        r.student_id
-        for r in db.query(AttendanceRecord)
-        .filter(
-            AttendanceRecord.session_id == session_id,
-            AttendanceRecord.status.in_([
-                AttendanceStatus.confirmed,
-                AttendanceStatus.flagged,
-                AttendanceStatus.pending_verification,
-            ]),
-        )
-        .all()
-    }
-    
-    # Absent = enrolled but not present/flagged: no record, or record with status=absent (rejected)
-    absent_students = [
-        s for s in enrolled_students
-        if s.id not in present_or_flagged_ids
-    ]
-    
-    write_audit(db, "lecturer.get_absent", current.id, f"session_id={session_id}")
-    
-    return [
+
+    absent = [
         {
             "id": s.id,
             "user_id": s.user_id,
@@ -1098,5 +1308,7 @@ def get_absent_students(session_id: int, db: Session = Depends(get_db), current:
             "email": s.email,
             "status": "absent"
         }
-        for s in absent_students
+        for s in absent_students(db, session)
     ]
+    write_audit(db, "lecturer.get_absent", current.id, f"session_id={session_id}")
+    return absent
@@ -1,5 +1,5 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -17,13 +17,27 @@ from ....models.device import Device
 from ....models.face_verification_job import FaceVerificationJob, FaceVerificationJobStatus
 from ....models.course import Course, CourseProgramme
 from ....models.student_course_enrollment import StudentCourseEnrollment
-from ....models.school_settings import get_or_create_settings
+from ....models.student_attendance_summary import StudentAttendanceSummary
+from ....models.attendance_archive import ArchivedAttendanceSession
+from ....services.absence import student_session_scope
+from ....services.attendance_archive import archived_history_query
 from ....services.audit import write_audit
-from ....services.utils import hash_device_id, utcnow, to_utc_iso, seconds_until
+from ....services.catalogue_cache import catalogue_cache
+from ....services.http_cache import cached_json_response, compute_etag, not_modified
+from ....services.school_settings import school_settings_snapshot
+from ....services.pagination import NEXT_CURSOR_HEADER, cursor_datetime, decode_cursor, encode_cursor
+from ....services.course_serialization import (
+    course_relations_via,
+    course_summary,
+    lecturer_names,
+    programme_names,
+    with_course_relations,
+)
+from ....services.utils import hash_device_id, haversine_m, utcnow, to_utc_iso, seconds_until
 from ....services.rate_limit import rate_limit
 from ....storage.base import get_storage
 from ....core.config import Settings
-from math import radians, cos, sin, asin, sqrt
+from datetime import datetime
 from typing import Optional, List
 
 logger = logging.getLogger(__name__)
@@ -119,15 +133,7 @@ async def submit_attendance(
     if not geofence_configured:
         within_geofence = False
     else:
-        def haversine(lat1, lon1, lat2, lon2):
-            R = 6371000.0
-            dlat = radians(lat2 - lat1)
-            dlon = radians(lon2 - lon1)
-            a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-            c = 2 * asin(sqrt(a))
-            return R * c
-
-        distance_m = haversine(latitude, longitude, session.latitude, session.longitude)
+        distance_m = haversine_m(latitude, longitude, session.latitude, session.longitude)
         if distance_m > session.geofence_radius_m:
             within_geofence = False
 
@@ -339,6 +345,44 @@ async def verify_face(
     )
 
 
+def _programme_catalogue(db: Session, semester: str, level: int, programme: str) -> list[dict]:
+    """Active courses for one (semester, level, programme), served from the catalogue cache."""
+
+    def load() -> list[dict]:
+        courses = (
+            with_course_relations(db.query(Course))
+            .join(CourseProgramme, Course.id == CourseProgramme.course_id)
+            .filter(
+                Course.is_active == True,
+                Course.level == level,
+                CourseProgramme.programme == programme,
+                Course.semester == semester,
+            )
+            .order_by(Course.code)
+            .all()
+        )
+        return [
+            {
+                **course_summary(c),
+                "level": c.level,
+                "programmes": programme_names(c),
+                "lecturer_names": lecturer_names(c),
+            }
+            for c in courses
+        ]
+
+    return catalogue_cache.get_or_load((semester, level, programme), load)
+
+
+def _enrolled_course_ids(db: Session, student_id: int) -> set[int]:
+    return {
+        course_id
+        for (course_id,) in db.query(StudentCourseEnrollment.course_id)
+        .filter(StudentCourseEnrollment.student_id == student_id)
+        .all()
+    }
+
+
 @router.get("/courses/recommended")
 def get_recommended_courses(
     db: Session = Depends(get_db),
@@ -352,44 +396,13 @@ def get_recommended_courses(
     if not current.level or not current.programme:
         return []
 
-    school = get_or_create_settings(db)
-
-    courses = (
-        db.query(Course)
-        .join(CourseProgramme, Course.id == CourseProgramme.course_id)
-        .filter(
-            Course.is_active == True,
-            Course.level == current.level,
-            CourseProgramme.programme == current.programme,
-            Course.semester == school.current_semester,
-        )
-        .order_by(Course.code)
-        .all()
-    )
-
-    enrolled_ids = {
-        e.course_id
-        for e in db.query(StudentCourseEnrollment)
-        .filter(StudentCourseEnrollment.student_id == current.id)
-        .all()
-    }
+    school = school_settings_snapshot(db)
+    courses = _programme_catalogue(db, school.current_semester, current.level, current.programme)
+    enrolled_ids = _enrolled_course_ids(db, current.id)
 
     write_audit(db, "student.recommended_courses", current.id,
                 f"level={current.level}, programme={current.programme}")
-    return [
-        {
-            "id": c.id,
-            "code": c.code,
-            "name": c.name,
-            "description": c.description,
-            "semester": c.semester,
-            "level": c.level,
-            "programmes": [p.programme for p in c.programmes],
-            "lecturer_names": [l.full_name for l in c.lecturers if l.full_name],
-            "is_enrolled": c.id in enrolled_ids,
-        }
-        for c in courses
-    ]
+    return [{**c, "is_enrolled": c["id"] in enrolled_ids} for c in courses]
 
 
 @router.get("/courses/search")
@@ -399,147 +412,107 @@ def search_courses(
     current: User = Depends(get_current_student),
 ):
     """Search courses within the student's own programme and level."""
-    school = get_or_create_settings(db)
-
-    query = db.query(Course).filter(
-        Course.is_active == True,
-        Course.semester == school.current_semester,
-    )
+    school = school_settings_snapshot(db)
 
-    # Restrict to the student's own programme+level if their profile is set
     if current.level and current.programme:
-        query = (
-            query
-            .join(CourseProgramme, Course.id == CourseProgramme.course_id)
-            .filter(
-                Course.level == current.level,
-                CourseProgramme.programme == current.programme,
-            )
-        )
-
-    if q:
-        search_term = f"%{q}%"
-        query = query.filter(
-            (Course.code.ilike(search_term)) | (Course.name.ilike(search_term))
+        # Profile set: filter the cached programme catalogue in memory
+        courses = _programme_catalogue(db, school.current_semester, current.level, current.programme)
+        if q:
+            needle = q.lower()
+            courses = [c for c in courses if needle in c["code"].lower() or needle in c["name"].lower()]
+        courses = courses[:20]
+    else:
+        query = with_course_relations(db.query(Course), programmes=False).filter(
+            Course.is_active == True,
+            Course.semester == school.current_semester,
         )
+        if q:
+            search_term = f"%{q}%"
+            query = query.filter(
+                (Course.code.ilike(search_term)) | (Course.name.ilike(search_term))
+            )
+        courses = [
+            {**course_summary(c), "lecturer_names": lecturer_names(c)}
+            for c in query.limit(20).all()
+        ]
 
-    courses = query.limit(20).all()
-
-    enrolled_ids = {
-        e.course_id
-        for e in db.query(StudentCourseEnrollment)
-        .filter(StudentCourseEnrollment.student_id == current.id)
-        .all()
-    }
-
-    write_audit(db, "student.search_courses", current.id, f"query={q}")
-    return [
+    enrolled_ids = _enrolled_course_ids(db, current.id)
+    result = [
         {
-            "id": course.id,
-            "code": course.code,
-            "name": course.name,
-            "description": course.description,
-            "semester": course.semester,
-            "lecturer_names": [l.full_name for l in course.lecturers if l.full_name],
-            "is_enrolled": course.id in enrolled_ids,
+            "id": c["id"],
+            "code": c["code"],
+            "name": c["name"],
+            "description": c["description"],
+            "semester": c["semester"],
+            "lecturer_names": c["lecturer_names"],
+            "is_enrolled": c["id"] in enrolled_ids,
         }
-        for course in courses
+        for c in courses
     ]
+    write_audit(db, "student.search_courses", current.id, f"query={q}")
+    return result
 
 
 @router.get("/dashboard", response_model=dict)
 def student_dashboard(
+    request: Request,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_student),
 ):
-    """Get dashboard stats for the current student."""
-    from sqlalchemy import func, case
+    """Get dashboard stats for the current student.
 
-    # Single query: get all active enrollments with course info
-    enrollments = (
-        db.query(StudentCourseEnrollment)
-        .filter(StudentCourseEnrollment.student_id == current.id)
-        .join(Course, StudentCourseEnrollment.course_id == Course.id)
-        .filter(Course.is_active == True)
-        .all()
-    )
-    enrolled_count = len(enrollments)
-    enrolled_course_ids = [e.course_id for e in enrollments]
-
-    total_sessions = 0
-    confirmed_count = 0
-    pending_count = 0
-    attendance_marked_count = 0
-
-    if enrolled_course_ids:
-        # Single aggregation query: count per status for this student in enrolled sessions
-        status_counts = (
-            db.query(
-                AttendanceRecord.status,
-                func.count(AttendanceRecord.id).label("cnt"),
-            )
-            .join(AttendanceSession, AttendanceRecord.session_id == AttendanceSession.id)
-            .filter(
-                AttendanceRecord.student_id == current.id,
-                AttendanceSession.course_id.in_(enrolled_course_ids),
-            )
-            .group_by(AttendanceRecord.status)
-            .all()
-        )
-        counts_by_status = {row.status: row.cnt for row in status_counts}
-        confirmed_count = counts_by_status.get(AttendanceStatus.confirmed, 0)
-        flagged_count = counts_by_status.get(AttendanceStatus.flagged, 0)
-        pending_count = counts_by_status.get(AttendanceStatus.pending_verification, 0)
-        marked_total = confirmed_count + flagged_count + pending_count
-
-        # Get the set of session IDs already marked (to exclude from past-unmarked count)
-        marked_session_ids_q = (
-            db.query(AttendanceRecord.session_id)
-            .join(AttendanceSession, AttendanceRecord.session_id == AttendanceSession.id)
-            .filter(
-                AttendanceRecord.student_id == current.id,
-                AttendanceSession.course_id.in_(enrolled_course_ids),
-            )
-            .distinct()
-            .all()
+    Counters come from ``student_attendance_summaries`` (kept current by
+    ``services.attendance_summaries``), so this is one indexed read.
+    """
+    from sqlalchemy import and_, func
+
+    summary = StudentAttendanceSummary
+    totals = (
+        db.query(
+            func.count(StudentCourseEnrollment.id),
+            func.coalesce(func.sum(summary.confirmed_count), 0),
+            func.coalesce(func.sum(summary.flagged_count), 0),
+            func.coalesce(func.sum(summary.pending_count), 0),
+            func.coalesce(func.sum(summary.unmarked_count), 0),
         )
-        marked_session_ids = {row[0] for row in marked_session_ids_q}
-
-        # Count past (ended) sessions the student hasn't marked
-        from sqlalchemy import or_
-        past_unmarked_q = db.query(func.count(AttendanceSession.id)).filter(
-            AttendanceSession.course_id.in_(enrolled_course_ids),
-            AttendanceSession.ends_at != None,
+        .join(Course, and_(StudentCourseEnrollment.course_id == Course.id, Course.is_active == True))
+        .outerjoin(
+            summary,
+            and_(
+                summary.student_id == StudentCourseEnrollment.student_id,
+                summary.course_id == StudentCourseEnrollment.course_id,
+            ),
         )
-        if current.programme:
-            past_unmarked_q = past_unmarked_q.filter(
-                or_(
-                    AttendanceSession.programme.is_(None),
-                    AttendanceSession.programme == current.programme,
-                )
-            )
-        if marked_session_ids:
-            past_unmarked_q = past_unmarked_q.filter(~AttendanceSession.id.in_(marked_session_ids))
-        past_unmarked_count = past_unmarked_q.scalar() or 0
-
-        total_sessions = marked_total + past_unmarked_count
-        attendance_marked_count = confirmed_count + pending_count
+        .filter(StudentCourseEnrollment.student_id == current.id)
+        .one()
+    )
+    enrolled_count, confirmed_count, flagged_count, pending_count, unmarked_count = totals
+    # Absent records (rejected by the lecturer) count neither as marked nor as unmarked
+    total_sessions = confirmed_count + flagged_count + pending_count + unmarked_count
+    attendance_marked_count = confirmed_count + pending_count
 
     profile_complete = bool(current.level and current.programme)
-    school = get_or_create_settings(db)
-    write_audit(db, "student.dashboard", current.id)
-    return {
+    school = school_settings_snapshot(db)
+    payload = {
         "enrolled_courses": enrolled_count,
         "total_sessions": total_sessions,
         "attendance_marked_count": attendance_marked_count,
         "confirmed_count": confirmed_count,
-        "pending_count": pending_count if enrolled_course_ids else 0,
+        "pending_count": pending_count,
         "profile_complete": profile_complete,
         "enrollment_open": school.enrollment_open,
         "current_semester": school.current_semester,
         "is_on_break": school.is_on_break,
         "academic_year": school.academic_year,
     }
+    # The mobile app polls this every few seconds; unchanged counters cost
+    # one indexed read and an empty 304
+    etag = compute_etag(payload)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    write_audit(db, "student.dashboard", current.id)
+    return cached_json_response(request, payload, etag=etag)
 
 
 @router.get("/courses")
@@ -550,26 +523,24 @@ def get_enrolled_courses(
     """Get all courses the student is enrolled in"""
     enrollments = (
         db.query(StudentCourseEnrollment)
+        .options(*course_relations_via(StudentCourseEnrollment.course, programmes=False))
         .filter(StudentCourseEnrollment.student_id == current.id)
         .join(Course)
         .filter(Course.is_active == True)
         .order_by(StudentCourseEnrollment.enrolled_at.desc())
         .all()
     )
-    
-    write_audit(db, "student.get_courses", current.id)
-    return [
+
+    result = [
         {
-            "id": e.course.id,
-            "code": e.course.code,
-            "name": e.course.name,
-            "description": e.course.description,
-            "semester": e.course.semester,
-            "lecturer_names": [l.full_name for l in e.course.lecturers if l.full_name],
+            **course_summary(e.course),
+            "lecturer_names": lecturer_names(e.course),
             "enrolled_at": to_utc_iso(e.enrolled_at),
         }
         for e in enrollments
     ]
+    write_audit(db, "student.get_courses", current.id)
+    return result
 
 
 @router.post("/courses/{course_id}/enroll")
@@ -580,7 +551,7 @@ def enroll_in_course(
 ):
     """Enroll in a course"""
     # Guard: enrolment must be open
-    school = get_or_create_settings(db)
+    school = school_settings_snapshot(db)
     if not school.enrollment_open:
         raise HTTPException(
             status_code=403,
@@ -652,206 +623,179 @@ def unenroll_from_course(
 
 @router.get("/sessions/active")
 def list_active_sessions(
+    request: Request,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_student),
 ):
-    """List active attendance sessions for courses the student is enrolled in."""
-    # Find enrolled course IDs
-    enrolled_course_ids = [
-        e.course_id
-        for e in db.query(StudentCourseEnrollment)
-        .filter(StudentCourseEnrollment.student_id == current.id)
-        .all()
-    ]
+    """List active attendance sessions for courses the student is enrolled in.
 
-    if not enrolled_course_ids:
-        return []
+    One joined query. Polled every 30s, so the response carries an ETag over
+    everything except the ticking ``time_remaining_seconds``; an unchanged
+    list answers 304 and the client re-anchors countdowns on ``ends_at`` and
+    the ``X-Server-Time`` header.
+    """
+    from sqlalchemy import and_, or_
 
-    from sqlalchemy import or_
-    sessions_q = (
-        db.query(AttendanceSession)
-        .filter(
-            AttendanceSession.is_active == True,
-            AttendanceSession.course_id.in_(enrolled_course_ids),
+    now = utcnow()
+    rows = (
+        db.query(
+            AttendanceSession,
+            Course.code.label("course_code"),
+            Course.name.label("course_name"),
+            AttendanceRecord.status.label("record_status"),
         )
-    )
-    # Hide sessions scoped to another programme's class (same course can be
-    # taken by multiple programmes)
-    if current.programme:
-        sessions_q = sessions_q.filter(
-            or_(
-                AttendanceSession.programme.is_(None),
-                AttendanceSession.programme == current.programme,
-            )
+        .outerjoin(Course, Course.id == AttendanceSession.course_id)
+        .outerjoin(
+            AttendanceRecord,
+            and_(
+                AttendanceRecord.session_id == AttendanceSession.id,
+                AttendanceRecord.student_id == current.id,
+            ),
         )
-    sessions = sessions_q.order_by(AttendanceSession.created_at.desc()).all()
-    # Filter out expired sessions (timezone-safe comparison)
-    sessions = [
-        s for s in sessions
-        if not s.ends_at or (seconds_until(s.ends_at) or 0) > 0
-    ]
-
-    if not sessions:
-        return []
-
-    session_ids = [s.id for s in sessions]
-    course_ids = list({s.course_id for s in sessions if s.course_id})
-
-    # Batch fetch courses
-    course_map = {
-        c.id: c for c in db.query(Course).filter(Course.id.in_(course_ids)).all()
-    } if course_ids else {}
-
-    # Batch fetch this student's attendance records for these sessions
-    record_map = {
-        r.session_id: r
-        for r in db.query(AttendanceRecord)
         .filter(
-            AttendanceRecord.session_id.in_(session_ids),
-            AttendanceRecord.student_id == current.id,
+            AttendanceSession.is_active == True,
+            # Enrolled, and not scoped to another programme's class (same
+            # course can be taken by multiple programmes)
+            student_session_scope(current),
+            or_(AttendanceSession.ends_at.is_(None), AttendanceSession.ends_at > now),
         )
+        .order_by(AttendanceSession.created_at.desc())
         .all()
-    }
+    )
 
     result = []
-    for s in sessions:
-        course = course_map.get(s.course_id) if s.course_id else None
-        existing = record_map.get(s.id)
+    for s, course_code, course_name, record_status in rows:
         result.append({
             "id": s.id,
             "code": s.code,
             "course_id": s.course_id,
-            "course_code": course.code if course else None,
-            "course_name": course.name if course else None,
+            "course_code": course_code,
+            "course_name": course_name,
             "programme": s.programme,
             "starts_at": to_utc_iso(s.starts_at),
             "ends_at": to_utc_iso(s.ends_at),
             # Server-computed countdown so clients don't depend on their own
             # clock matching the server's
             "time_remaining_seconds": seconds_until(s.ends_at),
-            "already_marked": existing is not None,
-            "attendance_status": existing.status.value if existing else None,
+            "already_marked": record_status is not None,
+            "attendance_status": record_status.value if record_status else None,
         })
 
+    etag = compute_etag([{k: v for k, v in item.items() if k != "time_remaining_seconds"} for item in result])
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     write_audit(db, "student.list_active_sessions", current.id, f"count={len(result)}")
-    return result
+    return cached_json_response(request, result, etag=etag)
 
 MAX_HISTORY_RECORDS = 100
 
 
 @router.get("/attendance/history", response_model=List[dict])
 def get_attendance_history(
+    response: Response,
+    limit: int = Query(MAX_HISTORY_RECORDS, ge=1, le=MAX_HISTORY_RECORDS),
+    cursor: Optional[str] = None,
+    course_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_archived: bool = False,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_student),
 ):
-    """Get full attendance history including present, flagged, and absent sessions."""
-    now = utcnow()
-
-    # 1. Get all courses the student is currently enrolled in
-    enrollments = (
-        db.query(StudentCourseEnrollment)
-        .filter(StudentCourseEnrollment.student_id == current.id)
-        .all()
-    )
-    enrolled_course_ids = [e.course_id for e in enrollments]
-
-    # 2. Get all attendance records for this student (to ensure present/flagged sessions always show)
-    my_records = {
-        r.session_id: r
-        for r in db.query(AttendanceRecord)
-        .filter(AttendanceRecord.student_id == current.id)
-        .all()
-    }
-
-    # 3. Build set of session IDs we need to include:
-    #    - Past sessions for enrolled courses (for absent)
-    #    - Sessions where student has a record (for present/flagged - must always show)
-    session_ids_to_include = set()
-
-    if enrolled_course_ids:
-        from sqlalchemy import or_
-        past_sessions_query = (
-            db.query(AttendanceSession.id)
-            .filter(
-                AttendanceSession.course_id.in_(enrolled_course_ids),
-                AttendanceSession.ends_at != None,
-                AttendanceSession.ends_at < now,
-            )
+    """Get attendance history including present, flagged, and absent sessions.
+
+    Most recent first, keyset-paginated on (ends_at, id): when more rows
+    exist, the ``X-Next-Cursor`` response header carries the cursor for the
+    next page. A session appears if the student has a record for it, or
+    if it has ended, belongs to an enrolled course and was held for the
+    student's programme (or all programmes), in which case it is "absent".
+    Optional filters: ``course_id`` and a ``date_from``/``date_to`` range on
+    the session end time. ``include_archived`` also lists records from
+    semesters that have been closed and archived.
+    """
+    from sqlalchemy import and_, or_
+
+    # No record at all, and the session counts against this student
+    absent_condition = and_(AttendanceRecord.id.is_(None), student_session_scope(current, ended_before=utcnow()))
+
+    query = (
+        db.query(
+            AttendanceSession.id,
+            AttendanceSession.code,
+            AttendanceSession.starts_at,
+            AttendanceSession.ends_at,
+            AttendanceRecord.id.label("record_id"),
+            AttendanceRecord.status,
+            Course.code.label("course_code"),
+            Course.name.label("course_name"),
+        )
+        .outerjoin(
+            AttendanceRecord,
+            and_(
+                AttendanceRecord.session_id == AttendanceSession.id,
+                AttendanceRecord.student_id == current.id,
+            ),
         )
-        # Sessions held for another programme's class don't count as absences
-        if current.programme:
-            past_sessions_query = past_sessions_query.filter(
+        .outerjoin(Course, Course.id == AttendanceSession.course_id)
+        .filter(or_(AttendanceRecord.id.is_not(None), absent_condition))
+    )
+    def filtered(query, sessions):
+        if course_id is not None:
+            query = query.filter(sessions.course_id == course_id)
+        if date_from is not None:
+            query = query.filter(sessions.ends_at >= date_from)
+        if date_to is not None:
+            query = query.filter(sessions.ends_at <= date_to)
+        return query
+
+    query = filtered(query, AttendanceSession)
+    if include_archived:
+        # The cursor and ordering below are adapted onto the union's columns
+        query = query.union_all(filtered(archived_history_query(db, current.id), ArchivedAttendanceSession))
+
+    if cursor:
+        position = decode_cursor(cursor, "ends_at", "id")
+        after_ends_at = cursor_datetime(position["ends_at"])
+        after_id = position["id"]
+        if after_ends_at is None:
+            query = query.filter(AttendanceSession.ends_at.is_(None), AttendanceSession.id < after_id)
+        else:
+            query = query.filter(
                 or_(
-                    AttendanceSession.programme.is_(None),
-                    AttendanceSession.programme == current.programme,
+                    AttendanceSession.ends_at < after_ends_at,
+                    and_(AttendanceSession.ends_at == after_ends_at, AttendanceSession.id < after_id),
+                    AttendanceSession.ends_at.is_(None),
                 )
             )
-        session_ids_to_include.update(r[0] for r in past_sessions_query.all())
-
-    # Always include sessions where student has a record (marked present or flagged)
-    session_ids_to_include.update(my_records.keys())
-
-    if not session_ids_to_include:
-        write_audit(db, "student.get_attendance_history", current.id)
-        return []
 
-    # 4. Fetch all sessions we need
-    sessions = (
-        db.query(AttendanceSession)
-        .filter(AttendanceSession.id.in_(session_ids_to_include))
+    # Most recent first; sessions with no end time go last
+    rows = (
+        query.order_by(
+            AttendanceSession.ends_at.is_(None),
+            AttendanceSession.ends_at.desc(),
+            AttendanceSession.id.desc(),
+        )
+        .limit(limit + 1)
         .all()
     )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(ends_at=last.ends_at, id=last.id)
 
-    # Sort by ends_at desc (most recent first); sessions with null ends_at go last
-    sessions_sorted = sorted(
-        sessions,
-        key=lambda s: (s.ends_at is None, -(s.ends_at.timestamp() if s.ends_at else 0)),
-    )
-
-    history = []
-    seen_session_ids = set()
-
-    # Batch-fetch all courses needed for these sessions
-    needed_course_ids = list({s.course_id for s in sessions_sorted if s.course_id})
-    course_map = {
-        c.id: c for c in db.query(Course).filter(Course.id.in_(needed_course_ids)).all()
-    } if needed_course_ids else {}
-
-    for session in sessions_sorted:
-        if session.id in seen_session_ids:
-            continue
-        seen_session_ids.add(session.id)
-
-        # Only include past sessions for "absent" - or any session where we have a record
-        record = my_records.get(session.id)
-        if record:
-            status = record.status.value
-        else:
-            # No record - only count as absent if session has ended and student is enrolled
-            remaining = seconds_until(session.ends_at)
-            if remaining is None or remaining >= 0:
-                continue
-            if session.course_id not in enrolled_course_ids:
-                continue
-            if session.programme and current.programme and session.programme != current.programme:
-                continue
-            status = "absent"
-
-        course = course_map.get(session.course_id)
-        history.append({
-            "session_id": session.id,
-            "session_code": session.code,
-            "course_code": course.code if course else "Unknown",
-            "course_name": course.name if course else "Unknown",
-            "starts_at": to_utc_iso(session.starts_at),
-            "ends_at": to_utc_iso(session.ends_at),
-            "status": status,
-            "record_id": record.id if record else None,
-        })
-
-    # Apply limit so we only return the most recent N records. Frontends
-    # already display history in reverse-chronological order, so this does
-    # not change visible behaviour for typical usage.
-    limited_history = history[:MAX_HISTORY_RECORDS]
-    write_audit(db, "student.get_attendance_history", current.id, f"returned={len(limited_history)}")
-    return limited_history
+    history = [
+        {
+            "session_id": row.id,
+            "session_code": row.code,
+            "course_code": row.course_code or "Unknown",
+            "course_name": row.course_name or "Unknown",
+            "starts_at": to_utc_iso(row.starts_at),
+            "ends_at": to_utc_iso(row.ends_at),
+            "status": row.status.value if row.status else "absent",
+            "record_id": row.record_id,
+        }
+        for row in rows
+    ]
+    write_audit(db, "student.get_attendance_history", current.id, f"returned={len(history)}")
+    return history
@@ -23,6 +23,8 @@ class Settings(BaseSettings):
     secret_key: str = "change-me"
     access_token_expire_minutes: int = 60
     algorithm: str = "HS256"
+    # Verified JWT claims kept in memory per worker (0 disables the cache)
+    token_cache_size: int = 4096
     database_url: str = "sqlite:///./absense_dev.db"
 
     # Local file storage (selfies + reference faces)
@@ -36,6 +38,34 @@ class Settings(BaseSettings):
     upload_max_image_mb: int = 5
     upload_allowed_image_types: str = "image/jpeg,image/png,image/jpg"
 
+    # Password hashing (PBKDF2). None keeps passlib's default cost; changing
+    # it rehashes each user's password on their next successful login.
+    password_hash_rounds: int | None = None
+    # KDF process pool per Gunicorn worker (0 = hash inline in the request thread)
+    kdf_pool_workers: int = 0
+    kdf_pool_max_pending: int = 32
+    kdf_pool_wait_seconds: float = 10.0
+
+    # Student course catalogue cache (0 disables). Optional Redis shared tier
+    # so course edits invalidate every worker, not just the one that served them.
+    catalogue_cache_ttl_seconds: int = 60
+    cache_redis_url: str = ""
+
+    # Canonical programme names cached per worker; admin edits invalidate every
+    # worker via PostgreSQL NOTIFY (the TTL is the fallback elsewhere)
+    programme_registry_ttl_seconds: int = 300
+
+    # Admin CSV/XLSX imports (/admin/imports/{kind}): rows per file
+    import_max_rows: int = 50000
+
+    # SchoolSettings cached per worker; PostgreSQL NOTIFY invalidates it sooner
+    school_settings_cache_seconds: int = 300
+
+    # Admin dashboard snapshot: delta refresh interval (0 = compute per request)
+    # and how often a full recompute corrects what deltas can't see
+    admin_dashboard_refresh_seconds: int = 30
+    admin_dashboard_full_refresh_seconds: int = 600
+
     # Rate limiting (in-memory, per worker process)
     rate_limit_enabled: bool = True
 
@@ -46,6 +76,21 @@ class Settings(BaseSettings):
     face_detector_backend: str = "retinaface"
     face_worker_poll_seconds: float = 1.0
 
+    # Attendance rollup aggregator (scripts/attendance_rollup_worker.py)
+    attendance_rollup_interval_seconds: float = 60.0
+
+    # /metrics scrape endpoint (off by default; requires the bearer token)
+    metrics_enabled: bool = False
+    metrics_token: str = ""
+    # Directory where Gunicorn workers share metric snapshots ("" = per worker)
+    metrics_multiproc_dir: str = ""
+    metrics_multiproc_interval_seconds: float = 5.0
+
+    # Per-request SQL budget for dev/test (0 disables); mode is "log" or "raise"
+    query_budget_max_queries: int = 0
+    query_budget_repeat_threshold: int = 0
+    query_budget_mode: str = "log"
+
     # SQLAlchemy pool (per Gunicorn worker process)
     db_pool_size: int = 10
     db_max_overflow: int = 10
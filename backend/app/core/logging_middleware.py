@@ -1,24 +1,130 @@
+"""Request ID + access logging as a plain ASGI middleware.
+
+Log records go onto a bounded in-memory queue and are written to stdout as
+one JSON object per line by a background ``QueueListener`` thread, so the
+request path never blocks on stdout. If the queue is full the record is
+dropped and counted rather than stalling the request.
+"""
+import json
+import logging
+import queue
+import sys
 import time
 import uuid
-from typing import Callable
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..db import instrumentation
+from .metrics import observe_request
+from .request_context import RequestStats, current_request
+
+LOG_QUEUE_SIZE = 10000
+
+logger = logging.getLogger("absense.access")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", {}))
+        return json.dumps(payload, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: records are dropped when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+
+
+def start_request_logging() -> None:
+    """Attach the queue handler to the access logger and start the writer thread."""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    logger.handlers = [DroppingQueueHandler(log_queue)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _listener = QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+
 
+def stop_request_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIDLoggingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class RequestIDLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         request_id = str(uuid.uuid4())
-        start = time.time()
-        response: Response | None = None
+        stats = RequestStats(request_id=request_id, scope=scope)
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_with_request_id)
         finally:
-            duration_ms = int((time.time() - start) * 1000)
-            path = request.url.path
-            method = request.method
-            status = getattr(response, "status_code", 500)
-            print(f"req_id={request_id} {method} {path} status={status} duration_ms={duration_ms}")
-            if response is not None:
-                response.headers["X-Request-ID"] = request_id
+            current_request.reset(token)
+            duration = time.perf_counter() - stats.started
+            route = stats.route
+            observe_request(scope["method"], route, status_code, duration, stats.query_count, stats.db_time)
+            logger.info(
+                "request",
+                extra={
+                    "fields": {
+                        "request_id": request_id,
+                        "method": scope["method"],
+                        "route": route,
+                        "status": status_code,
+                        "duration_ms": round(duration * 1000, 2),
+                        "db_time_ms": round(stats.db_time * 1000, 2),
+                        "db_queries": stats.query_count,
+                    }
+                },
+            )
+            budget = instrumentation.query_budget
+            if budget.enabled and budget.mode == "log":
+                problems = budget.violations(stats)
+                if problems:
+                    logger.warning(
+                        "query budget exceeded",
+                        extra={"fields": {"request_id": request_id, "route": route, "violations": problems}},
+                    )
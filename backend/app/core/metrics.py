@@ -0,0 +1,357 @@
+"""Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Counters and histograms are updated on the request path, so they only take a
+lock and bump a few numbers. Gauges that are expensive or live elsewhere
+(pool status, queue depth) are filled by collector callbacks at scrape time.
+
+Values live in each Gunicorn worker process, and the workers share one port,
+so a scrape lands on whichever worker accepts it. With
+``METRICS_MULTIPROC_DIR`` set, every worker writes a snapshot of its counters,
+histograms and pool gauges to ``<dir>/metrics-<pid>.json`` every
+``METRICS_MULTIPROC_INTERVAL_SECONDS`` (and on shutdown), and ``/metrics``
+adds the other workers' snapshots to its own values. Snapshots of exited
+workers keep counting toward counters and histograms, so totals never go
+backwards; their gauges are dropped. Empty the directory when the service
+starts.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+from typing import Callable, Iterable
+
+LabelValues = tuple[str, ...]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class _ValueMetric(_Metric):
+    """One number per label set (counters and gauges)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(labels), v] for labels, v in self._values.items()]
+
+    def render(self, others: Iterable[list] = ()) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        for snapshot in others:
+            for labels, v in snapshot:
+                values[tuple(labels)] = values.get(tuple(labels), 0) + v
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+            for labels, v in sorted(values.items())
+        ]
+
+
+class Counter(_ValueMetric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_ValueMetric):
+    """A value that is set rather than incremented.
+
+    ``multiprocess_mode`` is ``"local"`` (the scraped worker's value, for
+    gauges computed at scrape time from shared state such as the database)
+    or ``"livesum"`` (summed over running workers, for per-process state
+    such as the connection pool).
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        multiprocess_mode: str = "local",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            return sum(self._counts.get(labels, ()))
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(labels), list(counts), self._sums[labels]] for labels, counts in self._counts.items()]
+
+    def render(self, others: Iterable[list] = ()) -> list[str]:
+        with self._lock:
+            merged = {labels: [list(counts), self._sums[labels]] for labels, counts in self._counts.items()}
+        for snapshot in others:
+            for labels, counts, total in snapshot:
+                current = merged.setdefault(tuple(labels), [[0] * len(counts), 0.0])
+                current[0] = [a + b for a, b in zip(current[0], counts)]
+                current[1] += total
+        items = sorted((labels, counts, total) for labels, (counts, total) in merged.items())
+        lines = self._header()
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            plain = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+        self._multiproc_dir: str | None = None
+        self._writer: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before rendering."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def _collect(self) -> None:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector %s failed", getattr(collector, "__name__", collector))
+
+    def _shared(self, metric: _Metric) -> bool:
+        return getattr(metric, "multiprocess_mode", "") != "local"
+
+    # ── Multiprocess snapshots ────────────────────────────────────
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self._multiproc_dir, f"metrics-{pid}.json")
+
+    def write_snapshot(self) -> None:
+        """Write this process's shared metrics to the multiprocess directory."""
+        if not self._multiproc_dir:
+            return
+        self._collect()
+        payload = {m.name: m.snapshot() for m in self._metrics if self._shared(m)}
+        path = self._snapshot_path(os.getpid())
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def _other_snapshots(self) -> list[tuple[bool, dict]]:
+        """``(alive, payload)`` for every other worker's snapshot."""
+        found = []
+        own = os.getpid()
+        for entry in os.scandir(self._multiproc_dir):
+            if not (entry.name.startswith("metrics-") and entry.name.endswith(".json")):
+                continue
+            try:
+                pid = int(entry.name[len("metrics-"):-len(".json")])
+                if pid == own:
+                    continue
+                with open(entry.path) as f:
+                    found.append((_pid_alive(pid), json.load(f)))
+            except (ValueError, OSError):
+                continue
+        return found
+
+    def start_multiprocess(self, directory: str, interval_seconds: float) -> None:
+        """Share this worker's metrics through ``directory`` until ``stop_multiprocess``."""
+        if self._writer is not None:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self._multiproc_dir = directory
+        self._stop.clear()
+
+        def loop() -> None:
+            while True:
+                try:
+                    self.write_snapshot()
+                except Exception:
+                    logger.exception("Writing metrics snapshot failed")
+                if self._stop.wait(interval_seconds):
+                    return
+
+        self._writer = threading.Thread(target=loop, name="metrics-snapshot", daemon=True)
+        self._writer.start()
+
+    def stop_multiprocess(self) -> None:
+        if self._writer is None:
+            return
+        self._stop.set()
+        self._writer.join(timeout=5)
+        self._writer = None
+        try:
+            self.write_snapshot()  # final counts survive the worker
+        except Exception:
+            logger.exception("Writing metrics snapshot failed")
+        self._multiproc_dir = None
+
+    def render(self) -> str:
+        self._collect()
+        others = self._other_snapshots() if self._multiproc_dir else []
+        lines: list[str] = []
+        for metric in self._metrics:
+            if not self._shared(metric):
+                lines.extend(metric.render())
+                continue
+            # Exited workers still count toward totals, not toward current state
+            keep_dead = metric.kind != "gauge"
+            lines.extend(metric.render([
+                payload[metric.name] for alive, payload in others
+                if metric.name in payload and (alive or keep_dead)
+            ]))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+))
+REQUEST_DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request.",
+    ("route",),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+))
+REQUEST_DB_TIME = registry.register(Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request.",
+    ("route",),
+))
+DB_POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time waiting for a pooled DB connection (including opening one when the pool grows).",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+))
+DB_POOL_CONNECTIONS = registry.register(Gauge(
+    "db_pool_connections",
+    "SQLAlchemy pool connections by state (checked_out, idle, overflow, size).",
+    ("state",),
+    multiprocess_mode="livesum",
+))
+FACE_JOBS = registry.register(Gauge(
+    "face_verification_jobs",
+    "Face verification jobs by status.",
+    ("status",),
+))
+FACE_OLDEST_PENDING_AGE = registry.register(Gauge(
+    "face_verification_oldest_pending_age_seconds",
+    "Age of the oldest pending face verification job (0 when the queue is empty).",
+))
+QR_SWEEP_DURATION = registry.register(Histogram(
+    "qr_rotation_sweep_duration_seconds",
+    "Duration of one QR rotation / session expiry sweep.",
+))
+RATE_LIMIT_REJECTIONS = registry.register(Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected with 429 by the in-memory rate limiter.",
+    ("scope",),
+))
+
+
+def observe_request(method: str, route: str, status: int, duration: float, query_count: int, db_time: float) -> None:
+    REQUEST_DURATION.observe(duration, method, route, str(status))
+    REQUEST_DB_QUERIES.observe(query_count, route)
+    REQUEST_DB_TIME.observe(db_time, route)
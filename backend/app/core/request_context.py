@@ -0,0 +1,30 @@
+"""Per-request state shared between the ASGI middleware and DB instrumentation.
+
+The middleware puts a ``RequestStats`` in a context variable; sync route
+handlers run in a threadpool with a copy of that context, so they all point at
+the same object and engine events can add their timings to it.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class RequestStats:
+    request_id: str
+    scope: dict[str, Any] = field(repr=False, default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    query_count: int = 0
+    db_time: float = 0.0
+    # Statement text -> executions; only filled while a query budget is active
+    statement_counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def route(self) -> str:
+        """Route template (e.g. ``/api/v1/lecturer/sessions/{session_id}``) once routing has run."""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "<unmatched>"
+
+
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
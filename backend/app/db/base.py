@@ -9,6 +9,15 @@ from ..models.audit_log import AuditLog
 from ..models.student_course_enrollment import StudentCourseEnrollment
 from ..models.face_verification_job import FaceVerificationJob, FaceVerificationJobStatus
 from ..models.programme import Programme
+from ..models.student_attendance_summary import StudentAttendanceSummary
+from ..models.attendance_rollup import AttendanceRollup, RollupWatermark
+from ..models.semester_close_job import SemesterCloseJob, SemesterCloseJobStatus
+from ..models.import_job import ImportJob, ImportJobStatus
+from ..models.attendance_archive import (
+    ArchivedAttendanceRecord,
+    ArchivedAttendanceSession,
+    ArchivedVerificationLog,
+)
 
 __all__ = [
     "Base",
@@ -26,4 +35,14 @@ __all__ = [
     "StudentCourseEnrollment",
     "FaceVerificationJob",
     "FaceVerificationJobStatus",
+    "StudentAttendanceSummary",
+    "AttendanceRollup",
+    "RollupWatermark",
+    "SemesterCloseJob",
+    "SemesterCloseJobStatus",
+    "ImportJob",
+    "ImportJobStatus",
+    "ArchivedAttendanceSession",
+    "ArchivedAttendanceRecord",
+    "ArchivedVerificationLog",
 ]
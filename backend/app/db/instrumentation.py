@@ -0,0 +1,92 @@
+"""SQLAlchemy engine hooks that attribute query time to the current request.
+
+They also enforce an optional per-request query budget, meant for dev and
+test: ``QUERY_BUDGET_MAX_QUERIES`` caps statements per request and
+``QUERY_BUDGET_REPEAT_THRESHOLD`` flags the same SELECT text running more
+than that many times in one request, which is what a lazy load inside a list
+comprehension (N+1) looks like. With ``QUERY_BUDGET_MODE=log`` violations are
+reported in the access log; with ``raise`` the offending statement raises
+``QueryBudgetExceeded`` so the request (and the test driving it) fails.
+"""
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..core.config import Settings
+from ..core.request_context import RequestStats, current_request
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass
+class QueryBudget:
+    max_queries: int = 0
+    repeat_threshold: int = 0
+    mode: str = "log"
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_queries > 0 or self.repeat_threshold > 0
+
+    def violations(self, stats: RequestStats) -> list[str]:
+        found = []
+        if self.max_queries and stats.query_count > self.max_queries:
+            found.append(f"{stats.query_count} queries (budget {self.max_queries})")
+        if self.repeat_threshold:
+            for statement, count in stats.statement_counts.items():
+                if count > self.repeat_threshold:
+                    found.append(f"possible N+1: {count}x {' '.join(statement.split())[:200]}")
+        return found
+
+
+_settings = Settings()
+query_budget = QueryBudget(
+    max_queries=_settings.query_budget_max_queries,
+    repeat_threshold=_settings.query_budget_repeat_threshold,
+    mode=_settings.query_budget_mode,
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.query_count += 1
+    stats.db_time += elapsed
+    if not query_budget.enabled:
+        return
+    if statement.lstrip()[:6].upper() == "SELECT":
+        # Only reads: repeated INSERTs from a seeding loop are not lazy loads
+        stats.statement_counts[statement] = stats.statement_counts.get(statement, 0) + 1
+    if query_budget.mode == "raise":
+        problems = query_budget.violations(stats)
+        if problems:
+            raise QueryBudgetExceeded(f"{stats.route}: " + "; ".join(problems))
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute: drop its start time
+    conn = exception_context.connection
+    starts = conn.info.get("query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def install_query_instrumentation() -> None:
+    """Listen on every Engine (including test engines). Safe to call repeatedly."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
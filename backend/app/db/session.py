@@ -1,10 +1,32 @@
+import time
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import QueuePool
 
 from ..core.config import Settings
+from ..core.metrics import DB_POOL_CHECKOUT_WAIT
+from .instrumentation import install_query_instrumentation
 
 settings = Settings()
 
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    Timed around the pool's own ``_do_get`` so only statements that actually
+    need a connection are measured (cache hits and 304s never check one out),
+    and the time includes opening a new connection when the pool grows.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
 _engine_kwargs: dict = {"future": True}
 if settings.database_url.startswith("postgresql"):
     _engine_kwargs.update(
@@ -13,9 +35,11 @@ if settings.database_url.startswith("postgresql"):
         pool_timeout=settings.db_pool_timeout,
         pool_recycle=settings.db_pool_recycle,
         pool_pre_ping=True,
+        poolclass=TimedQueuePool,
     )
 
 engine = create_engine(settings.database_url, **_engine_kwargs)
+install_query_instrumentation()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
@@ -5,23 +5,44 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from .api.v1.routers import api_router
-from .core.logging_middleware import RequestIDLoggingMiddleware
+from .api.metrics import router as metrics_router
+from .core.logging_middleware import RequestIDLoggingMiddleware, start_request_logging, stop_request_logging
 from .core.security_headers_middleware import SecurityHeadersMiddleware
 from .core.config import Settings
+from .core.metrics import registry as metrics_registry
 from .services.qr_rotation import stop_qr_rotation
+from .services.password_hashing import kdf_pool
+from .services.cache_notify import cache_listener
+from .services.admin_dashboard import admin_dashboard_cache
+from .services.attendance_summaries import install_summary_hooks
+from .db.session import SessionLocal, engine
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup - QR rotation service starts lazily when first session is created
+    start_request_logging()
+    cfg = Settings()
+    if cfg.metrics_enabled and cfg.metrics_multiproc_dir:
+        metrics_registry.start_multiprocess(cfg.metrics_multiproc_dir, cfg.metrics_multiproc_interval_seconds)
+    cache_listener.start(engine)
+    admin_dashboard_cache.start_refresher(SessionLocal)
     yield
     # Shutdown - stop QR rotation service if running
     await stop_qr_rotation()
+    kdf_pool.shutdown()
+    cache_listener.stop()
+    admin_dashboard_cache.stop_refresher()
+    metrics_registry.stop_multiprocess()
+    stop_request_logging()
 
 
+install_summary_hooks()
+
 app = FastAPI(title="absense-backend", version="0.1.0", lifespan=lifespan)
 
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(metrics_router)
 
 # Tables are managed by Alembic migrations.
 # No create_all() here — it would force a DB connection at startup
@@ -41,6 +62,11 @@ app.add_middleware(
     allow_credentials=settings.cors_allow_credentials,
     allow_methods=[m.strip() for m in settings.cors_allow_methods.split(",") if m.strip()],
     allow_headers=[h.strip() for h in settings.cors_allow_headers.split(",") if h.strip()],
+    # Let browser clients read the pagination headers, request id and the
+    # server clock sent with conditional (ETag) responses and import summaries
+    expose_headers=[
+        "X-Next-Cursor", "X-Total-Count-Estimate", "X-Request-ID", "X-Server-Time", "ETag", "X-Import-Summary",
+    ],
 )
 
 app.add_middleware(RequestIDLoggingMiddleware)
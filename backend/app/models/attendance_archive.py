@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Boolean, DateTime, Enum, Float, Index, Integer, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.session import Base
+from .attendance_record import AttendanceStatus
+
+
+class _ArchivedRow:
+    """Which closed semester a row was archived with, and when."""
+
+    semester: Mapped[str] = mapped_column(String(30), nullable=False)
+    academic_year: Mapped[str] = mapped_column(String(20), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+
+
+# The archive tables mirror the hot tables' columns and keep their ids, but
+# carry no foreign keys: courses and users outlive the rows that point at
+# them here, and account deletion clears archived rows explicitly.
+
+
+class ArchivedAttendanceSession(_ArchivedRow, Base):
+    """An ``attendance_sessions`` row from a closed semester (QR state dropped)."""
+
+    __tablename__ = "attendance_sessions_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    lecturer_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    course_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    programme: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    code: Mapped[str] = mapped_column(String(16), nullable=False)
+    starts_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    ends_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=False)
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    geofence_radius_m: Mapped[float | None] = mapped_column(Float, nullable=True)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_attendance_sessions_archive_course_ends_at", "course_id", "ends_at"),
+        Index("ix_attendance_sessions_archive_lecturer_id", "lecturer_id"),
+        Index("ix_attendance_sessions_archive_semester_year", "academic_year", "semester"),
+    )
+
+
+class ArchivedAttendanceRecord(_ArchivedRow, Base):
+    """An ``attendance_records`` row whose session was archived."""
+
+    __tablename__ = "attendance_records_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    session_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    student_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    device_id_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    selfie_image_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    presence_image_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    status: Mapped[AttendanceStatus] = mapped_column(Enum(AttendanceStatus), nullable=False)
+    flag_reasons: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Student history over past semesters
+        Index("ix_attendance_records_archive_student_session", "student_id", "session_id"),
+        Index("ix_attendance_records_archive_session_id", "session_id"),
+    )
+
+
+class ArchivedVerificationLog(_ArchivedRow, Base):
+    """A ``verification_logs`` row whose session was archived."""
+
+    __tablename__ = "verification_logs_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    session_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    verified: Mapped[bool] = mapped_column(Boolean, default=False)
+    distance: Mapped[float | None] = mapped_column(Float, nullable=True)
+    threshold: Mapped[float | None] = mapped_column(Float, nullable=True)
+    model: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    notes: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_verification_logs_archive_session_user_id", "session_id", "user_id", "id"),
+        Index("ix_verification_logs_archive_user_id", "user_id"),
+    )
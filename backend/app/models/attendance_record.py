@@ -16,7 +16,7 @@ class AttendanceRecord(Base):
     __tablename__ = "attendance_records"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    session_id: Mapped[int] = mapped_column(ForeignKey("attendance_sessions.id", ondelete="CASCADE"), index=True, nullable=False)
+    session_id: Mapped[int] = mapped_column(ForeignKey("attendance_sessions.id", ondelete="CASCADE"), nullable=False)
     student_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
     device_id_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # SHA-256 hash of device ID
     selfie_image_path: Mapped[str] = mapped_column(String(255), nullable=True)
@@ -24,6 +24,14 @@ class AttendanceRecord(Base):
     status: Mapped[AttendanceStatus] = mapped_column(Enum(AttendanceStatus), nullable=False, default=AttendanceStatus.confirmed)
     flag_reasons: Mapped[list | None] = mapped_column(JSON, nullable=True)  # e.g. ["device_mismatch", "outside_geofence", "face_not_verified"]
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    # Bumped on every change (e.g. a lecturer confirming a flagged record) so
+    # session analytics can tell cheaply whether anything moved
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=True,
+    )
 
     session: Mapped["AttendanceSession"] = relationship(back_populates="records")
     student: Mapped["User"] = relationship(back_populates="attendances")
@@ -31,7 +39,14 @@ class AttendanceRecord(Base):
     __table_args__ = (
         # Composite index for fast per-student history ordered by date
         Index("ix_attendance_records_student_created", "student_id", "created_at"),
-        # Composite index for fast per-session status aggregates (confirmed counts, flagged list)
+        # Composite index for fast per-session status aggregates (confirmed counts, flagged list);
+        # with the next one it also serves plain session_id lookups and the FK cascade
         Index("ix_attendance_records_session_status", "session_id", "status"),
+        # Backs the "has this student a record for this session" anti-joins
+        Index("ix_attendance_records_session_student", "session_id", "student_id"),
+        # Range scans for "last 24 hours" counts and the admin activity feed
+        Index("ix_attendance_records_created_at", "created_at"),
+        # Lets the rollup aggregator find records changed since its watermark
+        Index("ix_attendance_records_updated_at", "updated_at"),
     )
 
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.session import Base
+
+
+class AttendanceRollup(Base):
+    """Attendance counts per time bucket for trend analytics.
+
+    One row per (granularity, bucket, course, student programme, course
+    level, lecturer, status). ``bucket_start`` is the UTC hour (or day) the
+    session started in; ``absent`` also counts enrolled students who never
+    submitted once the session has ended. Derived data, maintained by
+    ``services.attendance_rollups`` (``scripts/attendance_rollup_worker.py``).
+    """
+
+    __tablename__ = "attendance_rollups"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    granularity: Mapped[str] = mapped_column(String(8), nullable=False)  # "hour" or "day"
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    course_id: Mapped[int | None] = mapped_column(ForeignKey("courses.id", ondelete="CASCADE"), nullable=True)
+    programme: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    level: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    lecturer_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Trend queries: one granularity over a date range
+        Index("ix_attendance_rollups_granularity_bucket", "granularity", "bucket_start"),
+        # Per-course trends and heatmaps
+        Index("ix_attendance_rollups_course_granularity_bucket", "course_id", "granularity", "bucket_start"),
+        # Lecturer-wide trends
+        Index("ix_attendance_rollups_lecturer_granularity_bucket", "lecturer_id", "granularity", "bucket_start"),
+    )
+
+
+class RollupWatermark(Base):
+    """How far a background aggregator has processed (one row per aggregator)."""
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    processed_until: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
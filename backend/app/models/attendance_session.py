@@ -35,5 +35,7 @@ class AttendanceSession(Base):
         Index("ix_attendance_sessions_course_ends_at", "course_id", "ends_at"),
         # Speeds up lecturer session list filtered by active state
         Index("ix_attendance_sessions_lecturer_active", "lecturer_id", "is_active"),
+        # Range scans for "last 24 hours" counts and the admin activity feed
+        Index("ix_attendance_sessions_created_at", "created_at"),
     )
 
@@ -0,0 +1,45 @@
+import enum
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.session import Base
+
+
+class ImportJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ImportJob(Base):
+    """One background user import (``POST /admin/imports/users``).
+
+    The file's rows are handed to the job in memory, so an interrupted job is
+    not resumed: its writes roll back and the file is uploaded again.
+    ``summary`` and ``errors`` are the JSON result; ``credentials`` holds the
+    generated initial passwords until they are downloaded, then is cleared.
+    """
+
+    __tablename__ = "import_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    status: Mapped[ImportJobStatus] = mapped_column(
+        Enum(ImportJobStatus),
+        nullable=False,
+        default=ImportJobStatus.pending,
+    )
+    rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    passwords_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    passwords_hashed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    errors: Mapped[str | None] = mapped_column(Text, nullable=True)
+    credentials: Mapped[str | None] = mapped_column(Text, nullable=True)
+    requested_by: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
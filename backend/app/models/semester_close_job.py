@@ -0,0 +1,49 @@
+import enum
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.session import Base
+
+
+class SemesterCloseJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class SemesterCloseJob(Base):
+    """One end-of-semester run (at most one per semester of an academic year).
+
+    ``step`` is the next step to run and ``level_cursor`` the last student id
+    whose level was advanced; both are committed with the work they describe,
+    so an interrupted job resumes where it stopped.
+    """
+
+    __tablename__ = "semester_close_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    semester: Mapped[str] = mapped_column(String(30), nullable=False)
+    academic_year: Mapped[str] = mapped_column(String(20), nullable=False)
+    status: Mapped[SemesterCloseJobStatus] = mapped_column(
+        Enum(SemesterCloseJobStatus),
+        nullable=False,
+        default=SemesterCloseJobStatus.pending,
+    )
+    step: Mapped[str] = mapped_column(String(32), nullable=False, default="sessions")
+    level_cursor: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sessions_closed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    enrollments_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    students_unenrolled: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    levels_updated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sessions_archived: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    records_archived: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    requested_by: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (UniqueConstraint("semester", "academic_year", name="uq_semester_close_jobs_semester_year"),)
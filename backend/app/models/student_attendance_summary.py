@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..db.session import Base
+
+
+class StudentAttendanceSummary(Base):
+    """Per-(student, course) attendance counters for the student dashboard.
+
+    Derived data, maintained by ``services.attendance_summaries`` in the same
+    transaction as the records/sessions/enrolments it summarises. Rebuild
+    with ``scripts/rebuild_attendance_summaries.py``.
+    """
+
+    __tablename__ = "student_attendance_summaries"
+
+    student_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True, index=True)
+    confirmed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    flagged_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    pending_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    absent_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Sessions of the course (for the student's programme) with no record at all
+    unmarked_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
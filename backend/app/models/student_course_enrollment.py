@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Integer, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from ..db.session import Base
@@ -18,5 +18,7 @@ class StudentCourseEnrollment(Base):
 
     __table_args__ = (
         UniqueConstraint('student_id', 'course_id', name='uq_student_course'),
+        # Course-first lookups: "is this student enrolled in the session's course"
+        Index('ix_student_course_enrollments_course_student', 'course_id', 'student_id'),
     )
 
@@ -18,6 +18,7 @@ class VerificationLog(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     __table_args__ = (
-        # Composite index for batch lookup: get all logs for a given session+student pair
-        Index("ix_verification_logs_session_user", "session_id", "user_id"),
+        # Covers "newest log for this session+student": max(id) is read
+        # straight off the end of the (session_id, user_id) range
+        Index("ix_verification_logs_session_user_id", "session_id", "user_id", "id"),
     )
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+# Upper bound on items per bulk request (a large lecture is ~300 students)
+MAX_BULK_ITEMS = 1000
+
+
+class BulkMarkItem(BaseModel):
+    session_id: int
+    student_id: int
+    status: str = "confirmed"
+
+
+class BulkManualMark(BaseModel):
+    items: List[BulkMarkItem] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+    reason: Optional[str] = Field(default=None, max_length=300)
+
+
+class BulkStatusUpdate(BaseModel):
+    record_ids: List[int] = Field(min_length=1, max_length=MAX_BULK_ITEMS)
+    status: str
@@ -0,0 +1,112 @@
+"""Set-based "who was absent" queries.
+
+Absence is "enrolled and in scope, but no qualifying attendance record".
+Every view here expresses that as a correlated ``NOT EXISTS`` against
+``attendance_records`` instead of loading enrolled users and present
+records into Python and diffing them, or shipping an ever-growing list of
+ids back to the database in an ``IN (...)``. The anti-joins are served by
+``ix_attendance_records_session_student`` and
+``ix_student_course_enrollments_course_student``.
+
+Programme scoping: a session held for one programme's class (the same
+course can be taken by several programmes) only counts against students of
+that programme. Sessions without a programme, and students without one,
+are in scope for everyone.
+
+Views:
+
+- per session: :func:`absent_students` (lecturer's absent list);
+- per course: :func:`absent_counts_by_session` (counts for many sessions in
+  one grouped query);
+- per student: :func:`student_session_scope` (attendance history).
+"""
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import ColumnElement, and_, exists, func, or_, true
+from sqlalchemy.orm import Query, Session
+
+from ..models.attendance_record import AttendanceRecord, AttendanceStatus
+from ..models.attendance_session import AttendanceSession
+from ..models.student_course_enrollment import StudentCourseEnrollment
+from ..models.user import User
+
+# A record in any of these states means the student turned up (flagged and
+# pending records are still under review, not absences)
+PRESENT_STATUSES = (
+    AttendanceStatus.confirmed,
+    AttendanceStatus.flagged,
+    AttendanceStatus.pending_verification,
+)
+
+
+def in_programme_scope(session_programme, student_programme) -> ColumnElement[bool]:
+    """Whether a session applies to a student. Either side may be a column or a plain value."""
+    if session_programme is None or student_programme is None:
+        return true()
+    conditions = [side.is_(None) for side in (session_programme, student_programme) if not isinstance(side, str)]
+    return or_(*conditions, session_programme == student_programme)
+
+
+def has_record(session_id, student_id, statuses: Iterable[AttendanceStatus] | None = None):
+    """Correlated EXISTS for a record of ``student_id`` in ``session_id`` (optionally in ``statuses``)."""
+    condition = exists().where(
+        AttendanceRecord.session_id == session_id,
+        AttendanceRecord.student_id == student_id,
+    )
+    if statuses is not None:
+        condition = condition.where(AttendanceRecord.status.in_(list(statuses)))
+    return condition
+
+
+def is_enrolled(course_id, student_id):
+    return exists().where(
+        StudentCourseEnrollment.course_id == course_id,
+        StudentCourseEnrollment.student_id == student_id,
+    )
+
+
+def absent_students(db: Session, session: AttendanceSession) -> Query:
+    """Enrolled, in-scope students of ``session`` with no present record (rejected records count as absent)."""
+    return (
+        db.query(User)
+        .filter(
+            is_enrolled(session.course_id, User.id),
+            in_programme_scope(session.programme, User.programme),
+            ~has_record(session.id, User.id, PRESENT_STATUSES),
+        )
+        .order_by(User.full_name, User.id)
+    )
+
+
+def absent_counts_by_session(db: Session, session_ids: Iterable[int]) -> dict[int, int]:
+    """Number of absent students per session, for many sessions in one grouped query."""
+    session_ids = list(session_ids)
+    if not session_ids:
+        return {}
+    rows = (
+        db.query(AttendanceSession.id, func.count(StudentCourseEnrollment.student_id))
+        .join(StudentCourseEnrollment, StudentCourseEnrollment.course_id == AttendanceSession.course_id)
+        .join(User, User.id == StudentCourseEnrollment.student_id)
+        .filter(
+            AttendanceSession.id.in_(session_ids),
+            in_programme_scope(AttendanceSession.programme, User.programme),
+            ~has_record(AttendanceSession.id, StudentCourseEnrollment.student_id, PRESENT_STATUSES),
+        )
+        .group_by(AttendanceSession.id)
+        .all()
+    )
+    counts = dict.fromkeys(session_ids, 0)
+    counts.update(rows)
+    return counts
+
+
+def student_session_scope(student: User, ended_before: datetime | None = None) -> ColumnElement[bool]:
+    """Sessions that count for ``student``: enrolled course, in programme scope and (optionally) already ended."""
+    conditions = [
+        is_enrolled(AttendanceSession.course_id, student.id),
+        in_programme_scope(AttendanceSession.programme, student.programme),
+    ]
+    if ended_before is not None:
+        conditions += [AttendanceSession.ends_at.is_not(None), AttendanceSession.ends_at < ended_before]
+    return and_(*conditions)
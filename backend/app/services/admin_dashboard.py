@@ -0,0 +1,315 @@
+"""Precomputed admin dashboard numbers, served from memory.
+
+The dashboard used to run full-table aggregates on every load (users by
+role, sessions by state, every attendance record by status, two 24-hour
+counts, top lecturers), and ``/admin/analytics`` repeated most of them. On a
+multi-million-row ``attendance_records`` table that takes seconds.
+
+Each worker now keeps a ``DashboardSnapshot``. A background thread refreshes
+it every ``ADMIN_DASHBOARD_REFRESH_SECONDS``:
+
+- a *delta* refresh keeps the counts of *settled* rows (users, sessions and
+  records created more than ``DELTA_OVERLAP`` ago) and only re-counts the
+  rows past those id watermarks, so a transaction that committed late with
+  an earlier id, or a record whose face verification finished since, is
+  still counted correctly. It also re-counts the 24-hour windows through
+  the ``created_at`` indexes and re-counts active sessions;
+- a *full* refresh recomputes everything. It runs every
+  ``ADMIN_DASHBOARD_FULL_REFRESH_SECONDS``, and sooner when a settled
+  record has changed since the last refresh (``updated_at``, e.g. a flagged
+  record reviewed), since a delta can't know what status it had. Deletions
+  and top lecturers still wait for the scheduled one.
+
+Without the thread (tests, one-off scripts) ``get`` refreshes inline once
+the snapshot is older than the refresh interval. Responses carry
+``generated_at`` so the UI can show how fresh the numbers are.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings
+from ..models.attendance_record import AttendanceRecord, AttendanceStatus
+from ..models.attendance_session import AttendanceSession
+from ..models.user import User, UserRole
+from .utils import to_utc_iso, utcnow
+
+logger = logging.getLogger(__name__)
+
+TOP_LECTURERS = 5
+# How long a row stays in the re-counted tail before its count is settled
+DELTA_OVERLAP = timedelta(minutes=5)
+
+
+@dataclass(frozen=True)
+class DashboardCounts:
+    role_counts: dict[str, int]
+    total_sessions: int
+    status_counts: dict[str, int]
+
+    def __add__(self, other: "DashboardCounts") -> "DashboardCounts":
+        return DashboardCounts(
+            role_counts=_merge(self.role_counts, other.role_counts.items()),
+            total_sessions=self.total_sessions + other.total_sessions,
+            status_counts=_merge(self.status_counts, other.status_counts.items()),
+        )
+
+
+@dataclass(frozen=True)
+class Watermarks:
+    user_id: int = 0
+    session_id: int = 0
+    record_id: int = 0
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    role_counts: dict[str, int]
+    total_sessions: int
+    active_sessions: int
+    status_counts: dict[str, int]
+    sessions_last_24h: int
+    attendance_last_24h: int
+    top_lecturers: list[dict]
+    generated_at: datetime
+    # Counts of rows up to the settled watermarks; deltas re-count everything past them
+    settled: DashboardCounts = field(default_factory=lambda: DashboardCounts({}, 0, {}))
+    settled_ids: Watermarks = field(default_factory=Watermarks)
+    full_refreshed_at: float = field(default_factory=time.monotonic)
+
+    def dashboard(self) -> dict:
+        return {
+            "overview": {
+                "total_users": sum(self.role_counts.values()),
+                "total_students": self.role_counts.get(UserRole.student.value, 0),
+                "total_lecturers": self.role_counts.get(UserRole.lecturer.value, 0),
+                "total_sessions": self.total_sessions,
+                "active_sessions": self.active_sessions,
+                "total_attendance": sum(self.status_counts.values()),
+                "flagged_attendance": self.status_counts.get(AttendanceStatus.flagged.value, 0),
+            },
+            "recent_activity": {
+                "sessions_last_24h": self.sessions_last_24h,
+                "attendance_last_24h": self.attendance_last_24h,
+            },
+            "status_breakdown": dict(self.status_counts),
+            "top_lecturers": list(self.top_lecturers),
+            "generated_at": to_utc_iso(self.generated_at),
+        }
+
+    def analytics(self) -> dict:
+        return {
+            "total_users": sum(self.role_counts.values()),
+            "total_sessions": self.total_sessions,
+            "total_attendance": sum(self.status_counts.values()),
+            "flagged_attendance": self.status_counts.get(AttendanceStatus.flagged.value, 0),
+            "generated_at": to_utc_iso(self.generated_at),
+        }
+
+
+def _merge(counts: dict[str, int], rows) -> dict[str, int]:
+    merged = dict(counts)
+    for key, count in rows:
+        key = getattr(key, "value", key)
+        merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def _window_counts(db: Session, now: datetime) -> tuple[int, int]:
+    since = now - timedelta(hours=24)
+    sessions = db.query(func.count(AttendanceSession.id)).filter(AttendanceSession.created_at >= since).scalar() or 0
+    records = db.query(func.count(AttendanceRecord.id)).filter(AttendanceRecord.created_at >= since).scalar() or 0
+    return sessions, records
+
+
+def _active_sessions(db: Session) -> int:
+    return db.query(func.count(AttendanceSession.id)).filter(AttendanceSession.is_active == True).scalar() or 0
+
+
+def _settled_watermarks(db: Session, now: datetime) -> Watermarks:
+    """Highest ids among rows created more than ``DELTA_OVERLAP`` before ``now``."""
+    cutoff = now - DELTA_OVERLAP
+    return Watermarks(*(
+        db.query(func.max(model.id)).filter(model.created_at < cutoff).scalar() or 0
+        for model in (User, AttendanceSession, AttendanceRecord)
+    ))
+
+
+def _counts(db: Session, after: Watermarks, upto: Watermarks | None = None) -> DashboardCounts:
+    """Users by role, sessions and records by status with ids in (``after``, ``upto``]."""
+
+    def in_range(column, watermark: str):
+        filters = [column > getattr(after, watermark)]
+        if upto is not None:
+            filters.append(column <= getattr(upto, watermark))
+        return filters
+
+    role_counts = _merge({}, (
+        db.query(User.role, func.count(User.id))
+        .filter(*in_range(User.id, "user_id"))
+        .group_by(User.role)
+    ))
+    total_sessions = (
+        db.query(func.count(AttendanceSession.id)).filter(*in_range(AttendanceSession.id, "session_id")).scalar() or 0
+    )
+    status_counts = _merge({}, (
+        db.query(AttendanceRecord.status, func.count(AttendanceRecord.id))
+        .filter(*in_range(AttendanceRecord.id, "record_id"))
+        .group_by(AttendanceRecord.status)
+    ))
+    return DashboardCounts(role_counts, total_sessions, status_counts)
+
+
+def _snapshot(
+    db: Session, base: DashboardSnapshot, now: datetime, settled: DashboardCounts, settled_ids: Watermarks,
+) -> DashboardSnapshot:
+    counts = settled + _counts(db, settled_ids)
+    sessions_24h, records_24h = _window_counts(db, now)
+    return replace(
+        base,
+        role_counts=counts.role_counts,
+        total_sessions=counts.total_sessions,
+        active_sessions=_active_sessions(db),
+        status_counts=counts.status_counts,
+        sessions_last_24h=sessions_24h,
+        attendance_last_24h=records_24h,
+        generated_at=now,
+        settled=settled,
+        settled_ids=settled_ids,
+    )
+
+
+def compute_full_snapshot(db: Session) -> DashboardSnapshot:
+    now = utcnow()
+    settled_ids = _settled_watermarks(db, now)
+    top_lecturers = (
+        db.query(User.full_name, func.count(AttendanceSession.id))
+        .join(AttendanceSession, User.id == AttendanceSession.lecturer_id)
+        .group_by(User.id, User.full_name)
+        .order_by(desc(func.count(AttendanceSession.id)))
+        .limit(TOP_LECTURERS)
+        .all()
+    )
+    empty = DashboardSnapshot(
+        role_counts={},
+        total_sessions=0,
+        active_sessions=0,
+        status_counts={},
+        sessions_last_24h=0,
+        attendance_last_24h=0,
+        top_lecturers=[{"name": name, "session_count": count} for name, count in top_lecturers],
+        generated_at=now,
+    )
+    return _snapshot(db, empty, now, _counts(db, Watermarks(), settled_ids), settled_ids)
+
+
+def apply_deltas(db: Session, snapshot: DashboardSnapshot) -> DashboardSnapshot:
+    """Settle rows that aged past ``DELTA_OVERLAP`` and re-count the rest; primary-key range scans."""
+    now = utcnow()
+    previous = snapshot.settled_ids
+    latest = _settled_watermarks(db, now)
+    settled_ids = Watermarks(
+        max(previous.user_id, latest.user_id),
+        max(previous.session_id, latest.session_id),
+        max(previous.record_id, latest.record_id),
+    )
+    settled = snapshot.settled + _counts(db, previous, settled_ids)
+    return _snapshot(db, snapshot, now, settled, settled_ids)
+
+
+def settled_records_changed(db: Session, snapshot: DashboardSnapshot) -> bool:
+    """Has a settled record been updated (e.g. its status) since ``snapshot`` was taken?"""
+    return db.query(
+        db.query(AttendanceRecord.id)
+        .filter(
+            AttendanceRecord.updated_at > snapshot.generated_at,
+            AttendanceRecord.id <= snapshot.settled_ids.record_id,
+        )
+        .exists()
+    ).scalar()
+
+
+class AdminDashboardCache:
+    def __init__(self, refresh_seconds: float, full_refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._snapshot: DashboardSnapshot | None = None
+        self._refreshed_at = 0.0
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def get(self, db: Session) -> DashboardSnapshot:
+        with self._lock:
+            snapshot, refreshed_at = self._snapshot, self._refreshed_at
+        stale = time.monotonic() - refreshed_at >= self.refresh_seconds
+        if snapshot is None or (stale and self._thread is None):
+            snapshot = self.refresh(db)
+        return snapshot
+
+    def refresh(self, db: Session, *, full: bool = False) -> DashboardSnapshot:
+        # One refresh at a time per worker; concurrent callers reuse its result
+        with self._refresh_lock:
+            with self._lock:
+                current = self._snapshot
+            if (
+                full
+                or current is None
+                or time.monotonic() - current.full_refreshed_at >= self.full_refresh_seconds
+                or settled_records_changed(db, current)
+            ):
+                snapshot = compute_full_snapshot(db)
+            else:
+                snapshot = apply_deltas(db, current)
+            with self._lock:
+                self._snapshot = snapshot
+                self._refreshed_at = time.monotonic()
+            return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._refreshed_at = 0.0
+
+    # ── Background refresh ─────────────────────────────────────────
+
+    def start_refresher(self, session_factory: Callable[[], Session]) -> None:
+        if self.refresh_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._refresh_loop, args=(session_factory,), name="admin-dashboard-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop_refresher(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _refresh_loop(self, session_factory: Callable[[], Session]) -> None:
+        while not self._stop.is_set():
+            db = session_factory()
+            try:
+                self.refresh(db)
+            except Exception:
+                logger.exception("Admin dashboard refresh failed")
+            finally:
+                db.close()
+            self._stop.wait(self.refresh_seconds)
+
+
+_settings = Settings()
+admin_dashboard_cache = AdminDashboardCache(
+    refresh_seconds=_settings.admin_dashboard_refresh_seconds,
+    full_refresh_seconds=_settings.admin_dashboard_full_refresh_seconds,
+)
@@ -0,0 +1,113 @@
+"""Move closed-semester attendance out of the hot tables.
+
+Closing a semester used to leave every session, record and verification log
+in place forever, so the indexes and aggregates behind live lecture traffic
+(submission checks, lecturer dashboards, absence anti-joins) kept growing
+with history nobody edits any more. The semester close job now archives
+the semester's sessions in chunks: each chunk is copied with its records
+and verification logs into ``*_archive`` tables (same columns and ids, plus
+the semester and academic year) by ``INSERT ... SELECT``, then deleted from
+the hot tables together with its finished face verification jobs, in one
+transaction.
+
+Live endpoints only ever read the hot tables. History and export endpoints
+take ``include_archived=true`` and ``UNION ALL`` the archive in. Archived
+sessions keep the records that were submitted (or marked absent); as with
+a closed semester before, students who never submitted have no row.
+Hourly/daily rollups already computed for archived sessions stay as they
+are; ``rebuild_rollups`` keeps them too.
+"""
+from sqlalchemy import DateTime, String, delete, insert, literal, select
+from sqlalchemy.orm import Query, Session
+
+from ..models.attendance_archive import (
+    ArchivedAttendanceRecord,
+    ArchivedAttendanceSession,
+    ArchivedVerificationLog,
+)
+from ..models.attendance_record import AttendanceRecord
+from ..models.attendance_session import AttendanceSession
+from ..models.course import Course
+from ..models.face_verification_job import FaceVerificationJob
+from ..models.verification_log import VerificationLog
+from .utils import utcnow
+
+ARCHIVE_CHUNK_SESSIONS = 200
+_ARCHIVE_ONLY_COLUMNS = ("semester", "academic_year", "archived_at")
+
+
+def _copy_into_archive(db: Session, archive_model, source_model, where, semester: str, academic_year: str, now) -> int:
+    """``INSERT INTO <archive> SELECT ... FROM <hot> WHERE ...``; returns the row count."""
+    names = [c.name for c in archive_model.__table__.columns if c.name not in _ARCHIVE_ONLY_COLUMNS]
+    source = source_model.__table__
+    rows = select(
+        *(source.c[name] for name in names),
+        literal(semester, String(30)),
+        literal(academic_year, String(20)),
+        literal(now, DateTime(timezone=True)),
+    ).where(where)
+    return db.execute(
+        insert(archive_model.__table__).from_select([*names, *_ARCHIVE_ONLY_COLUMNS], rows)
+    ).rowcount
+
+
+def archive_sessions(db: Session, session_ids: list[int], *, semester: str, academic_year: str) -> int:
+    """Move sessions with their records and verification logs into the archive.
+
+    Returns the number of records archived. The caller commits.
+    """
+    now = utcnow()
+    _copy_into_archive(
+        db, ArchivedAttendanceSession, AttendanceSession,
+        AttendanceSession.id.in_(session_ids), semester, academic_year, now,
+    )
+    records = _copy_into_archive(
+        db, ArchivedAttendanceRecord, AttendanceRecord,
+        AttendanceRecord.session_id.in_(session_ids), semester, academic_year, now,
+    )
+    _copy_into_archive(
+        db, ArchivedVerificationLog, VerificationLog,
+        VerificationLog.session_id.in_(session_ids), semester, academic_year, now,
+    )
+    # Children first: SQLite doesn't enforce ON DELETE CASCADE by default
+    for model, column in (
+        (FaceVerificationJob, FaceVerificationJob.session_id),
+        (VerificationLog, VerificationLog.session_id),
+        (AttendanceRecord, AttendanceRecord.session_id),
+        (AttendanceSession, AttendanceSession.id),
+    ):
+        db.execute(delete(model).where(column.in_(session_ids)).execution_options(synchronize_session=False))
+    return records
+
+
+def archived_history_query(db: Session, student_id: int) -> Query:
+    """A student's archived records, with the same columns as the live history query."""
+    return (
+        db.query(
+            ArchivedAttendanceSession.id,
+            ArchivedAttendanceSession.code,
+            ArchivedAttendanceSession.starts_at,
+            ArchivedAttendanceSession.ends_at,
+            ArchivedAttendanceRecord.id.label("record_id"),
+            ArchivedAttendanceRecord.status,
+            Course.code.label("course_code"),
+            Course.name.label("course_name"),
+        )
+        .select_from(ArchivedAttendanceRecord)
+        .join(ArchivedAttendanceSession, ArchivedAttendanceSession.id == ArchivedAttendanceRecord.session_id)
+        .outerjoin(Course, Course.id == ArchivedAttendanceSession.course_id)
+        .filter(ArchivedAttendanceRecord.student_id == student_id)
+    )
+
+
+def delete_archived_user_data(db: Session, user_id: int) -> None:
+    """Remove a deleted account's archived records, logs and (lecturer) sessions."""
+    sessions = select(ArchivedAttendanceSession.id).where(ArchivedAttendanceSession.lecturer_id == user_id)
+    for model, condition in (
+        (ArchivedAttendanceRecord, ArchivedAttendanceRecord.student_id == user_id),
+        (ArchivedAttendanceRecord, ArchivedAttendanceRecord.session_id.in_(sessions)),
+        (ArchivedVerificationLog, ArchivedVerificationLog.user_id == user_id),
+        (ArchivedVerificationLog, ArchivedVerificationLog.session_id.in_(sessions)),
+        (ArchivedAttendanceSession, ArchivedAttendanceSession.lecturer_id == user_id),
+    ):
+        db.execute(delete(model).where(condition).execution_options(synchronize_session=False))
@@ -0,0 +1,386 @@
+"""Hourly and daily attendance rollups behind the trend analytics endpoints.
+
+Trend charts, heatmaps and week-over-week comparisons used to need a scan
+of ``attendance_records`` (and an enrolment anti-join for the students who
+never turned up) over the whole date range. ``attendance_rollups`` holds
+the answer pre-grouped: counts per (hour or day, course, student
+programme, course level, lecturer, status), bucketed by when the session
+started (UTC, which is also Ghana time). Enrolled, in-scope students with
+no record count as ``absent`` once the session has ended.
+
+The aggregator (``scripts/attendance_rollup_worker.py``) keeps it current
+from a watermark: each run finds the hours touched since the previous run
+(records whose ``updated_at`` moved, sessions that ended), re-derives
+those hour buckets from the base tables with two grouped queries, then
+re-sums the affected days from their hour rows. Buckets are recomputed,
+not incremented, so re-processing is harmless; runs scan a few minutes
+behind the watermark to catch transactions that committed late.
+
+Deleted records or sessions, enrolment changes and course edits only show
+up in buckets that are recomputed for another reason; ``rebuild_rollups``
+(``attendance_rollup_worker.py --rebuild``) recomputes every hour that
+still has sessions in the hot tables and drops buckets left with no
+sessions at all. Hours whose sessions were all archived at a semester
+close are kept as they are: the archive no longer has the enrolments that
+made their never-submitted students absent, so they can't be re-derived.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Query, Session
+
+from ..models.attendance_archive import ArchivedAttendanceSession
+from ..models.attendance_record import AttendanceRecord, AttendanceStatus
+from ..models.attendance_rollup import AttendanceRollup, RollupWatermark
+from ..models.attendance_session import AttendanceSession
+from ..models.course import Course
+from ..models.student_course_enrollment import StudentCourseEnrollment
+from ..models.user import User
+from .absence import PRESENT_STATUSES, has_record, in_programme_scope
+from .utils import to_utc_iso, utcnow
+
+HOUR = "hour"
+DAY = "day"
+GRANULARITY_PATTERN = "^(hour|day)$"
+ROLLUP_WATERMARK = "attendance_rollups"
+# Re-scan this far behind the watermark: a transaction that committed after
+# the previous run may carry earlier timestamps
+WATERMARK_OVERLAP = timedelta(minutes=5)
+_HOURS_PER_BATCH = 100
+_SESSIONS_PER_BATCH = 500
+
+_session_time = func.coalesce(AttendanceSession.starts_at, AttendanceSession.created_at)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    moment = _as_utc(moment).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == DAY else moment
+
+
+def _batches(items: list, size: int) -> Iterable[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _in_buckets(column, starts: Iterable[datetime], width: timedelta):
+    return or_(*[and_(column >= start, column < start + width) for start in starts])
+
+
+# ── Aggregation ────────────────────────────────────────────────────
+
+
+def _status_counts(db: Session, session_ids: list[int], now: datetime):
+    """(session_id, student programme, status, count) for submitted records and never-submitted absents."""
+    submitted = (
+        db.query(AttendanceRecord.session_id, User.programme, AttendanceRecord.status, func.count(AttendanceRecord.id))
+        .join(User, User.id == AttendanceRecord.student_id)
+        .filter(AttendanceRecord.session_id.in_(session_ids))
+        .group_by(AttendanceRecord.session_id, User.programme, AttendanceRecord.status)
+    )
+    for session_id, programme, status, count in submitted:
+        yield session_id, programme, status.value, count
+    never_submitted = (
+        db.query(AttendanceSession.id, User.programme, func.count(User.id))
+        .join(StudentCourseEnrollment, StudentCourseEnrollment.course_id == AttendanceSession.course_id)
+        .join(User, User.id == StudentCourseEnrollment.student_id)
+        .filter(
+            AttendanceSession.id.in_(session_ids),
+            AttendanceSession.ends_at.is_not(None),
+            AttendanceSession.ends_at < now,
+            in_programme_scope(AttendanceSession.programme, User.programme),
+            ~has_record(AttendanceSession.id, User.id),
+        )
+        .group_by(AttendanceSession.id, User.programme)
+    )
+    for session_id, programme, count in never_submitted:
+        yield session_id, programme, AttendanceStatus.absent.value, count
+
+
+def _insert_rows(db: Session, granularity: str, counts: dict[tuple, int]) -> None:
+    rows = [
+        {
+            "granularity": granularity,
+            "bucket_start": start,
+            "course_id": course_id,
+            "programme": programme,
+            "level": level,
+            "lecturer_id": lecturer_id,
+            "status": status,
+            "count": count,
+        }
+        for (start, course_id, programme, level, lecturer_id, status), count in counts.items()
+        if count
+    ]
+    if rows:
+        db.execute(insert(AttendanceRollup), rows)
+
+
+def _recompute_hours(db: Session, hours: list[datetime], now: datetime) -> None:
+    sessions = {
+        row.id: row
+        for row in (
+            db.query(
+                AttendanceSession.id,
+                _session_time.label("started"),
+                AttendanceSession.course_id,
+                AttendanceSession.lecturer_id,
+                Course.level,
+            )
+            .outerjoin(Course, Course.id == AttendanceSession.course_id)
+            .filter(_in_buckets(_session_time, hours, timedelta(hours=1)))
+        )
+    }
+    counts: dict[tuple, int] = defaultdict(int)
+    for session_ids in _batches(list(sessions), _SESSIONS_PER_BATCH):
+        for session_id, programme, status, count in _status_counts(db, session_ids, now):
+            s = sessions[session_id]
+            counts[(bucket_start(s.started, HOUR), s.course_id, programme, s.level, s.lecturer_id, status)] += count
+    db.execute(
+        delete(AttendanceRollup).where(
+            AttendanceRollup.granularity == HOUR,
+            AttendanceRollup.bucket_start.in_(hours),
+        )
+    )
+    _insert_rows(db, HOUR, counts)
+
+
+def _recompute_days(db: Session, days: list[datetime]) -> None:
+    """Re-sum day buckets from their (already current) hour rows."""
+    hour_rows = db.query(
+        AttendanceRollup.bucket_start,
+        AttendanceRollup.course_id,
+        AttendanceRollup.programme,
+        AttendanceRollup.level,
+        AttendanceRollup.lecturer_id,
+        AttendanceRollup.status,
+        AttendanceRollup.count,
+    ).filter(
+        AttendanceRollup.granularity == HOUR,
+        _in_buckets(AttendanceRollup.bucket_start, days, timedelta(days=1)),
+    )
+    counts: dict[tuple, int] = defaultdict(int)
+    for start, *dimensions, count in hour_rows:
+        counts[(bucket_start(start, DAY), *dimensions)] += count
+    db.execute(
+        delete(AttendanceRollup).where(
+            AttendanceRollup.granularity == DAY,
+            AttendanceRollup.bucket_start.in_(days),
+        )
+    )
+    _insert_rows(db, DAY, counts)
+
+
+def recompute_buckets(db: Session, hours: Iterable[datetime], now: datetime | None = None) -> int:
+    """Re-derive the given hour buckets (and the days containing them); returns the number of hours."""
+    now = now or utcnow()
+    hours = sorted({bucket_start(h, HOUR) for h in hours})
+    for batch in _batches(hours, _HOURS_PER_BATCH):
+        _recompute_hours(db, batch, now)
+        _recompute_days(db, sorted({bucket_start(h, DAY) for h in batch}))
+    return len(hours)
+
+
+def _changed_hours(db: Session, since: datetime, now: datetime) -> set[datetime]:
+    touched_sessions = select(AttendanceRecord.session_id).where(AttendanceRecord.updated_at > since)
+    started = (
+        db.query(_session_time)
+        .filter(
+            or_(
+                AttendanceSession.id.in_(touched_sessions),
+                # Ended since the last run: never-submitted students now count as absent
+                and_(AttendanceSession.ends_at > since, AttendanceSession.ends_at <= now),
+            )
+        )
+        .distinct()
+    )
+    return {bucket_start(moment, HOUR) for (moment,) in started if moment is not None}
+
+
+def _set_watermark(db: Session, now: datetime) -> None:
+    mark = db.get(RollupWatermark, ROLLUP_WATERMARK)
+    if mark is None:
+        db.add(RollupWatermark(name=ROLLUP_WATERMARK, processed_until=now))
+    else:
+        mark.processed_until = now
+    db.flush()
+
+
+def _all_hours(db: Session, sessions=AttendanceSession) -> set[datetime]:
+    started = db.query(func.coalesce(sessions.starts_at, sessions.created_at)).distinct()
+    return {bucket_start(moment, HOUR) for (moment,) in started if moment is not None}
+
+
+def _rebuild(db: Session, now: datetime) -> set[datetime]:
+    """Recompute the hours with live sessions; drop hour buckets with no session anywhere."""
+    hours = _all_hours(db)
+    keep = hours | _all_hours(db, ArchivedAttendanceSession)
+    existing = {
+        bucket_start(moment, HOUR)
+        for (moment,) in db.query(AttendanceRollup.bucket_start)
+        .filter(AttendanceRollup.granularity == HOUR)
+        .distinct()
+    }
+    stale = sorted(existing - keep)
+    for batch in _batches(stale, _HOURS_PER_BATCH):
+        db.execute(
+            delete(AttendanceRollup).where(
+                AttendanceRollup.granularity == HOUR,
+                AttendanceRollup.bucket_start.in_(batch),
+            )
+        )
+    # Days are re-summed from their hour rows, so archived hours in them survive
+    for batch in _batches(sorted({bucket_start(h, DAY) for h in stale}), _HOURS_PER_BATCH):
+        _recompute_days(db, batch)
+    recompute_buckets(db, hours, now)
+    return hours
+
+
+def rebuild_rollups(db: Session, now: datetime | None = None) -> int:
+    """Recompute every live bucket from scratch; returns the number of rollup rows. Caller commits.
+
+    Buckets of archived sessions are kept (see the module docstring).
+    """
+    now = now or utcnow()
+    _rebuild(db, now)
+    _set_watermark(db, now)
+    return db.query(func.count(AttendanceRollup.id)).scalar() or 0
+
+
+def aggregate_rollups(db: Session, now: datetime | None = None) -> int:
+    """Fold changes since the watermark into the rollups; returns the number of hours recomputed. Caller commits.
+
+    The first run (no watermark yet) rebuilds every live hour.
+    """
+    now = now or utcnow()
+    mark = db.get(RollupWatermark, ROLLUP_WATERMARK)
+    if mark is None:
+        hours = _rebuild(db, now)
+    else:
+        hours = _changed_hours(db, _as_utc(mark.processed_until) - WATERMARK_OVERLAP, now)
+        recompute_buckets(db, hours, now)
+    _set_watermark(db, now)
+    return len(hours)
+
+
+# ── Reads ──────────────────────────────────────────────────────────
+
+
+def _summary(counts: dict[str, int]) -> dict:
+    total = sum(counts.values())
+    confirmed = counts.get(AttendanceStatus.confirmed.value, 0)
+    return {
+        **{status.value: counts.get(status.value, 0) for status in AttendanceStatus},
+        "present": sum(counts.get(status.value, 0) for status in PRESENT_STATUSES),
+        "total": total,
+        # Same definition as the session analytics: confirmed / expected
+        "attendance_rate": round(confirmed / total * 100, 2) if total else 0,
+    }
+
+
+def _rollup_query(
+    db: Session,
+    granularity: str,
+    *columns,
+    course_ids: Iterable[int] | None = None,
+    lecturer_id: int | None = None,
+    programme: str | None = None,
+    level: int | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> Query:
+    query = db.query(*columns).filter(AttendanceRollup.granularity == granularity)
+    if course_ids is not None:
+        query = query.filter(AttendanceRollup.course_id.in_(list(course_ids)))
+    if lecturer_id is not None:
+        query = query.filter(AttendanceRollup.lecturer_id == lecturer_id)
+    if programme is not None:
+        query = query.filter(AttendanceRollup.programme == programme)
+    if level is not None:
+        query = query.filter(AttendanceRollup.level == level)
+    if date_from is not None:
+        query = query.filter(AttendanceRollup.bucket_start >= date_from)
+    if date_to is not None:
+        query = query.filter(AttendanceRollup.bucket_start <= date_to)
+    return query
+
+
+def attendance_trend(db: Session, granularity: str = DAY, **filters) -> list[dict]:
+    """Status counts and attendance rate per bucket, oldest first."""
+    rows = (
+        _rollup_query(
+            db, granularity, AttendanceRollup.bucket_start, AttendanceRollup.status, func.sum(AttendanceRollup.count),
+            **filters,
+        )
+        .group_by(AttendanceRollup.bucket_start, AttendanceRollup.status)
+        .order_by(AttendanceRollup.bucket_start)
+    )
+    buckets: dict[datetime, dict[str, int]] = {}
+    for start, status, count in rows:
+        buckets.setdefault(start, {})[status] = int(count)
+    return [{"bucket_start": to_utc_iso(start), **_summary(counts)} for start, counts in buckets.items()]
+
+
+def attendance_heatmap(db: Session, **filters) -> list[dict]:
+    """Counts per (weekday, hour of day) cell; weekday 0 is Monday. Empty cells are omitted."""
+    rows = (
+        _rollup_query(
+            db, HOUR, AttendanceRollup.bucket_start, AttendanceRollup.status, func.sum(AttendanceRollup.count),
+            **filters,
+        )
+        .group_by(AttendanceRollup.bucket_start, AttendanceRollup.status)
+    )
+    cells: dict[tuple[int, int], dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for start, status, count in rows:
+        start = _as_utc(start)
+        cells[(start.weekday(), start.hour)][status] += int(count)
+    return [
+        {"weekday": weekday, "hour": hour, **_summary(counts)}
+        for (weekday, hour), counts in sorted(cells.items())
+    ]
+
+
+def week_over_week(db: Session, now: datetime | None = None, **filters) -> list[dict]:
+    """Per course: the last 7 days (today included) against the 7 days before."""
+    this_week = bucket_start(now or utcnow(), DAY) - timedelta(days=6)
+    last_week = this_week - timedelta(days=7)
+    rows = (
+        _rollup_query(
+            db, DAY, AttendanceRollup.course_id, AttendanceRollup.bucket_start, AttendanceRollup.status,
+            func.sum(AttendanceRollup.count),
+            date_from=last_week,
+            **filters,
+        )
+        .group_by(AttendanceRollup.course_id, AttendanceRollup.bucket_start, AttendanceRollup.status)
+    )
+    weeks: dict[int | None, tuple[dict, dict]] = defaultdict(lambda: (defaultdict(int), defaultdict(int)))
+    for course_id, start, status, count in rows:
+        current, previous = weeks[course_id]
+        (current if _as_utc(start) >= this_week else previous)[status] += int(count)
+    courses = {
+        course_id: (code, name)
+        for course_id, code, name in db.query(Course.id, Course.code, Course.name).filter(
+            Course.id.in_([course_id for course_id in weeks if course_id is not None])
+        )
+    }
+    result = []
+    for course_id, (current, previous) in weeks.items():
+        code, name = courses.get(course_id, (None, None))
+        current, previous = _summary(current), _summary(previous)
+        result.append({
+            "course_id": course_id,
+            "course_code": code,
+            "course_name": name,
+            "this_week": current,
+            "last_week": previous,
+            "rate_change": round(current["attendance_rate"] - previous["attendance_rate"], 2),
+        })
+    result.sort(key=lambda item: (item["course_code"] or "", item["course_id"] or 0))
+    return result
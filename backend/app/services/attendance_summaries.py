@@ -0,0 +1,268 @@
+"""Maintain ``student_attendance_summaries`` alongside the rows it summarises.
+
+The student dashboard used to run four queries per call (enrolments, a
+grouped status count, the distinct marked sessions and a NOT IN count of
+unmarked sessions), and the mobile app polls it every few seconds. The
+counters now live in one row per (student, course), so the dashboard is a
+single indexed read.
+
+Rows are recomputed, not incremented: an ``after_flush`` hook notes which
+(course, student) pairs a flush touched and re-derives just those rows on
+the flush's own connection, so counters commit or roll back with the change
+itself. Triggers:
+
+- attendance record inserted, deleted, or its status changed;
+- session deleted, or its course/programme/end time changed (every enrolled
+  student of the course);
+- enrolment created or deleted;
+- a student's programme changed (all of that student's courses).
+
+A new session is the one exception: it has no records yet, so it only adds
+one to ``unmarked_count`` of the enrolled students in its programme scope,
+with a single ``UPDATE`` instead of recomputing the whole course.
+
+Refreshes run concurrently (face worker, lecturer confirmations, submissions
+during a lecture burst), so a refresh never deletes and re-inserts a live
+row. It drops rows whose enrolment is gone, inserts missing pairs with
+``ON CONFLICT DO NOTHING``, locks the pairs (``FOR UPDATE`` in key order, on
+PostgreSQL) and then upserts the recomputed counters with
+``ON CONFLICT DO UPDATE``. The lock makes a refresh wait for any other
+transaction refreshing the same pairs, and under READ COMMITTED the
+recompute that follows sees what that transaction committed.
+
+Bulk ``Query.update()/delete()`` bypasses flush hooks; call
+``refresh_attendance_summaries`` explicitly after those.
+"""
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import delete, event, exists, func, inspect, literal, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+
+from ..models.attendance_record import AttendanceRecord, AttendanceStatus
+from ..models.attendance_session import AttendanceSession
+from ..models.student_attendance_summary import StudentAttendanceSummary
+from ..models.student_course_enrollment import StudentCourseEnrollment
+from ..models.user import User
+from .absence import has_record, in_programme_scope
+from .utils import utcnow
+
+_SESSION_FIELDS = ("course_id", "programme", "ends_at")
+_COUNTERS = ("confirmed_count", "flagged_count", "pending_count", "absent_count", "unmarked_count", "updated_at")
+_KEY = ("student_id", "course_id")
+_DIALECT_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _status_count(enrollment, status: AttendanceStatus):
+    return (
+        select(func.count(AttendanceRecord.id))
+        .join(AttendanceSession, AttendanceRecord.session_id == AttendanceSession.id)
+        .where(
+            AttendanceRecord.student_id == enrollment.student_id,
+            AttendanceSession.course_id == enrollment.course_id,
+            AttendanceRecord.status == status,
+        )
+        .scalar_subquery()
+    )
+
+
+def _summary_select(course_ids: Iterable[int] | None, student_ids: Iterable[int] | None):
+    """INSERT source: one summary row per matching enrolment, derived from base tables."""
+    e = aliased(StudentCourseEnrollment)
+    student = aliased(User)
+    unmarked = (
+        select(func.count(AttendanceSession.id))
+        .where(
+            AttendanceSession.course_id == e.course_id,
+            AttendanceSession.ends_at.is_not(None),
+            # Sessions for another programme don't count against the student
+            in_programme_scope(AttendanceSession.programme, student.programme),
+            ~has_record(AttendanceSession.id, e.student_id),
+        )
+        .scalar_subquery()
+    )
+    query = select(
+        e.student_id,
+        e.course_id,
+        _status_count(e, AttendanceStatus.confirmed),
+        _status_count(e, AttendanceStatus.flagged),
+        _status_count(e, AttendanceStatus.pending_verification),
+        _status_count(e, AttendanceStatus.absent),
+        unmarked,
+        literal(utcnow(), StudentAttendanceSummary.updated_at.type),
+    ).join(student, student.id == e.student_id).where(
+        # Keeps SQLite from reading "ON CONFLICT" as the join's ON clause
+        true()
+    )
+    if course_ids is not None:
+        query = query.where(e.course_id.in_(list(course_ids)))
+    if student_ids is not None:
+        query = query.where(e.student_id.in_(list(student_ids)))
+    return query
+
+
+def _dialect_name(conn_or_session) -> str:
+    bind = conn_or_session.get_bind() if isinstance(conn_or_session, Session) else conn_or_session
+    return bind.dialect.name
+
+
+def refresh_attendance_summaries(
+    conn_or_session,
+    *,
+    course_ids: Iterable[int] | None = None,
+    student_ids: Iterable[int] | None = None,
+) -> None:
+    """Re-derive summary rows for enrolments matching every given filter (None = all)."""
+    course_ids = None if course_ids is None else sorted(set(course_ids))
+    student_ids = None if student_ids is None else sorted(set(student_ids))
+    if course_ids == [] or student_ids == []:
+        return
+    target = StudentAttendanceSummary.__table__
+    e = StudentCourseEnrollment
+    conditions, enrolled = [], [true()]
+    if course_ids is not None:
+        conditions.append(target.c.course_id.in_(course_ids))
+        enrolled.append(e.course_id.in_(course_ids))
+    if student_ids is not None:
+        conditions.append(target.c.student_id.in_(student_ids))
+        enrolled.append(e.student_id.in_(student_ids))
+
+    conn_or_session.execute(
+        delete(target).where(
+            *conditions,
+            ~exists().where(e.student_id == target.c.student_id, e.course_id == target.c.course_id),
+        )
+    )
+    dialect = _dialect_name(conn_or_session)
+    insert = _DIALECT_INSERT.get(dialect)
+    if insert is None:  # no upsert support: plain re-derive
+        conn_or_session.execute(delete(target).where(*conditions))
+        conn_or_session.execute(
+            target.insert().from_select([*_KEY, *_COUNTERS], _summary_select(course_ids, student_ids))
+        )
+        return
+
+    conn_or_session.execute(
+        insert(target)
+        .from_select(
+            [*_KEY, "updated_at"],
+            select(e.student_id, e.course_id, literal(utcnow(), target.c.updated_at.type)).where(*enrolled),
+        )
+        .on_conflict_do_nothing(index_elements=list(_KEY))
+    )
+    if dialect == "postgresql":
+        conn_or_session.execute(
+            select(target.c.student_id)
+            .where(*conditions)
+            .order_by(target.c.student_id, target.c.course_id)
+            .with_for_update()
+        )
+    upsert = insert(target).from_select([*_KEY, *_COUNTERS], _summary_select(course_ids, student_ids))
+    conn_or_session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=list(_KEY),
+            set_={name: upsert.excluded[name] for name in _COUNTERS},
+        )
+    )
+
+
+def _count_new_session(conn, course_id: int, programme: str | None) -> None:
+    """A session without records yet: one more unmarked session for the students it applies to."""
+    target = StudentAttendanceSummary.__table__
+    stmt = (
+        update(target)
+        .where(target.c.course_id == course_id)
+        .values(unmarked_count=target.c.unmarked_count + 1, updated_at=utcnow())
+    )
+    if programme is not None:
+        stmt = stmt.where(
+            target.c.student_id.in_(select(User.id).where(in_programme_scope(programme, User.programme)))
+        )
+    conn.execute(stmt)
+
+
+def _changed(obj, *fields: str) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+def _previous(obj, field: str):
+    deleted = inspect(obj).attrs[field].history.deleted
+    return deleted[0] if deleted else None
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    whole_courses: set[int] = set()
+    whole_students: set[int] = set()
+    # record -> (session_id, student_id); the session's course is looked up below
+    record_sessions: dict[int, set[int]] = defaultdict(set)
+    pairs: dict[int, set[int]] = defaultdict(set)
+    new_sessions: list[AttendanceSession] = []
+
+    for obj in session.new:
+        if isinstance(obj, AttendanceRecord):
+            record_sessions[obj.session_id].add(obj.student_id)
+        elif isinstance(obj, AttendanceSession) and obj.course_id is not None:
+            if obj.ends_at is not None:
+                new_sessions.append(obj)
+        elif isinstance(obj, StudentCourseEnrollment):
+            pairs[obj.course_id].add(obj.student_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, AttendanceRecord) and _changed(obj, "status"):
+            record_sessions[obj.session_id].add(obj.student_id)
+        elif isinstance(obj, AttendanceSession) and _changed(obj, *_SESSION_FIELDS):
+            for course_id in (obj.course_id, _previous(obj, "course_id")):
+                if course_id is not None:
+                    whole_courses.add(course_id)
+        elif isinstance(obj, User) and _changed(obj, "programme"):
+            whole_students.add(obj.id)
+
+    for obj in session.deleted:
+        if isinstance(obj, AttendanceRecord):
+            record_sessions[obj.session_id].add(obj.student_id)
+        elif isinstance(obj, AttendanceSession) and obj.course_id is not None:
+            whole_courses.add(obj.course_id)
+        elif isinstance(obj, StudentCourseEnrollment):
+            pairs[obj.course_id].add(obj.student_id)
+
+    if not (whole_courses or whole_students or record_sessions or pairs or new_sessions):
+        return
+
+    conn = session.connection()
+    # Before any recompute, which would otherwise be counted twice
+    for obj in new_sessions:
+        _count_new_session(conn, obj.course_id, obj.programme)
+    if record_sessions:
+        rows = conn.execute(
+            select(AttendanceSession.id, AttendanceSession.course_id).where(
+                AttendanceSession.id.in_(list(record_sessions)),
+                AttendanceSession.course_id.is_not(None),
+            )
+        ).all()
+        for session_id, course_id in rows:
+            pairs[course_id] |= record_sessions[session_id]
+
+    if whole_courses:
+        refresh_attendance_summaries(conn, course_ids=whole_courses)
+    if whole_students:
+        refresh_attendance_summaries(conn, student_ids=whole_students)
+    for course_id, student_ids in pairs.items():
+        if course_id in whole_courses:
+            continue
+        student_ids = student_ids - whole_students
+        if student_ids:
+            refresh_attendance_summaries(conn, course_ids=[course_id], student_ids=student_ids)
+
+
+def install_summary_hooks() -> None:
+    """Register the flush hook on every ORM Session. Safe to call repeatedly."""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+
+
+def rebuild_all(db: Session) -> int:
+    """Recompute every summary row from scratch; returns the number of rows."""
+    refresh_attendance_summaries(db)
+    return db.query(func.count()).select_from(StudentAttendanceSummary).scalar() or 0
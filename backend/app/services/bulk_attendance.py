@@ -0,0 +1,246 @@
+"""Bulk manual marking and status overrides.
+
+The single-item endpoints (``admin.manual_mark_attendance``,
+``set_attendance_status``, the lecturer's confirm/reject) cost a request
+and up to three commits per student, so marking a 200-student lecture by
+hand after a QR failure took 200 round trips. These helpers take a whole
+list:
+
+- every item is validated with a handful of set-based lookups (sessions,
+  students, existing records), not per-item queries;
+- valid rows are written with one executemany ``INSERT``/one ``UPDATE``
+  plus their verification logs and a single audit row, in one transaction;
+- the result lists every item in request order with ``ok`` and either the
+  record or an ``error``, so one bad row doesn't fail the rest.
+
+Core statements bypass the summary flush hook, so affected
+``student_attendance_summaries`` rows are refreshed explicitly.
+"""
+from typing import Iterable
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from ..models.attendance_record import AttendanceRecord, AttendanceStatus
+from ..models.attendance_session import AttendanceSession
+from ..models.student_course_enrollment import StudentCourseEnrollment
+from ..models.user import User, UserRole
+from ..models.verification_log import VerificationLog
+from ..schemas.attendance import BulkMarkItem
+from .absence import in_programme_scope
+from .attendance_summaries import refresh_attendance_summaries
+from .audit import write_audit
+from .utils import hash_device_id
+
+
+def _parse_status(value: str) -> AttendanceStatus | None:
+    try:
+        return AttendanceStatus(value)
+    except ValueError:
+        return None
+
+
+def _refresh_summaries(db: Session, course_ids: Iterable[int | None], student_ids: Iterable[int]) -> None:
+    course_ids = {course_id for course_id in course_ids if course_id is not None}
+    if course_ids:
+        refresh_attendance_summaries(db, course_ids=course_ids, student_ids=student_ids)
+
+
+def bulk_manual_mark(
+    db: Session,
+    items: list[BulkMarkItem],
+    *,
+    actor: User,
+    reason: str | None = None,
+    lecturer_id: int | None = None,
+) -> dict:
+    """Create records for (session, student, status) items without verification checks.
+
+    ``lecturer_id`` limits the sessions to that lecturer's own, and the
+    students to those enrolled in the session's course and in its programme.
+    """
+    session_ids = {item.session_id for item in items}
+    student_ids = {item.student_id for item in items}
+    sessions = {
+        session.id: session
+        for session in db.query(
+            AttendanceSession.id, AttendanceSession.lecturer_id, AttendanceSession.course_id
+        ).filter(AttendanceSession.id.in_(session_ids))
+    }
+    students = {
+        user.id: user
+        for user in db.query(User.id, User.role, User.full_name).filter(User.id.in_(student_ids))
+    }
+    enrolled: set[tuple[int, int]] = set()
+    if lecturer_id is not None:
+        enrolled = {
+            tuple(pair)
+            for pair in db.query(AttendanceSession.id, User.id)
+            .join(StudentCourseEnrollment, StudentCourseEnrollment.course_id == AttendanceSession.course_id)
+            .join(User, User.id == StudentCourseEnrollment.student_id)
+            .filter(
+                AttendanceSession.id.in_(session_ids),
+                User.id.in_(student_ids),
+                in_programme_scope(AttendanceSession.programme, User.programme),
+            )
+        }
+    # Candidates only; the exact (session, student) pairs are matched below
+    existing = {
+        tuple(pair)
+        for pair in db.query(AttendanceRecord.session_id, AttendanceRecord.student_id).filter(
+            AttendanceRecord.session_id.in_(session_ids),
+            AttendanceRecord.student_id.in_(student_ids),
+        )
+    }
+
+    role = "Admin" if actor.role == UserRole.admin else "Lecturer"
+    # Special marker for manual entries, telling admin and lecturer marks apart
+    device_id_hash = hash_device_id(f"{role.upper()}_MANUAL")
+    results: list[dict] = []
+    rows: list[dict] = []
+    seen: set[tuple[int, int]] = set()
+    for index, item in enumerate(items):
+        pair = (item.session_id, item.student_id)
+        status = _parse_status(item.status)
+        student = students.get(item.student_id)
+        if status is None:
+            error = "Invalid status"
+        elif item.session_id not in sessions or (
+            lecturer_id is not None and sessions[item.session_id].lecturer_id != lecturer_id
+        ):
+            error = "Session not found"
+        elif student is None:
+            error = "Student not found"
+        elif student.role != UserRole.student:
+            error = "User is not a student"
+        elif lecturer_id is not None and pair not in enrolled:
+            error = "Student is not enrolled in this session's course"
+        elif pair in existing or pair in seen:
+            error = "Attendance already marked for this student"
+        else:
+            error = None
+        result = {"index": index, "session_id": item.session_id, "student_id": item.student_id, "ok": error is None}
+        if error:
+            result["error"] = error
+        else:
+            seen.add(pair)
+            result.update(status=status.value, student_name=student.full_name)
+            rows.append({
+                "session_id": item.session_id,
+                "student_id": item.student_id,
+                "device_id_hash": device_id_hash,
+                "status": status,
+            })
+        results.append(result)
+
+    if rows:
+        inserted = db.execute(
+            insert(AttendanceRecord).returning(
+                AttendanceRecord.id, AttendanceRecord.session_id, AttendanceRecord.student_id
+            ),
+            rows,
+        ).all()
+        record_ids = {(session_id, student_id): record_id for record_id, session_id, student_id in inserted}
+        for result in results:
+            if result["ok"]:
+                result["record_id"] = record_ids[(result["session_id"], result["student_id"])]
+
+        notes = f"{role} manual mark: {reason or 'No reason provided'}"
+        db.execute(
+            insert(VerificationLog),
+            [
+                {
+                    "user_id": row["student_id"],
+                    "session_id": row["session_id"],
+                    "verified": True,  # Manual override
+                    "distance": 0.0,
+                    "threshold": 0.0,
+                    "model": f"{role.lower()}_manual",
+                    "notes": notes,
+                }
+                for row in rows
+            ],
+        )
+        _refresh_summaries(
+            db,
+            (sessions[row["session_id"]].course_id for row in rows),
+            {row["student_id"] for row in rows},
+        )
+
+    created = len(rows)
+    write_audit(
+        db,
+        f"{actor.role.value}.bulk_manual_mark",
+        actor.id,
+        f"items={len(items)}, created={created}, reason={reason}",
+        auto_commit=False,
+    )
+    db.commit()
+    return {"created": created, "failed": len(items) - created, "results": results}
+
+
+def bulk_set_status(
+    db: Session,
+    record_ids: list[int],
+    status: AttendanceStatus,
+    *,
+    actor: User,
+    lecturer_id: int | None = None,
+) -> dict:
+    """Set ``status`` on many records. ``lecturer_id`` limits them to that lecturer's sessions."""
+    records = {
+        row.id: row
+        for row in (
+            db.query(
+                AttendanceRecord.id,
+                AttendanceRecord.session_id,
+                AttendanceRecord.student_id,
+                AttendanceSession.lecturer_id,
+                AttendanceSession.course_id,
+            )
+            .join(AttendanceSession, AttendanceSession.id == AttendanceRecord.session_id)
+            .filter(AttendanceRecord.id.in_(set(record_ids)))
+        )
+    }
+
+    results: list[dict] = []
+    updated = {}
+    for index, record_id in enumerate(record_ids):
+        record = records.get(record_id)
+        if record is None:
+            error = "Attendance record not found"
+        elif lecturer_id is not None and record.lecturer_id != lecturer_id:
+            error = "Forbidden"
+        else:
+            error = None
+            updated[record_id] = record
+        result = {"index": index, "record_id": record_id, "ok": error is None}
+        if error:
+            result["error"] = error
+        else:
+            result.update(session_id=record.session_id, student_id=record.student_id, status=status.value)
+        results.append(result)
+
+    if updated:
+        db.execute(
+            update(AttendanceRecord)
+            .where(AttendanceRecord.id.in_(list(updated)))
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        _refresh_summaries(
+            db,
+            (record.course_id for record in updated.values()),
+            {record.student_id for record in updated.values()},
+        )
+
+    write_audit(
+        db,
+        f"{actor.role.value}.bulk_set_status",
+        actor.id,
+        f"records={len(record_ids)}, updated={len(updated)}, status={status.value}",
+        auto_commit=False,
+    )
+    db.commit()
+    failed = sum(1 for result in results if not result["ok"])
+    return {"updated": len(record_ids) - failed, "failed": failed, "results": results}
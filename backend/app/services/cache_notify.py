@@ -0,0 +1,103 @@
+"""Cross-worker cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+Several per-worker caches (school settings, the programme registry) hold
+rows that change rarely but must not stay stale in the other Gunicorn
+workers. A writer calls ``notify_cache_invalidated(db, name)`` before
+committing: on PostgreSQL this queues ``NOTIFY absense_cache_invalidate``
+with the cache name as payload, delivered only if the transaction commits.
+Each worker runs one LISTEN thread (``cache_listener``) that calls the
+callbacks subscribed under that name. After (re)connecting it calls every
+callback, since anything may have changed while it was not listening.
+
+On other databases nothing is sent; caches fall back to their TTLs.
+"""
+import logging
+import select
+import threading
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "absense_cache_invalidate"
+
+
+class CacheInvalidationListener:
+    def __init__(self):
+        self._callbacks: dict[str, list[Callable[[], None]]] = {}
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def subscribe(self, name: str, callback: Callable[[], None]) -> None:
+        callbacks = self._callbacks.setdefault(name, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def dispatch(self, name: str | None = None) -> None:
+        """Run the callbacks for ``name`` (all of them when None)."""
+        names = list(self._callbacks) if name is None else [name]
+        for key in names:
+            for callback in self._callbacks.get(key, ()):
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Cache invalidation callback for %s failed", key)
+
+    def start(self, engine) -> None:
+        """Start the LISTEN thread for this worker (PostgreSQL only)."""
+        if engine.dialect.name != "postgresql" or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._listen_loop, args=(engine,), name="cache-invalidation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _listen_loop(self, engine) -> None:
+        while not self._stop.is_set():
+            conn = None
+            try:
+                # Dedicated connection kept out of the pool for the thread's lifetime
+                conn = engine.raw_connection()
+                conn.detach()
+                dbapi_conn = conn.driver_connection
+                dbapi_conn.autocommit = True
+                with dbapi_conn.cursor() as cur:
+                    cur.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # Anything changed while we were not listening is unknown
+                self.dispatch()
+                while not self._stop.is_set():
+                    if select.select([dbapi_conn], [], [], 5) == ([], [], []):
+                        continue
+                    dbapi_conn.poll()
+                    names = {n.payload for n in dbapi_conn.notifies}
+                    dbapi_conn.notifies.clear()
+                    for name in names:
+                        self.dispatch(name)
+            except Exception:
+                logger.exception("Cache invalidation listener error; reconnecting in 5s")
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+cache_listener = CacheInvalidationListener()
+
+
+def notify_cache_invalidated(db: Session, name: str) -> None:
+    """Queue an invalidation of cache ``name`` in every worker; sent when ``db`` commits."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, :name)"), {"channel": NOTIFY_CHANNEL, "name": name})
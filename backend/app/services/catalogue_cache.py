@@ -0,0 +1,152 @@
+"""Cached course catalogue for the student course browser.
+
+``/student/courses/recommended`` and ``/student/courses/search`` list the
+active courses for one (semester, level, programme). That list only changes
+when an admin or lecturer edits courses, yet every call re-ran the course /
+programme / lecturer joins. The serialized summaries are kept here instead;
+per-student fields such as ``is_enrolled`` are added by the caller.
+
+Entries live in process memory for ``CATALOGUE_CACHE_TTL_SECONDS``. Course
+writes call ``invalidate()``, which clears this worker immediately; other
+Gunicorn workers catch up when their entries expire. Setting
+``CACHE_REDIS_URL`` adds a shared tier: the catalogue version and the
+serialized lists are kept in Redis, so an invalidation in one worker is seen
+by all of them on their next read. If Redis stops answering, the cache falls
+back to the local tier and retries Redis every ``REDIS_RETRY_SECONDS``.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+try:
+    import redis  # type: ignore
+except Exception:  # pragma: no cover
+    redis = None  # type: ignore
+
+from ..core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# After a Redis error, skip the shared tier for this long before trying again
+REDIS_RETRY_SECONDS = 30.0
+
+CatalogueKey = tuple[str, int, str]
+CourseList = list[dict[str, Any]]
+
+_VERSION_KEY = "absense:catalogue:version"
+
+
+class CatalogueCache:
+    def __init__(self, ttl_seconds: float, redis_url: str = ""):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._version = 0
+        # key -> (expires_at, version, courses)
+        self._entries: dict[CatalogueKey, tuple[float, int, CourseList]] = {}
+        self._redis = None
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+        elif redis_url:
+            logger.warning("CACHE_REDIS_URL is set but the redis package is not installed; using local tier only")
+        # monotonic time until which Redis is skipped after an error
+        self._redis_down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _shared(self):
+        """The Redis client, or None while it is unconfigured or backing off."""
+        if self._redis is None or time.monotonic() < self._redis_down_until:
+            return None
+        return self._redis
+
+    def _redis_failed(self, action: str, exc: Exception) -> None:
+        # Logged once per outage, not on every catalogue read
+        with self._lock:
+            first = self._redis_down_until == 0.0
+            self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        if first:
+            logger.warning(
+                "Catalogue cache: Redis %s failed, using local tier only (retrying every %ss): %s",
+                action, REDIS_RETRY_SECONDS, exc,
+            )
+
+    def _redis_ok(self) -> None:
+        if self._redis_down_until:
+            with self._lock:
+                self._redis_down_until = 0.0
+            logger.info("Catalogue cache: Redis is back, shared tier re-enabled")
+
+    def _shared_version(self) -> int | None:
+        client = self._shared()
+        if client is None:
+            return None
+        try:
+            version = int(client.get(_VERSION_KEY) or 0)
+        except Exception as e:
+            self._redis_failed("read", e)
+            return None
+        self._redis_ok()
+        return version
+
+    @staticmethod
+    def _shared_key(version: int, key: CatalogueKey) -> str:
+        semester, level, programme = key
+        return f"absense:catalogue:{version}:{semester}:{level}:{programme}"
+
+    def get_or_load(self, key: CatalogueKey, loader: Callable[[], CourseList]) -> CourseList:
+        if self.ttl_seconds <= 0:
+            return loader()
+
+        shared_version = self._shared_version()
+        now = time.monotonic()
+        with self._lock:
+            version = self._version if shared_version is None else shared_version
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and entry[1] == version:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        courses = None
+        if shared_version is not None:
+            try:
+                raw = self._redis.get(self._shared_key(version, key))
+                courses = json.loads(raw) if raw else None
+            except Exception as e:
+                self._redis_failed("read", e)
+                courses = None
+        if courses is None:
+            courses = loader()
+            if shared_version is not None and self._shared() is not None:
+                try:
+                    self._redis.setex(self._shared_key(version, key), int(self.ttl_seconds), json.dumps(courses))
+                except Exception as e:
+                    self._redis_failed("write", e)
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, version, courses)
+        return courses
+
+    def invalidate(self) -> None:
+        """Drop every cached catalogue; call after any course write commits."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+        if self._redis is not None:
+            # Tried even while backing off: a missed bump leaves other workers stale
+            try:
+                self._redis.incr(_VERSION_KEY)
+            except Exception as e:
+                self._redis_failed("version bump", e)
+            else:
+                self._redis_ok()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_settings = Settings()
+catalogue_cache = CatalogueCache(_settings.catalogue_cache_ttl_seconds, _settings.cache_redis_url)
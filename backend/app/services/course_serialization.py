@@ -0,0 +1,54 @@
+"""Loading and serializing courses for the list endpoints.
+
+Course responses carry programme and lecturer names. Reading
+``course.programmes`` / ``course.lecturers`` row by row lazily issues two
+SELECTs per course, so list queries go through ``with_course_relations``
+(one ``selectinload`` query per relation for the whole page).
+
+Serialize before calling ``write_audit``: its commit expires every loaded
+instance, and touching a course afterwards reloads it and its relations one
+course at a time.
+"""
+from typing import Any
+
+from sqlalchemy.orm import Query, selectinload
+
+from ..models.course import Course
+
+
+def with_course_relations(query: Query, *, programmes: bool = True) -> Query:
+    """Eager-load lecturers (and programmes) for a query whose entity is Course."""
+    options = [selectinload(Course.lecturers)]
+    if programmes:
+        options.append(selectinload(Course.programmes))
+    return query.options(*options)
+
+
+def course_relations_via(attr, *, programmes: bool = True) -> list:
+    """Loader options for courses reached through a relationship, e.g. ``StudentCourseEnrollment.course``."""
+    options = [selectinload(attr).selectinload(Course.lecturers)]
+    if programmes:
+        options.append(selectinload(attr).selectinload(Course.programmes))
+    return options
+
+
+def course_summary(course: Course) -> dict[str, Any]:
+    return {
+        "id": course.id,
+        "code": course.code,
+        "name": course.name,
+        "description": course.description,
+        "semester": course.semester,
+    }
+
+
+def programme_names(course: Course) -> list[str]:
+    return [p.programme for p in course.programmes]
+
+
+def lecturer_names(course: Course) -> list[str]:
+    return [l.full_name for l in course.lecturers if l.full_name]
+
+
+def lecturer_ids(course: Course) -> list[int]:
+    return [l.id for l in course.lecturers]
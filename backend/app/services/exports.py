@@ -0,0 +1,199 @@
+"""Streaming attendance exports (CSV, optionally Parquet).
+
+An export is one row per (session, student): every submitted record with its
+status, plus an ``absent`` row for each enrolled, in-scope student with no
+record at all once the session has ended (see ``services.absence``). Both halves are a single
+``UNION ALL`` statement, streamed from a server-side cursor with
+``yield_per`` and encoded chunk by chunk inside the response generator, so
+memory stays flat whether the report has 50 rows or 5 million.
+
+The generator runs after the endpoint has returned and its request session
+has been closed, so it opens its own connection on the session's engine.
+
+Absent rows come from current enrolments; once a semester is closed (and
+its enrolments deleted) only submitted records remain exportable, and they
+move to the archive tables (``services.attendance_archive``). Passing
+``archived_filters`` adds the matching archived records as a third part.
+"""
+import csv
+import io
+from typing import Any, Iterator
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, String, cast, literal, null, select, union_all
+from sqlalchemy.engine import Engine
+
+from ..models.attendance_archive import ArchivedAttendanceRecord, ArchivedAttendanceSession
+from ..models.attendance_record import AttendanceRecord
+from ..models.attendance_session import AttendanceSession
+from ..models.course import Course
+from ..models.student_course_enrollment import StudentCourseEnrollment
+from ..models.user import User
+from .absence import has_record, in_programme_scope
+from .utils import to_utc_iso, utcnow
+
+try:  # optional: Parquet export
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = None
+    pq = None
+
+EXPORT_FORMAT_PATTERN = "^(csv|parquet)$"
+EXPORT_BATCH_ROWS = 1000
+
+EXPORT_COLUMNS = (
+    "session_id",
+    "session_code",
+    "course_code",
+    "course_name",
+    "programme",
+    "starts_at",
+    "ends_at",
+    "student_id",
+    "student_name",
+    "student_email",
+    "status",
+    "submitted_at",
+)
+_DATETIME_COLUMNS = {"starts_at", "ends_at", "submitted_at"}
+
+
+def _session_columns(sessions=AttendanceSession):
+    return (
+        sessions.id.label("session_id"),
+        sessions.code.label("session_code"),
+        Course.code.label("course_code"),
+        Course.name.label("course_name"),
+        sessions.programme.label("programme"),
+        sessions.starts_at.label("starts_at"),
+        sessions.ends_at.label("ends_at"),
+        User.user_id.label("student_id"),
+        User.full_name.label("student_name"),
+        User.email.label("student_email"),
+    )
+
+
+def _submitted(records, sessions, filters) -> Select:
+    return (
+        select(
+            *_session_columns(sessions),
+            # Plain text so every part of the UNION agrees on the type
+            cast(records.status, String(32)).label("status"),
+            records.created_at.label("submitted_at"),
+        )
+        .select_from(records)
+        .join(sessions, sessions.id == records.session_id)
+        .join(User, User.id == records.student_id)
+        .outerjoin(Course, Course.id == sessions.course_id)
+        .where(*filters)
+    )
+
+
+def attendance_export_statement(*session_filters, archived_filters=None, live: bool = True) -> Select:
+    """One row per (session, student) for sessions matching ``session_filters``.
+
+    ``archived_filters`` (the same conditions on ``ArchivedAttendanceSession``)
+    also includes archived sessions; ``live=False`` leaves the hot tables out.
+    """
+    submitted = _submitted(AttendanceRecord, AttendanceSession, session_filters)
+    never_submitted = (
+        select(
+            *_session_columns(),
+            literal("absent", String(32)).label("status"),
+            null().label("submitted_at"),
+        )
+        .select_from(AttendanceSession)
+        .join(StudentCourseEnrollment, StudentCourseEnrollment.course_id == AttendanceSession.course_id)
+        .join(User, User.id == StudentCourseEnrollment.student_id)
+        .outerjoin(Course, Course.id == AttendanceSession.course_id)
+        .where(
+            *session_filters,
+            # A student can still submit while the session runs
+            AttendanceSession.ends_at.is_not(None),
+            AttendanceSession.ends_at < utcnow(),
+            in_programme_scope(AttendanceSession.programme, User.programme),
+            ~has_record(AttendanceSession.id, User.id),
+        )
+    )
+    parts = [submitted, never_submitted] if live else []
+    if archived_filters is not None:
+        parts.append(_submitted(ArchivedAttendanceRecord, ArchivedAttendanceSession, archived_filters))
+    rows = union_all(*parts).subquery()
+    return select(rows).order_by(rows.c.starts_at, rows.c.session_id, rows.c.student_id)
+
+
+def _stream_rows(engine: Engine, statement: Select) -> Iterator[list[dict[str, Any]]]:
+    """Yield batches of plain-dict rows from a server-side cursor."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS).execute(statement)
+        for partition in result.mappings().partitions():
+            batch = []
+            for row in partition:
+                item = dict(row)
+                for column in _DATETIME_COLUMNS:
+                    item[column] = to_utc_iso(item[column])
+                batch.append(item)
+            yield batch
+
+
+def _csv_chunks(batches: Iterator[list[dict[str, Any]]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last ``drain``."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(batches: Iterator[list[dict[str, Any]]]) -> Iterator[bytes]:
+    schema = pa.schema([(name, pa.string() if name != "session_id" else pa.int64()) for name in EXPORT_COLUMNS])
+    sink = _ChunkSink()
+    # One row group per batch, flushed to the client as soon as it's written
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def streaming_export(engine: Engine, statement: Select, filename: str, fmt: str) -> StreamingResponse:
+    if fmt == "parquet":
+        if pa is None:
+            raise HTTPException(status_code=400, detail="Parquet export is not available on this server (pyarrow not installed)")
+        chunks, media_type = _parquet_chunks(_stream_rows(engine, statement)), "application/vnd.apache.parquet"
+    else:
+        chunks, media_type = _csv_chunks(_stream_rows(engine, statement)), "text/csv; charset=utf-8"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
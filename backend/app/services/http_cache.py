@@ -0,0 +1,63 @@
+"""ETag / conditional GET helpers for JSON endpoints.
+
+``cached_json_response`` tags a payload with a strong ETag (a hash of its
+canonical JSON) and answers ``If-None-Match`` with an empty 304, so polling
+clients and browser caches skip re-downloading unchanged lists.
+
+Polled endpoints go one step further: they hash a cheap *validator* (a few
+counts and newest-change timestamps) instead of the finished payload and
+call ``not_modified`` before running the expensive serialization queries.
+Responses also carry ``X-Server-Time`` so a client reusing a cached body
+can re-anchor countdowns (``ends_at``) to the server's clock.
+"""
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from .utils import to_utc_iso, utcnow
+
+SERVER_TIME_HEADER = "X-Server-Time"
+POLLED_CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _cache_headers(etag: str, cache_control: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control, SERVER_TIME_HEADER: to_utc_iso(utcnow())}
+
+
+def not_modified(request: Request, etag: str, *, cache_control: str = POLLED_CACHE_CONTROL) -> Response | None:
+    """An empty 304 if the client already holds ``etag``, else None (carry on and build the payload)."""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag, cache_control))
+    return None
+
+
+def cached_json_response(
+    request: Request,
+    payload: Any,
+    *,
+    cache_control: str = POLLED_CACHE_CONTROL,
+    etag: str | None = None,
+) -> Response:
+    etag = etag or compute_etag(payload)
+    return not_modified(request, etag, cache_control=cache_control) or JSONResponse(
+        payload, headers=_cache_headers(etag, cache_control)
+    )
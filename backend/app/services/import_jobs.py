@@ -0,0 +1,140 @@
+"""User imports as a background job.
+
+Every new account gets its own PBKDF2 hash, roughly 15 ms of CPU each, so a
+20,000-student cohort is several minutes of KDF work: far past the
+Gunicorn and nginx timeouts (120 s). ``POST /admin/imports/users`` therefore
+only parses and size-checks the file, records an ``ImportJob`` and returns
+202; ``run_import_job`` runs ``run_import`` after the response, recording
+hashing progress and a heartbeat on the job for
+``GET /admin/imports/jobs/{id}`` to report.
+
+The result (counts, every row error and the generated initial passwords)
+is stored on the job. The passwords are handed out once, by
+``format=credentials``, and then erased.
+
+A job whose heartbeat stops (its worker died) is marked failed on the next
+poll. Its writes were one transaction, so nothing was imported and the file
+can simply be uploaded again.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from fastapi import HTTPException
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..core.request_context import current_request
+from ..models.import_job import ImportJob, ImportJobStatus
+from ..models.user import User
+from .audit import write_audit
+from .imports import ImportResult, RowError, run_import
+from .utils import seconds_until, to_utc_iso, utcnow
+
+logger = logging.getLogger(__name__)
+
+# A pending or running job whose heartbeat is older than this is assumed dead
+STALE_AFTER = timedelta(minutes=2)
+
+
+def import_job_dict(job: ImportJob) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status.value,
+        "rows": job.rows,
+        "passwords_total": job.passwords_total,
+        "passwords_hashed": job.passwords_hashed,
+        "summary": json.loads(job.summary) if job.summary else None,
+        "credentials_available": job.credentials is not None,
+        "error": job.error,
+        "created_at": to_utc_iso(job.created_at),
+        "finished_at": to_utc_iso(job.finished_at),
+    }
+
+
+def import_job_result(job: ImportJob) -> ImportResult:
+    """The stored result, for the error report and credentials downloads."""
+    return ImportResult(
+        kind=job.kind,
+        errors=[RowError(**e) for e in json.loads(job.errors or "[]")],
+        credentials=json.loads(job.credentials or "[]"),
+    )
+
+
+def start_import_job(db: Session, kind: str, rows: int, actor: User) -> ImportJob:
+    job = ImportJob(
+        kind=kind,
+        status=ImportJobStatus.pending,
+        rows=rows,
+        passwords_hashed=0,
+        requested_by=actor.id,
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def get_import_job(db: Session, job_id: int) -> ImportJob:
+    """Load a job, marking it failed if its worker has stopped reporting."""
+    job = db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.status in (ImportJobStatus.pending, ImportJobStatus.running):
+        if -seconds_until(job.heartbeat_at or job.created_at) > STALE_AFTER.total_seconds():
+            job.status = ImportJobStatus.failed
+            job.error = "The import stopped before finishing; nothing was imported. Please upload the file again."
+            job.finished_at = utcnow()
+            db.commit()
+    return job
+
+
+def run_import_job(bind: Engine, job_id: int, rows: list[tuple[int, dict]]) -> None:
+    """Run an import job to completion (BackgroundTasks entry point)."""
+    # Runs after the response: keep its queries out of the request's stats and query budget
+    token = current_request.set(None)
+    # The import's transaction and the job's progress commits need separate sessions
+    db = Session(bind=bind, autoflush=False, expire_on_commit=False)
+    jobs = Session(bind=bind, autoflush=False, expire_on_commit=False)
+    try:
+        job = jobs.get(ImportJob, job_id)
+        if job is None or job.status != ImportJobStatus.pending:
+            return
+        job.status = ImportJobStatus.running
+        job.heartbeat_at = utcnow()
+        jobs.commit()
+
+        def progress(done: int, total: int) -> None:
+            job.passwords_total = total
+            job.passwords_hashed = done
+            job.heartbeat_at = utcnow()
+            jobs.commit()
+
+        try:
+            result = run_import(db, job.kind, rows, max_rows=len(rows), progress=progress)
+        except Exception as exc:
+            if isinstance(exc, HTTPException):
+                job.error = str(exc.detail)
+            else:
+                logger.exception("Import job %s failed", job_id)
+                job.error = str(exc)[:500]
+            job.status = ImportJobStatus.failed
+        else:
+            summary = result.summary()
+            del summary["credentials"]
+            job.summary = json.dumps(summary)
+            job.errors = json.dumps([vars(e) for e in result.errors])
+            job.credentials = json.dumps(result.credentials) if result.credentials else None
+            job.status = ImportJobStatus.done
+            write_audit(
+                jobs, "admin.import.done", job.requested_by,
+                f"kind={job.kind}, job={job.id}, rows={result.rows}, created={result.created}, "
+                f"updated={result.updated}, failed={result.failed}, initial_passwords={len(result.credentials)}",
+                auto_commit=False,
+            )
+        job.finished_at = utcnow()
+        jobs.commit()
+    finally:
+        db.close()
+        jobs.close()
+        current_request.reset(token)
@@ -0,0 +1,589 @@
+"""Admin bulk import of users, courses, course links and enrolments.
+
+Onboarding a cohort used to mean every student self-registering (one KDF
+hash and several queries each) and admins creating courses one by one.
+``run_import`` takes a CSV or XLSX file instead and works through it in
+chunks of ``IMPORT_CHUNK_ROWS``:
+
+- each chunk is validated with a few set-based lookups (existing emails and
+  ids, course codes, current links) against the cached programme list;
+- valid rows are written with one executemany upsert per chunk
+  (``INSERT ... ON CONFLICT``), batched into multi-row statements by the
+  driver;
+- every problem is collected as a ``RowError`` for the error report.
+
+All of an import's writes are one transaction: rolled back for
+``dry_run``, and on a conflict with a concurrent writer (409, nothing
+imported).
+
+Kinds and columns (header names are case-insensitive):
+
+- ``users``: email, user_id, full_name, role (student/lecturer), level,
+  programme, optional password. Existing emails are updated (name, id,
+  level, programme); their role and password are left alone. New accounts
+  without a password get a random initial password, returned once in the
+  result's ``credentials`` (never a shared default: student ids are
+  sequential, so one known password would open every classmate's
+  account). Users are validated first and written after the whole file:
+  the new accounts' passwords are hashed in between, through the KDF pool
+  and with no transaction open, so minutes of KDF work for a cohort never
+  hold locks. A dry run hashes nothing. ``POST /admin/imports/users`` runs
+  this as a background job (see ``services.import_jobs``).
+- ``courses``: code, name, semester, level, optional description and
+  programmes (``;``-separated). Existing codes are updated.
+- ``course-programmes``: course_code, programme.
+- ``course-lecturers``: course_code, lecturer (email or staff id).
+- ``enrollments``: course_code, student (email or student id).
+"""
+import csv
+import io
+import re
+import secrets
+import string
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.course import Course, CourseLecturer, CourseProgramme
+from ..models.student_course_enrollment import StudentCourseEnrollment
+from ..models.user import User, UserRole
+from .attendance_summaries import refresh_attendance_summaries
+from .programmes import programme_registry
+from .security import get_password_hashes
+from .utils import utcnow
+
+try:  # optional: XLSX import
+    import openpyxl
+except ImportError:  # pragma: no cover - exercised only without openpyxl
+    openpyxl = None
+
+IMPORT_KINDS = ("users", "courses", "course-programmes", "course-lecturers", "enrollments")
+IMPORT_KIND_PATTERN = "^(" + "|".join(IMPORT_KINDS) + ")$"
+IMPORT_CHUNK_ROWS = 1000
+# Errors returned inline; the CSV report always has all of them
+MAX_INLINE_ERRORS = 100
+
+# Same rules as /auth/register
+STUDENT_EMAIL_PATTERN = r"^[a-zA-Z0-9._%+-]+@st\.knust\.edu\.gh$"
+LECTURER_EMAIL_PATTERN = r"^[a-zA-Z0-9._%+-]+@knust\.edu\.gh$"
+STUDENT_ID_PATTERN = r"^\d{8}$"
+LECTURER_ID_PATTERN = r"^\d{7}$"
+COURSE_LEVELS = (100, 200, 300, 400)
+INITIAL_PASSWORD_LENGTH = 12
+# No look-alikes (0/O, 1/l/I): the password is read off a printout
+_PASSWORD_ALPHABET = "".join(c for c in string.ascii_letters + string.digits if c not in "0O1lI")
+
+
+@dataclass
+class RowError:
+    row: int
+    field: str | None
+    value: Any
+    error: str
+
+
+@dataclass
+class ImportResult:
+    kind: str
+    dry_run: bool = False
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: list[RowError] = field(default_factory=list)
+    # Generated initial passwords of new accounts: {row, email, user_id, full_name, password}
+    credentials: list[dict] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return len({e.row for e in self.errors})
+
+    def summary(self) -> dict:
+        return {
+            "kind": self.kind,
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "errors": [vars(e) for e in self.errors[:MAX_INLINE_ERRORS]],
+            "errors_truncated": len(self.errors) > MAX_INLINE_ERRORS,
+            "credentials": list(self.credentials),
+        }
+
+    def error_report_csv(self) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["row", "field", "value", "error"])
+        for e in self.errors:
+            writer.writerow([e.row, e.field or "", "" if e.value is None else e.value, e.error])
+        return buffer.getvalue()
+
+    def credentials_csv(self) -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["row", "email", "user_id", "full_name", "initial_password"])
+        for c in self.credentials:
+            writer.writerow([c["row"], c["email"], c["user_id"], c["full_name"], c["password"]])
+        return buffer.getvalue()
+
+
+# ── Reading ────────────────────────────────────────────────────────
+
+
+def _normalise_header(name: Any) -> str:
+    return re.sub(r"\s+", "_", str(name or "").strip().lower())
+
+
+def _clean(value: Any) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # spreadsheet numbers, e.g. a student id or level
+    text = str(value).strip()
+    return text or None
+
+
+def read_rows(stream: BinaryIO, filename: str) -> Iterator[tuple[int, dict[str, str | None]]]:
+    """Yield (row number as shown in the file, {column: value}) from a CSV or XLSX upload."""
+    if filename.lower().endswith(".xlsx"):
+        if openpyxl is None:
+            raise HTTPException(status_code=400, detail="XLSX import is not available on this server (openpyxl not installed)")
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [_normalise_header(h) for h in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                if any(v is not None and str(v).strip() for v in values):
+                    yield number, {h: _clean(v) for h, v in zip(header, values) if h}
+        finally:
+            workbook.close()
+        return
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        header = [_normalise_header(h) for h in next(reader, [])]
+        for number, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield number, {h: _clean(v) for h, v in zip(header, values) if h}
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV files must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+
+# ── Writing ────────────────────────────────────────────────────────
+
+
+def _upsert(db: Session, model, rows: list[dict], index_elements: list[str], update: dict | None = None) -> None:
+    """executemany ``INSERT ... ON CONFLICT`` (DO UPDATE with ``update``, else DO NOTHING)."""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(model.__table__)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(model.__table__)
+    else:
+        # No portable upsert: rows were already checked against the database
+        db.execute(insert(model.__table__), rows)
+        return
+    if update:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={name: value(stmt.excluded) for name, value in update.items()},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+    db.execute(stmt, rows)
+
+
+@dataclass
+class _Context:
+    db: Session
+    result: ImportResult
+    programmes: frozenset[str]
+    seen: set = field(default_factory=set)
+    touched_courses: set[int] = field(default_factory=set)
+    touched_students: set[int] = field(default_factory=set)
+    # Validated user rows, written by ``_write_users`` after the whole file
+    users: list[dict] = field(default_factory=list)
+    new_passwords: list[tuple[int, str]] = field(default_factory=list)  # (index in users, plaintext)
+
+    def error(self, row: int, column: str | None, value: Any, message: str) -> None:
+        self.result.errors.append(RowError(row, column, value, message))
+
+
+def _password_error(password: str) -> str | None:
+    if len(password) < 8:
+        return "Password must be at least 8 characters"
+    if not re.search(r"[a-zA-Z]", password):
+        return "Password must contain at least one letter"
+    if not re.search(r"\d", password):
+        return "Password must contain at least one number"
+    return None
+
+
+def _initial_password() -> str:
+    """Random password meeting the registration rules (a letter and a digit)."""
+    while True:
+        password = "".join(secrets.choice(_PASSWORD_ALPHABET) for _ in range(INITIAL_PASSWORD_LENGTH))
+        if _password_error(password) is None:
+            return password
+
+
+def _required(ctx: _Context, number: int, row: dict, *columns: str) -> bool:
+    missing = [c for c in columns if not row.get(c)]
+    for column in missing:
+        ctx.error(number, column, None, f"{column} is required")
+    return not missing
+
+
+def _import_users(ctx: _Context, chunk: list[tuple[int, dict]]) -> None:
+    db = ctx.db
+    emails = {row.get("email") for _, row in chunk if row.get("email")}
+    user_ids = {row.get("user_id") for _, row in chunk if row.get("user_id")}
+    existing = {
+        u.email: u
+        for u in db.query(User.id, User.email, User.user_id, User.role).filter(
+            or_(User.email.in_(emails), User.user_id.in_(user_ids))
+        )
+    }
+    owner_of_id = {u.user_id: u.email for u in existing.values() if u.user_id}
+
+    for number, row in chunk:
+        if not _required(ctx, number, row, "email", "user_id", "full_name", "role"):
+            continue
+        email, user_id, role_name = row["email"], row["user_id"], row["role"].lower()
+        if role_name not in (UserRole.student.value, UserRole.lecturer.value):
+            ctx.error(number, "role", row["role"], "Role must be student or lecturer")
+            continue
+        role = UserRole(role_name)
+        level = row.get("level")
+        programme = row.get("programme")
+        problems = []
+        if role == UserRole.student:
+            if not re.match(STUDENT_EMAIL_PATTERN, email):
+                problems.append(("email", email, "Students must use a KNUST student email (username@st.knust.edu.gh)"))
+            if not re.match(STUDENT_ID_PATTERN, user_id):
+                problems.append(("user_id", user_id, "Student ID must be exactly 8 digits"))
+            if not level or not level.isdigit():
+                problems.append(("level", level, "Level is required"))
+            if not programme:
+                problems.append(("programme", programme, "Programme is required"))
+        else:
+            if not re.match(LECTURER_EMAIL_PATTERN, email):
+                problems.append(("email", email, "Lecturers must use a KNUST lecturer email (lecturer@knust.edu.gh)"))
+            if not re.match(LECTURER_ID_PATTERN, user_id):
+                problems.append(("user_id", user_id, "Lecturer ID must be exactly 7 digits"))
+            if level and not level.isdigit():
+                problems.append(("level", level, "level must be a whole number"))
+        if programme and programme not in ctx.programmes:
+            problems.append(("programme", programme, "Unknown programme"))
+        current = existing.get(email)
+        if current is not None and current.role != role:
+            problems.append(("role", role_name, "Role of an existing user cannot be changed by import"))
+        if owner_of_id.get(user_id, email) != email:
+            problems.append(("user_id", user_id, "User ID already registered"))
+        if ("email", email) in ctx.seen:
+            problems.append(("email", email, "Duplicate email in file"))
+        if ("user_id", user_id) in ctx.seen:
+            problems.append(("user_id", user_id, "Duplicate user ID in file"))
+        password = row.get("password")
+        if current is None and password:
+            problem = _password_error(password)
+            if problem:
+                problems.append(("password", None, problem))
+        if problems:
+            for column, value, message in problems:
+                ctx.error(number, column, value, message)
+            continue
+        ctx.seen.update({("email", email), ("user_id", user_id)})
+        if current is None:
+            ctx.result.created += 1
+            if not password and not ctx.result.dry_run:
+                password = _initial_password()
+                ctx.result.credentials.append({
+                    "row": number, "email": email, "user_id": user_id,
+                    "full_name": row["full_name"], "password": password,
+                })
+            ctx.new_passwords.append((len(ctx.users), password))
+        else:
+            ctx.result.updated += 1
+            if role == UserRole.student:
+                # A programme change re-scopes an existing student's sessions
+                ctx.touched_students.add(current.id)
+        ctx.users.append({
+            "email": email,
+            "user_id": user_id,
+            "full_name": row["full_name"],
+            "role": role,
+            "level": int(level) if level else None,
+            "programme": programme,
+            # Not written for existing users: their passwords are kept on conflict
+            "hashed_password": "",
+        })
+
+
+def _write_users(ctx: _Context, progress: Callable[[int, int], None] | None) -> None:
+    """Hash the new accounts' passwords, then upsert every validated user row."""
+    db = ctx.db
+    # A dry run is rolled back, so it skips the KDF work
+    if ctx.new_passwords and not ctx.result.dry_run:
+        # Validation only read: end that transaction rather than keep it open
+        # through the KDF work
+        db.rollback()
+        total = len(ctx.new_passwords)
+        for start in range(0, total, IMPORT_CHUNK_ROWS):
+            batch = ctx.new_passwords[start:start + IMPORT_CHUNK_ROWS]
+            for (index, _), hashed in zip(batch, get_password_hashes([password for _, password in batch])):
+                ctx.users[index]["hashed_password"] = hashed
+            if progress:
+                progress(start + len(batch), total)
+    for start in range(0, len(ctx.users), IMPORT_CHUNK_ROWS):
+        _upsert(db, User, ctx.users[start:start + IMPORT_CHUNK_ROWS], ["email"], {
+            "user_id": lambda excluded: excluded.user_id,
+            "full_name": lambda excluded: excluded.full_name,
+            "level": lambda excluded: excluded.level,
+            "programme": lambda excluded: excluded.programme,
+            "updated_at": lambda excluded: utcnow(),
+        })
+
+
+def _courses_by_code(db: Session, codes: Iterable[str]) -> dict[str, int]:
+    codes = {c for c in codes if c}
+    if not codes:
+        return {}
+    return dict(db.query(Course.code, Course.id).filter(Course.code.in_(codes)))
+
+
+def _add_programme_links(ctx: _Context, links: list[tuple[int, int, str]]) -> int:
+    """Insert missing (course, programme) links; ``links`` are (row number, course id, programme)."""
+    course_ids = {course_id for _, course_id, _ in links}
+    existing = set()
+    if course_ids:
+        existing = {
+            (course_id, programme)
+            for course_id, programme in ctx.db.query(CourseProgramme.course_id, CourseProgramme.programme).filter(
+                CourseProgramme.course_id.in_(course_ids)
+            )
+        }
+    rows = []
+    for _, course_id, programme in links:
+        if (course_id, programme) in existing:
+            continue
+        existing.add((course_id, programme))
+        rows.append({"course_id": course_id, "programme": programme})
+    if rows:
+        ctx.db.execute(insert(CourseProgramme.__table__), rows)
+    return len(rows)
+
+
+def _import_courses(ctx: _Context, chunk: list[tuple[int, dict]]) -> None:
+    db = ctx.db
+    known = _courses_by_code(db, (row.get("code") for _, row in chunk))
+    rows, pending_links = [], []
+    for number, row in chunk:
+        if not _required(ctx, number, row, "code", "name", "semester", "level"):
+            continue
+        code = row["code"]
+        problems = []
+        if len(code) > 20:
+            problems.append(("code", code, "Course code must be at most 20 characters"))
+        if len(row["name"]) > 200:
+            problems.append(("name", row["name"], "Course name must be at most 200 characters"))
+        if len(row["semester"]) > 20:
+            problems.append(("semester", row["semester"], "Semester must be at most 20 characters"))
+        if not row["level"].isdigit() or int(row["level"]) not in COURSE_LEVELS:
+            problems.append(("level", row["level"], "Level must be 100, 200, 300, or 400"))
+        programmes = [p.strip() for p in (row.get("programmes") or "").split(";") if p.strip()]
+        for programme in programmes:
+            if programme not in ctx.programmes:
+                problems.append(("programmes", programme, f"Unknown programme: {programme}"))
+        if ("code", code) in ctx.seen:
+            problems.append(("code", code, "Duplicate course code in file"))
+        if problems:
+            for column, value, message in problems:
+                ctx.error(number, column, value, message)
+            continue
+        ctx.seen.add(("code", code))
+        if code in known:
+            ctx.result.updated += 1
+        else:
+            ctx.result.created += 1
+        rows.append({
+            "code": code,
+            "name": row["name"],
+            "semester": row["semester"],
+            "level": int(row["level"]),
+            "description": row.get("description"),
+            "is_active": True,
+        })
+        pending_links += [(number, code, programme) for programme in programmes]
+
+    table = Course.__table__
+    _upsert(db, Course, rows, ["code"], {
+        "name": lambda excluded: excluded.name,
+        "semester": lambda excluded: excluded.semester,
+        "level": lambda excluded: excluded.level,
+        "description": lambda excluded: func.coalesce(excluded.description, table.c.description),
+        "updated_at": lambda excluded: func.now(),
+    })
+    if pending_links:
+        ids = _courses_by_code(db, (code for _, code, _ in pending_links))
+        _add_programme_links(ctx, [(number, ids[code], programme) for number, code, programme in pending_links])
+
+
+def _import_course_programmes(ctx: _Context, chunk: list[tuple[int, dict]]) -> None:
+    courses = _courses_by_code(ctx.db, (row.get("course_code") for _, row in chunk))
+    links = []
+    for number, row in chunk:
+        if not _required(ctx, number, row, "course_code", "programme"):
+            continue
+        if row["course_code"] not in courses:
+            ctx.error(number, "course_code", row["course_code"], "Course not found")
+        elif row["programme"] not in ctx.programmes:
+            ctx.error(number, "programme", row["programme"], "Unknown programme")
+        else:
+            links.append((number, courses[row["course_code"]], row["programme"]))
+    created = _add_programme_links(ctx, links)
+    ctx.result.created += created
+    ctx.result.unchanged += len(links) - created
+
+
+def _link_users_to_courses(
+    ctx: _Context,
+    chunk: list[tuple[int, dict]],
+    *,
+    column: str,
+    role: UserRole,
+    user_field: str,
+    existing_pairs: Callable[[set[int]], Iterable[tuple[int, int]]],
+) -> list[dict]:
+    """Resolve (course_code, user) rows to new (course_id, user id) link rows."""
+    db = ctx.db
+    courses = _courses_by_code(db, (row.get("course_code") for _, row in chunk))
+    keys = {row.get(column) for _, row in chunk if row.get(column)}
+    users = {}
+    if keys:
+        for user in db.query(User.id, User.email, User.user_id, User.role).filter(
+            or_(User.email.in_(keys), User.user_id.in_(keys))
+        ):
+            users[user.email] = users[user.user_id] = user
+    existing = set(existing_pairs(set(courses.values()))) if courses else set()
+    rows = []
+    for number, row in chunk:
+        if not _required(ctx, number, row, "course_code", column):
+            continue
+        user = users.get(row[column])
+        if row["course_code"] not in courses:
+            ctx.error(number, "course_code", row["course_code"], "Course not found")
+        elif user is None:
+            ctx.error(number, column, row[column], f"{role.value.capitalize()} not found")
+        elif user.role != role:
+            ctx.error(number, column, row[column], f"User is not a {role.value}")
+        else:
+            pair = (courses[row["course_code"]], user.id)
+            if pair in existing:
+                ctx.result.unchanged += 1
+                continue
+            existing.add(pair)
+            ctx.result.created += 1
+            rows.append({"course_id": pair[0], user_field: pair[1]})
+    return rows
+
+
+def _import_course_lecturers(ctx: _Context, chunk: list[tuple[int, dict]]) -> None:
+    rows = _link_users_to_courses(
+        ctx, chunk, column="lecturer", role=UserRole.lecturer, user_field="lecturer_id",
+        existing_pairs=lambda course_ids: ctx.db.query(CourseLecturer.course_id, CourseLecturer.lecturer_id).filter(
+            CourseLecturer.course_id.in_(course_ids)
+        ),
+    )
+    _upsert(ctx.db, CourseLecturer, rows, ["course_id", "lecturer_id"])
+
+
+def _import_enrollments(ctx: _Context, chunk: list[tuple[int, dict]]) -> None:
+    rows = _link_users_to_courses(
+        ctx, chunk, column="student", role=UserRole.student, user_field="student_id",
+        existing_pairs=lambda course_ids: ctx.db.query(
+            StudentCourseEnrollment.course_id, StudentCourseEnrollment.student_id
+        ).filter(StudentCourseEnrollment.course_id.in_(course_ids)),
+    )
+    _upsert(ctx.db, StudentCourseEnrollment, rows, ["student_id", "course_id"])
+    ctx.touched_courses.update(row["course_id"] for row in rows)
+    ctx.touched_students.update(row["student_id"] for row in rows)
+
+
+_IMPORTERS = {
+    "users": _import_users,
+    "courses": _import_courses,
+    "course-programmes": _import_course_programmes,
+    "course-lecturers": _import_course_lecturers,
+    "enrollments": _import_enrollments,
+}
+# Kinds whose validated rows are written once the whole file has been checked
+_WRITERS = {
+    "users": _write_users,
+}
+
+
+def _chunks(rows: Iterable[tuple[int, dict]], size: int) -> Iterator[list[tuple[int, dict]]]:
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_import(
+    db: Session,
+    kind: str,
+    rows: Iterable[tuple[int, dict]],
+    *,
+    dry_run: bool = False,
+    max_rows: int = 50000,
+    progress: Callable[[int, int], None] | None = None,
+) -> ImportResult:
+    """Validate and load ``rows`` (from ``read_rows``) chunk by chunk; commits unless ``dry_run``.
+
+    ``progress(done, total)`` is called as the new accounts' passwords are hashed.
+    """
+    result = ImportResult(kind=kind, dry_run=dry_run)
+    ctx = _Context(db, result, programme_registry.names(db))
+    importer = _IMPORTERS[kind]
+    try:
+        for chunk in _chunks(rows, IMPORT_CHUNK_ROWS):
+            result.rows += len(chunk)
+            if result.rows > max_rows:
+                raise HTTPException(status_code=400, detail=f"Import files are limited to {max_rows} rows")
+            importer(ctx, chunk)
+        if kind in _WRITERS:
+            _WRITERS[kind](ctx, progress)
+        if ctx.touched_students:
+            refresh_attendance_summaries(
+                db,
+                course_ids=ctx.touched_courses or None,
+                student_ids=ctx.touched_students,
+            )
+    except IntegrityError:
+        # Rows were checked against the database, so this is a concurrent writer
+        db.rollback()
+        raise HTTPException(status_code=409, detail="The import conflicted with concurrent changes; nothing was imported. Please retry.")
+    except BaseException:
+        db.rollback()
+        raise
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    return result
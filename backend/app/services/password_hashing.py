@@ -0,0 +1,104 @@
+"""Run password KDF work (hash/verify) in a bounded process pool.
+
+PBKDF2 is deliberately CPU-heavy. Running it inline pins the request's
+worker thread and holds the GIL, so a semester-start login burst slows every
+other endpoint in the same Gunicorn worker. With ``KDF_POOL_WORKERS > 0`` the
+work moves to child processes instead; ``KDF_POOL_MAX_PENDING`` caps how many
+requests may queue for the pool so a burst is shed with a 503 rather than
+piling up behind the Gunicorn timeout.
+
+With ``KDF_POOL_WORKERS=0`` (the default, used in development and tests) the
+KDF runs inline exactly as before.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException
+
+from ..core.config import Settings
+
+T = TypeVar("T")
+
+
+class KdfPool:
+    def __init__(self, workers: int, max_pending: int, wait_seconds: float):
+        self.workers = workers
+        self.max_pending = max(1, max_pending)
+        self.wait_seconds = wait_seconds
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so each Gunicorn worker forks its own children after
+        # the app is loaded, not in the master process.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy. Please try again in a few seconds.",
+                headers={"Retry-After": "5"},
+            )
+        with self._lock:
+            self.in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.workers <= 0:
+            return fn(*args)
+        self._acquire()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._release()
+
+    def map(self, fn: Callable[[Any], T], items: list) -> list[T]:
+        """``[fn(item) for item in items]`` spread over all pool processes, holding one queue slot."""
+        if self.workers <= 0:
+            return [fn(item) for item in items]
+        self._acquire()
+        try:
+            chunksize = max(1, len(items) // (self.workers * 4))
+            return list(self._get_executor().map(fn, items, chunksize=chunksize))
+        finally:
+            self._release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+_settings = Settings()
+kdf_pool = KdfPool(
+    workers=_settings.kdf_pool_workers,
+    max_pending=_settings.kdf_pool_max_pending,
+    wait_seconds=_settings.kdf_pool_wait_seconds,
+)
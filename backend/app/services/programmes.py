@@ -4,10 +4,26 @@ The ``programmes`` table is the single source of truth for programme names.
 Databases created with ``create_all`` (tests, ``init_fresh_db.py``) start
 empty, so the list is lazily seeded on first use; existing databases are
 seeded by the Alembic migration instead.
+
+Registration, profile updates, course edits and the public signup form all
+need the list, so it is held in ``programme_registry`` (a frozenset for
+membership checks plus a sorted tuple for listing). The registry loads once
+and expires after ``PROGRAMME_REGISTRY_TTL_SECONDS``. Admin
+``create_programme``/``delete_programme`` call ``notify_programmes_changed``
+before committing, so on PostgreSQL every worker drops its copy as soon as
+the change commits (see ``services.cache_notify``). A load that races an
+invalidation is not kept, as in ``school_settings_cache``.
 """
+import threading
+import time
+
 from sqlalchemy.orm import Session
 
+from ..core.config import Settings
 from ..models.programme import Programme
+from .cache_notify import cache_listener, notify_cache_invalidated
+
+CACHE_NAME = "programmes"
 
 # Mirrors web/lib/programmes.ts and mobile/lib/programmes.ts
 CANONICAL_PROGRAMMES = [
@@ -37,13 +53,55 @@ def ensure_programmes_seeded(db: Session) -> None:
         db.commit()
 
 
+class ProgrammeRegistry:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._names: frozenset[str] = frozenset()
+        self._sorted: tuple[str, ...] = ()
+        self._expires_at = 0.0
+        self._generation = 0
+
+    def _load(self, db: Session) -> tuple[frozenset[str], tuple[str, ...]]:
+        with self._lock:
+            if time.monotonic() < self._expires_at:
+                return self._names, self._sorted
+            generation = self._generation
+        ensure_programmes_seeded(db)
+        names = tuple(name for (name,) in db.query(Programme.name).order_by(Programme.name).all())
+        with self._lock:
+            # Invalidated while we were reading: serve this result but don't keep it
+            if self._generation == generation:
+                self._names, self._sorted = frozenset(names), names
+                self._expires_at = time.monotonic() + max(self.ttl_seconds, 0)
+        return frozenset(names), names
+
+    def names(self, db: Session) -> frozenset[str]:
+        return self._load(db)[0]
+
+    def sorted_names(self, db: Session) -> tuple[str, ...]:
+        return self._load(db)[1]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._expires_at = 0.0
+
+
+programme_registry = ProgrammeRegistry(Settings().programme_registry_ttl_seconds)
+cache_listener.subscribe(CACHE_NAME, programme_registry.invalidate)
+
+
+def notify_programmes_changed(db: Session) -> None:
+    """Queue a registry invalidation for every worker; sent when ``db`` commits."""
+    notify_cache_invalidated(db, CACHE_NAME)
+
+
 def list_programme_names(db: Session) -> list[str]:
-    ensure_programmes_seeded(db)
-    return [p.name for p in db.query(Programme).order_by(Programme.name).all()]
+    return list(programme_registry.sorted_names(db))
 
 
 def is_valid_programme(db: Session, name: str | None) -> bool:
     if not name or not name.strip():
         return False
-    ensure_programmes_seeded(db)
-    return db.query(Programme.id).filter(Programme.name == name.strip()).first() is not None
+    return name.strip() in programme_registry.names(db)
@@ -4,9 +4,11 @@ Handles automatic QR code rotation for active sessions
 """
 import asyncio
 import threading
+import time
 from datetime import timedelta
 from typing import Dict, Set
 from sqlalchemy.orm import Session
+from ..core.metrics import QR_SWEEP_DURATION
 from ..db.session import SessionLocal
 from ..models.attendance_session import AttendanceSession
 from ..services.utils import generate_session_nonce, utcnow, seconds_until
@@ -80,8 +82,10 @@ class QRRotationService:
         """Main rotation loop - runs every 30 seconds"""
         while self.is_running:
             try:
+                start = time.perf_counter()
                 await self._rotate_expired_qrs()
                 await self._close_expired_sessions()
+                QR_SWEEP_DURATION.observe(time.perf_counter() - start)
                 await asyncio.sleep(30)  # Check every 30 seconds
             except asyncio.CancelledError:
                 break
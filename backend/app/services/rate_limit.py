@@ -12,6 +12,7 @@ from collections import defaultdict, deque
 from fastapi import HTTPException, Request
 
 from ..core.config import Settings
+from ..core.metrics import RATE_LIMIT_REJECTIONS
 
 
 class SlidingWindowRateLimiter:
@@ -55,6 +56,7 @@ def rate_limit(scope: str, limit: int, window_seconds: int = 60):
             return
         key = f"{scope}:{_client_ip(request)}"
         if not rate_limiter.allow(key, limit, window_seconds):
+            RATE_LIMIT_REJECTIONS.inc(scope)
             raise HTTPException(
                 status_code=429,
                 detail="Too many requests. Please wait a moment and try again.",
@@ -0,0 +1,92 @@
+"""Process-wide cache of the SchoolSettings singleton.
+
+Nearly every student request (dashboard, recommended courses, search,
+enrol) needs the current semester and enrolment flags, but the row changes
+a couple of times a semester. ``school_settings_snapshot`` serves an
+immutable copy from memory; only a cold or expired cache reads the table.
+
+Writers call ``notify_school_settings_changed(db)`` before committing and
+``school_settings_cache.invalidate()`` after. On PostgreSQL the first queues
+a notification (delivered on commit) that makes every worker's LISTEN thread
+drop its copy (see ``services.cache_notify``). On other databases, other
+workers refresh when ``SCHOOL_SETTINGS_CACHE_SECONDS`` elapses, which is also
+the safety net if a notification is missed.
+
+A load that races an invalidation is not cached: ``invalidate()`` bumps a
+generation counter, and a snapshot is only stored if the generation is still
+the one seen before the row was read (as ``catalogue_cache`` does with its
+version).
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from ..core.config import Settings
+from ..models.school_settings import get_or_create_settings
+from .cache_notify import cache_listener, notify_cache_invalidated
+
+CACHE_NAME = "school_settings"
+
+
+@dataclass(frozen=True)
+class SchoolSettingsSnapshot:
+    current_semester: str
+    is_on_break: bool
+    enrollment_open: bool
+    academic_year: str
+    updated_at: datetime | None
+
+
+class SchoolSettingsCache:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: SchoolSettingsSnapshot | None = None
+        self._expires_at = 0.0
+        self._generation = 0
+
+    def get(self, db: Session) -> SchoolSettingsSnapshot:
+        now = time.monotonic()
+        with self._lock:
+            if self._snapshot is not None and now < self._expires_at:
+                return self._snapshot
+            generation = self._generation
+        row = get_or_create_settings(db)
+        snapshot = SchoolSettingsSnapshot(
+            current_semester=row.current_semester,
+            is_on_break=row.is_on_break,
+            enrollment_open=row.enrollment_open,
+            academic_year=row.academic_year,
+            updated_at=row.updated_at,
+        )
+        if self.ttl_seconds > 0:
+            with self._lock:
+                # Invalidated while we were reading: the row may predate the change
+                if self._generation == generation:
+                    self._snapshot = snapshot
+                    self._expires_at = now + self.ttl_seconds
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            self._expires_at = 0.0
+
+
+_settings = Settings()
+school_settings_cache = SchoolSettingsCache(_settings.school_settings_cache_seconds)
+cache_listener.subscribe(CACHE_NAME, school_settings_cache.invalidate)
+
+
+def school_settings_snapshot(db: Session) -> SchoolSettingsSnapshot:
+    """Current academic calendar settings, usually without touching the database."""
+    return school_settings_cache.get(db)
+
+
+def notify_school_settings_changed(db: Session) -> None:
+    """Queue a change notification for other workers; sent when ``db`` commits."""
+    notify_cache_invalidated(db, CACHE_NAME)
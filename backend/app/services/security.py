@@ -1,13 +1,103 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from ..core.config import Settings
+from .password_hashing import kdf_pool
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 settings = Settings()
 
 
+def build_password_context(rounds: int | None) -> CryptContext:
+    """PBKDF2 context; pinning min/max rounds makes hashes with any other cost "need update"."""
+    if not rounds:
+        return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds,
+    )
+
+
+pwd_context = build_password_context(settings.password_hash_rounds)
+
+
+class TokenCache:
+    """Bounded LRU of verified JWT claims, keyed by a SHA-256 digest of the token.
+
+    Polling clients present the same bearer token on every request, so caching
+    the decoded claims skips the HMAC check and claims parsing on repeat hits.
+    Entries are only stored after a successful ``jwt.decode`` and are dropped
+    once their ``exp`` passes, so a cache hit never extends a token's life.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple[float, dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict[str, Any]]:
+        if self.max_size <= 0:
+            return None
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: dict[str, Any]) -> None:
+        exp = claims.get("exp")
+        if self.max_size <= 0 or not isinstance(exp, (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (float(exp), claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = TokenCache(settings.token_cache_size)
+
+
 def create_access_token(subject: str, expires_minutes: int | None = None) -> str:
     expire_delta = timedelta(minutes=expires_minutes or settings.access_token_expire_minutes)
     expire = datetime.now(tz=timezone.utc) + expire_delta
@@ -16,20 +106,53 @@ def create_access_token(subject: str, expires_minutes: int | None = None) -> str
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Module-level so they can be pickled into the KDF process pool
+def _verify(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def decode_token(token: str) -> Optional[str]:
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return kdf_pool.run(_verify, plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password; also return a fresh hash if the stored one uses outdated KDF parameters."""
+    return kdf_pool.run(_verify_and_update, plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    return kdf_pool.run(_hash, password)
+
+
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    """Hash many passwords at once (e.g. an import), in parallel when the KDF pool is enabled."""
+    return kdf_pool.map(_hash, passwords)
+
+
+def decode_token_claims(token: str) -> Optional[dict[str, Any]]:
+    """Return the verified claims of ``token``, or None if it is invalid or expired."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload.get("sub")
+        claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         return None
+    token_cache.put(token, claims)
+    return claims
+
+
+def decode_token(token: str) -> Optional[str]:
+    claims = decode_token_claims(token)
+    return claims.get("sub") if claims else None
 
 
 def create_refresh_token(subject: str, expires_days: int = 7) -> str:
@@ -39,8 +162,5 @@ def create_refresh_token(subject: str, expires_days: int = 7) -> str:
 
 
 def is_refresh_token(token: str) -> bool:
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload.get("type") == "refresh"
-    except JWTError:
-        return False
+    claims = decode_token_claims(token)
+    return bool(claims) and claims.get("type") == "refresh"
@@ -0,0 +1,307 @@
+"""End-of-semester close as a resumable background job.
+
+Closing a semester used to happen inside the request: load every course,
+every active session and every 100–300 level student as ORM objects, bump
+levels in a Python loop and delete all enrolments in one transaction that
+could outlive the worker timeout. Now ``POST /admin/semester/close`` records
+a ``SemesterCloseJob`` and returns straight away; ``run_semester_close``
+works through it in the background with set-based statements:
+
+1. ``sessions`` – close the school (on break, enrolment closed) so nobody
+   enrols mid-run, and close the semester's active sessions with one
+   ``UPDATE``;
+2. ``enrollments`` – delete the semester's enrolments in chunks, refreshing
+   the affected attendance summaries;
+3. ``archive`` – move the semester's sessions, records and verification
+   logs into the archive tables, a chunk of sessions at a time (see
+   ``services.attendance_archive``);
+4. ``levels`` – at the end of the 2nd Semester only, ``level = level + 100``
+   for 100–300 level students, one id range per chunk;
+5. ``settings`` – advance the semester pointer (and academic year).
+
+Each chunk commits together with the job's progress (``step``,
+``level_cursor``, counters), so every step is safe to repeat and a job whose
+worker died resumes where it stopped when the close is requested again.
+Only one run holds a job at a time: claiming it is a conditional ``UPDATE``
+that succeeds for pending or failed jobs, or running ones whose heartbeat
+is stale.
+"""
+import logging
+from datetime import timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.request_context import current_request
+from ..models.attendance_session import AttendanceSession
+from ..models.course import Course
+from ..models.school_settings import get_or_create_settings
+from ..models.semester_close_job import SemesterCloseJob, SemesterCloseJobStatus
+from ..models.student_course_enrollment import StudentCourseEnrollment
+from ..models.user import User, UserRole
+from .admin_dashboard import admin_dashboard_cache
+from .attendance_archive import ARCHIVE_CHUNK_SESSIONS, archive_sessions
+from .attendance_summaries import refresh_attendance_summaries
+from .audit import write_audit
+from .catalogue_cache import catalogue_cache
+from .school_settings import notify_school_settings_changed, school_settings_cache
+from .utils import to_utc_iso, utcnow
+
+logger = logging.getLogger(__name__)
+
+CLOSE_CHUNK_ROWS = 5000
+# A running job whose heartbeat is older than this is assumed dead
+STALE_AFTER = timedelta(minutes=2)
+_LEVEL_MAP = {100: 200, 200: 300, 300: 400}
+
+
+def next_term(semester: str, academic_year: str) -> tuple[str, str]:
+    """The (semester, academic year) that follows, e.g. 2nd Semester 2024/2025 → 1st Semester 2025/2026."""
+    if semester == "1st Semester":
+        return "2nd Semester", academic_year
+    try:
+        start, end = academic_year.split("/")
+        return "1st Semester", f"{int(end)}/{int(end) + 1}"
+    except Exception:
+        return "1st Semester", academic_year  # fallback: keep as-is
+
+
+def semester_close_job_dict(job: SemesterCloseJob) -> dict:
+    next_semester, next_year = next_term(job.semester, job.academic_year)
+    return {
+        "id": job.id,
+        "status": job.status.value,
+        "step": job.step,
+        "semester_closed": job.semester,
+        "academic_year": job.academic_year,
+        "next_semester": next_semester,
+        "next_academic_year": next_year,
+        "sessions_closed": job.sessions_closed,
+        "enrollments_total": job.enrollments_total,
+        "students_unenrolled": job.students_unenrolled,
+        "levels_updated": job.levels_updated,
+        "sessions_archived": job.sessions_archived,
+        "records_archived": job.records_archived,
+        "error": job.error,
+        "created_at": to_utc_iso(job.created_at),
+        "finished_at": to_utc_iso(job.finished_at),
+    }
+
+
+def start_semester_close(db: Session, actor: User) -> SemesterCloseJob:
+    """Return the close job for the current semester, creating it if needed.
+
+    Asking again while a job is pending, running or failed returns that same
+    job (the caller schedules a run; the claim decides whether it proceeds).
+    """
+    settings = get_or_create_settings(db)
+    key = (SemesterCloseJob.semester == settings.current_semester,
+           SemesterCloseJob.academic_year == settings.academic_year)
+    job = db.query(SemesterCloseJob).filter(*key).first()
+    if job is None:
+        job = SemesterCloseJob(
+            semester=settings.current_semester,
+            academic_year=settings.academic_year,
+            status=SemesterCloseJobStatus.pending,
+            step="sessions",
+            level_cursor=0,
+            sessions_closed=0,
+            students_unenrolled=0,
+            levels_updated=0,
+            sessions_archived=0,
+            records_archived=0,
+            requested_by=actor.id,
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another admin started it at the same moment
+            db.rollback()
+            job = db.query(SemesterCloseJob).filter(*key).one()
+    if job.status == SemesterCloseJobStatus.done:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{job.semester} {job.academic_year} has already been closed",
+        )
+    return job
+
+
+def _claim(db: Session, job_id: int) -> bool:
+    now = utcnow()
+    claimed = db.execute(
+        update(SemesterCloseJob)
+        .where(
+            SemesterCloseJob.id == job_id,
+            or_(
+                SemesterCloseJob.status.in_([SemesterCloseJobStatus.pending, SemesterCloseJobStatus.failed]),
+                and_(
+                    SemesterCloseJob.status == SemesterCloseJobStatus.running,
+                    or_(
+                        SemesterCloseJob.heartbeat_at.is_(None),
+                        SemesterCloseJob.heartbeat_at < now - STALE_AFTER,
+                    ),
+                ),
+            ),
+        )
+        .values(status=SemesterCloseJobStatus.running, heartbeat_at=now, error=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return claimed == 1
+
+
+def _semester_course_ids(job: SemesterCloseJob):
+    return select(Course.id).where(Course.semester == job.semester).scalar_subquery()
+
+
+def _close_sessions(db: Session, job: SemesterCloseJob) -> None:
+    settings = get_or_create_settings(db)
+    if settings.current_semester == job.semester and settings.academic_year == job.academic_year:
+        settings.is_on_break = True
+        settings.enrollment_open = False
+        notify_school_settings_changed(db)
+    course_ids = _semester_course_ids(job)
+    job.sessions_closed = db.execute(
+        update(AttendanceSession)
+        .where(AttendanceSession.course_id.in_(course_ids), AttendanceSession.is_active == True)
+        .values(is_active=False, qr_nonce=None, qr_expires_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    job.enrollments_total = (
+        db.query(func.count(StudentCourseEnrollment.id))
+        .filter(StudentCourseEnrollment.course_id.in_(course_ids))
+        .scalar()
+    )
+    job.step = "enrollments"
+
+
+def _unenroll_chunk(db: Session, job: SemesterCloseJob) -> None:
+    rows = (
+        db.query(StudentCourseEnrollment.id, StudentCourseEnrollment.course_id, StudentCourseEnrollment.student_id)
+        .filter(StudentCourseEnrollment.course_id.in_(_semester_course_ids(job)))
+        .order_by(StudentCourseEnrollment.id)
+        .limit(CLOSE_CHUNK_ROWS)
+        .all()
+    )
+    if not rows:
+        job.step = "archive"
+        return
+    db.execute(
+        delete(StudentCourseEnrollment)
+        .where(StudentCourseEnrollment.id.in_([row.id for row in rows]))
+        .execution_options(synchronize_session=False)
+    )
+    refresh_attendance_summaries(
+        db,
+        course_ids={row.course_id for row in rows},
+        student_ids={row.student_id for row in rows},
+    )
+    job.students_unenrolled += len(rows)
+
+
+def _archive_chunk(db: Session, job: SemesterCloseJob) -> None:
+    session_ids = [
+        session_id
+        for (session_id,) in db.query(AttendanceSession.id)
+        .filter(
+            AttendanceSession.course_id.in_(_semester_course_ids(job)),
+            AttendanceSession.is_active == False,
+            # Leave anything started after the close was requested
+            AttendanceSession.created_at <= job.created_at,
+        )
+        .order_by(AttendanceSession.id)
+        .limit(ARCHIVE_CHUNK_SESSIONS)
+    ]
+    if not session_ids:
+        # Students advance a level only once both semesters of the year are done
+        job.step = "levels" if job.semester == "2nd Semester" else "settings"
+        return
+    job.records_archived += archive_sessions(
+        db, session_ids, semester=job.semester, academic_year=job.academic_year
+    )
+    job.sessions_archived += len(session_ids)
+
+
+def _advance_levels_chunk(db: Session, job: SemesterCloseJob) -> None:
+    eligible = (User.role == UserRole.student, User.level.in_(list(_LEVEL_MAP)))
+    ids = (
+        db.query(User.id)
+        .filter(*eligible, User.id > job.level_cursor)
+        .order_by(User.id)
+        .limit(CLOSE_CHUNK_ROWS)
+        .all()
+    )
+    if not ids:
+        job.step = "settings"
+        return
+    upper = ids[-1].id
+    job.levels_updated += db.execute(
+        update(User)
+        .where(*eligible, User.id > job.level_cursor, User.id <= upper)
+        .values(level=User.level + 100)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    job.level_cursor = upper
+
+
+def _advance_semester(db: Session, job: SemesterCloseJob) -> None:
+    settings = get_or_create_settings(db)
+    # Skipped if a previous attempt already advanced it before failing
+    if settings.current_semester == job.semester and settings.academic_year == job.academic_year:
+        settings.current_semester, settings.academic_year = next_term(job.semester, job.academic_year)
+        settings.is_on_break = True
+        settings.enrollment_open = False
+        notify_school_settings_changed(db)
+    job.step = "done"
+    job.status = SemesterCloseJobStatus.done
+    job.finished_at = utcnow()
+    write_audit(
+        db, "admin.close_semester.done", job.requested_by,
+        f"semester={job.semester}, sessions_closed={job.sessions_closed}, "
+        f"students_unenrolled={job.students_unenrolled}, levels_updated={job.levels_updated}, "
+        f"sessions_archived={job.sessions_archived}",
+        auto_commit=False,
+    )
+
+
+_STEPS = {
+    "sessions": _close_sessions,
+    "enrollments": _unenroll_chunk,
+    "archive": _archive_chunk,
+    "levels": _advance_levels_chunk,
+    "settings": _advance_semester,
+}
+
+
+def run_semester_close(bind: Engine, job_id: int) -> None:
+    """Work through a close job, one committed chunk at a time (BackgroundTasks entry point)."""
+    # Runs after the response: keep its queries out of the request's stats and query budget
+    token = current_request.set(None)
+    db = Session(bind=bind, autoflush=False, expire_on_commit=False)
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.get(SemesterCloseJob, job_id)
+        try:
+            while job.step in _STEPS:
+                _STEPS[job.step](db, job)
+                job.heartbeat_at = utcnow()
+                db.commit()
+                school_settings_cache.invalidate()
+        except Exception as exc:
+            logger.exception("Semester close job %s failed at step %s", job_id, job.step)
+            db.rollback()
+            job = db.get(SemesterCloseJob, job_id)
+            job.status = SemesterCloseJobStatus.failed
+            job.error = str(exc)[:500]
+            db.commit()
+        finally:
+            catalogue_cache.invalidate()
+            admin_dashboard_cache.invalidate()
+    finally:
+        db.close()
+        current_request.reset(token)
@@ -7,6 +7,7 @@ from urllib.parse import urlparse
 from sqlalchemy.orm import Session
 
 from ..core.config import Settings
+from ..models.attendance_archive import ArchivedAttendanceRecord
 from ..models.attendance_record import AttendanceRecord
 from ..models.face_verification_job import FaceVerificationJob
 from ..models.user import User
@@ -61,13 +62,14 @@ def delete_user_uploads(db: Session, user: User) -> None:
         keys.add(user.face_reference_path)
     keys.add(face_service.get_reference_key(user_id))
 
-    for row in db.query(AttendanceRecord.selfie_image_path).filter(
-        AttendanceRecord.student_id == user_id,
-        AttendanceRecord.selfie_image_path.isnot(None),
-    ):
-        key = storage_key_from_url(row[0])
-        if key:
-            keys.add(key)
+    for records in (AttendanceRecord, ArchivedAttendanceRecord):
+        for row in db.query(records.selfie_image_path).filter(
+            records.student_id == user_id,
+            records.selfie_image_path.isnot(None),
+        ):
+            key = storage_key_from_url(row[0])
+            if key:
+                keys.add(key)
 
     for row in db.query(FaceVerificationJob.selfie_path).filter(
         FaceVerificationJob.user_id == user_id,
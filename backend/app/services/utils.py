@@ -1,6 +1,7 @@
 import secrets
 import string
 import hashlib
+from math import asin, cos, radians, sin, sqrt
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -59,3 +60,11 @@ def generate_session_nonce(length: int = 24) -> str:
 def hash_device_id(device_id: str) -> str:
     """Hash device ID using SHA-256 for secure storage."""
     return hashlib.sha256(device_id.encode('utf-8')).hexdigest()
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres between two WGS84 points."""
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    return 2 * 6371000.0 * asin(sqrt(a))
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Time the small pure-Python helpers on the request hot path and catch regressions.
+
+Covers the geofence distance used by ``submit_attendance``, device-id
+hashing, session code/nonce generation, datetime serialisation, the rate
+limiter (single-threaded and with threads contending for its lock), token
+creation and decoding (through the claims cache and cold), and
+``storage_key_from_url``. Each case reports nanoseconds per call, best of
+``--repeat`` runs.
+
+``--save-baseline`` writes the results to ``--baseline``; later runs compare
+against that file and exit with status 1 when any case is slower than its
+baseline by more than ``--threshold`` (a fraction, default 0.25). Baselines
+are per machine, so they are not committed (``benchmarks/baselines/`` is
+ignored); record one before starting an optimisation and compare after.
+
+Usage:
+    python benchmarks/bench_hot_functions.py --save-baseline
+    python benchmarks/bench_hot_functions.py [--threshold 0.25] [--only generate_session_nonce,rate_limiter]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import timeit
+from datetime import timedelta
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.services.rate_limit import SlidingWindowRateLimiter
+from app.services.security import create_access_token, decode_token, token_cache
+from app.services.user_deletion import storage_key_from_url
+from app.services.utils import (
+    generate_session_code,
+    generate_session_nonce,
+    hash_device_id,
+    haversine_m,
+    seconds_until,
+    to_utc_iso,
+    utcnow,
+)
+
+DEFAULT_BASELINE = os.path.join(backend_dir, "benchmarks", "baselines", "hot_functions.json")
+
+
+def _contended_rate_limiter(threads: int, calls_per_thread: int) -> float:
+    """Seconds for ``threads`` threads to make ``calls_per_thread`` allow() calls each on one limiter."""
+    limiter = SlidingWindowRateLimiter()
+    start = threading.Barrier(threads + 1)
+
+    def hammer(worker: int) -> None:
+        keys = [f"attendance:10.0.{worker}.{i}" for i in range(16)]
+        start.wait()
+        for i in range(calls_per_thread):
+            limiter.allow(keys[i % 16], 15, 60)
+
+    pool = [threading.Thread(target=hammer, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - began
+
+
+def build_cases(threads: int) -> dict:
+    """name -> ``fn(iterations) -> seconds``."""
+    now = utcnow()
+    naive = now.replace(tzinfo=None) + timedelta(minutes=5)
+    token = create_access_token("12345")
+    limiter = SlidingWindowRateLimiter()
+    url = "https://api.example.edu/uploads/selfies/12_345_selfie.jpg"
+
+    def timed(fn):
+        return lambda iterations: timeit.timeit(fn, number=iterations)
+
+    def cold_decode():
+        # clear() is a dict reset, negligible next to the signature check
+        token_cache.clear()
+        decode_token(token)
+
+    return {
+        "haversine_m": timed(lambda: haversine_m(6.67338, -1.56561, 6.67371, -1.56530)),
+        "hash_device_id": timed(lambda: hash_device_id("3f1c9a7e-5b2d-4e8f-9a61-0c7d2b4e8f13")),
+        "generate_session_code": timed(generate_session_code),
+        "generate_session_nonce": timed(generate_session_nonce),
+        "to_utc_iso": timed(lambda: to_utc_iso(now)),
+        "seconds_until": timed(lambda: seconds_until(naive)),
+        "rate_limiter": timed(lambda: limiter.allow("attendance:10.0.0.1", 15, 60)),
+        "rate_limiter_contended": lambda iterations: (
+            _contended_rate_limiter(threads, max(1, iterations // threads)) * iterations
+            / (threads * max(1, iterations // threads))
+        ),
+        "create_access_token": timed(lambda: create_access_token("12345")),
+        "decode_token_cached": timed(lambda: decode_token(token)),
+        "decode_token_cold": timed(cold_decode),
+        "storage_key_from_url": timed(lambda: storage_key_from_url(url)),
+    }
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> dict[str, dict]:
+    comparison = {}
+    for name, ns in results.items():
+        if name not in baseline:
+            continue
+        change = ns / baseline[name] - 1
+        comparison[name] = {
+            "baseline_ns": baseline[name],
+            "change_pct": round(change * 100, 1),
+            "regressed": change > threshold,
+        }
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=8, help="threads for rate_limiter_contended")
+    parser.add_argument("--only", help="comma-separated case names")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline, as a fraction")
+    args = parser.parse_args()
+
+    cases = build_cases(args.threads)
+    if args.only:
+        wanted = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = set(wanted) - set(cases)
+        if unknown:
+            parser.error(f"unknown case(s): {', '.join(sorted(unknown))}; choose from {', '.join(cases)}")
+        cases = {name: cases[name] for name in wanted}
+
+    results: dict[str, float] = {}
+    for name, run in cases.items():
+        run(max(1, args.iterations // 10))  # warm up
+        # Best of N to dampen scheduler noise
+        best = min(run(args.iterations) for _ in range(args.repeat))
+        results[name] = round(best / args.iterations * 1e9, 1)
+
+    environment = {"python": platform.python_version(), "machine": platform.machine(), "node": platform.node()}
+    report = {"per_call_ns": results, "environment": environment}
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        report["baseline_saved"] = args.baseline
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        if saved.get("environment") != environment:
+            print(f"warning: baseline was recorded on {saved.get('environment')}", file=sys.stderr)
+        report["threshold_pct"] = round(args.threshold * 100, 1)
+        report["comparison"] = compare(results, saved["per_call_ns"], args.threshold)
+        report["regressions"] = [name for name, row in report["comparison"].items() if row["regressed"]]
+
+    print(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Measure bearer-token decode cost: python-jose vs the in-process claims cache.
+
+Every authenticated request decodes its token once in ``get_current_user``.
+This benchmark reports the per-call cost of each path and what that adds up
+to at a given request rate, so the cache can be judged against the budget.
+PyJWT is included for comparison when it is installed (``pip install pyjwt``).
+
+Usage:
+    python benchmarks/bench_jwt_decode.py [--rate 200] [--iterations 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from jose import jwt as jose_jwt
+
+from app.services.security import (
+    create_access_token,
+    decode_token_claims,
+    settings,
+    token_cache,
+)
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    # Best of 3 to dampen scheduler noise
+    best = min(timeit.repeat(fn, number=iterations, repeat=3))
+    return best / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rate", type=float, default=200.0, help="authenticated requests per second per worker")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_access_token("12345")
+    key, algorithms = settings.secret_key, [settings.algorithm]
+
+    results: dict[str, float] = {
+        "jose_decode": _per_call_us(lambda: jose_jwt.decode(token, key, algorithms=algorithms), args.iterations),
+    }
+
+    token_cache.clear()
+    decode_token_claims(token)  # warm the cache
+    results["cached_decode"] = _per_call_us(lambda: decode_token_claims(token), args.iterations)
+
+    try:
+        import jwt as pyjwt  # type: ignore
+
+        results["pyjwt_decode"] = _per_call_us(
+            lambda: pyjwt.decode(token, key, algorithms=algorithms), args.iterations
+        )
+    except ImportError:
+        pass
+
+    report = {
+        "request_rate_per_s": args.rate,
+        "per_call_us": {k: round(v, 2) for k, v in results.items()},
+        # Share of one CPU core spent decoding tokens at the given rate
+        "cpu_share_pct": {k: round(v * args.rate / 10_000, 3) for k, v in results.items()},
+        "cache": token_cache.stats(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
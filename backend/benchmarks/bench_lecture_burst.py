@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""Simulate a lecture-start burst end to end and report latency, throughput and queue drain.
+
+Seeds a dataset (courses with programmes, enrolments, bound devices, reference
+faces and a few weeks of past sessions) into a scratch SQLite file or a
+PostgreSQL database, then replays the start of one lecture:
+
+1. the lecturer creates a geofenced session;
+2. the lecturer's screen polls the QR display endpoint (the nonce rotates);
+3. every student submits attendance with a selfie at a random moment of the
+   submission window, using the nonce currently on screen;
+4. each student polls their record until face verification settles,
+   while face workers drain the queue.
+
+The report (JSON on stdout, and ``--output`` for regression tracking) has
+p50/p95/p99 latency per operation, submission throughput, SQL statements
+and DB time per request by route (from the ``/metrics`` histograms), the
+initial status mix and how long the face queue took to drain after the
+last submission.
+
+By default the app runs in-process (httpx ASGI transport) against
+``--database-url``, with ``--face-workers`` threads running the face
+worker loop. ``--base-url`` drives a running server instead; that server
+must share the database, ``UPLOAD_DIR`` and ``METRICS_TOKEN`` (pass it
+with ``--metrics-token``), have rate limiting off, and its face workers
+(``absense-face-worker``) do the draining. Against several Gunicorn workers
+set ``METRICS_MULTIPROC_DIR`` on the server, or the query counts cover only
+the worker that answered the scrape.
+
+Without DeepFace installed jobs finish as ``model: unavailable``, which
+measures queue overhead only; ``--selfie``/``--reference-face`` take real
+images for a run with the model.
+
+Usage:
+    python benchmarks/bench_lecture_burst.py [--students 500] [--window 60] [--output burst.json]
+    python benchmarks/bench_lecture_burst.py --database-url postgresql+psycopg2://... --students 1000
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+# KNUST College of Engineering, as in the tests
+CLASS_LAT, CLASS_LNG = 6.67338, -1.56561
+PROGRAMMES = ("Computer Engineering", "Electrical and Electronics Engineering", "Biomedical Engineering")
+# A selfie-sized JPEG-framed payload; the API only checks type and size
+PLACEHOLDER_IMAGE = b"\xff\xd8\xff\xe0" + bytes(40 * 1024) + b"\xff\xd9"
+OPERATIONS = ("create_session", "qr_display", "submit_attendance", "record_status")
+
+
+def _configure_environment(args: argparse.Namespace, scratch: str) -> None:
+    """Settings are read at import time, so this runs before anything from ``app``."""
+    if not args.database_url:
+        args.database_url = f"sqlite:///{os.path.join(scratch, 'burst.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("UPLOAD_DIR", os.path.join(scratch, "uploads"))
+    os.environ["FACE_VERIFICATION_ENABLED"] = "true"
+    if not args.base_url:
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["METRICS_ENABLED"] = "true"
+        args.metrics_token = args.metrics_token or uuid.uuid4().hex
+        os.environ["METRICS_TOKEN"] = args.metrics_token
+
+
+# ── Seeding ───────────────────────────────────────────────────────
+
+
+def seed(args: argparse.Namespace) -> dict:
+    """Insert the dataset with bulk statements; returns ids, tokens and counts."""
+    from sqlalchemy import insert
+
+    from app.db.base import (
+        AttendanceRecord,
+        AttendanceSession,
+        AttendanceStatus,
+        Base,
+        Course,
+        CourseLecturer,
+        CourseProgramme,
+        Device,
+        StudentCourseEnrollment,
+        User,
+        UserRole,
+    )
+    from app.db.session import SessionLocal, engine
+    from app.services.attendance_summaries import rebuild_all
+    from app.services.face_verification import FaceVerificationService
+    from app.services.security import create_access_token
+    from app.services.utils import hash_device_id, utcnow
+
+    started = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(args.seed)
+    run = uuid.uuid4().hex[:6]  # keeps repeated runs on one database apart
+    db = SessionLocal()
+    try:
+        lecturer_id = db.execute(
+            insert(User).returning(User.id),
+            [{"email": f"bench-{run}-lecturer@knust.edu.gh", "hashed_password": "!", "full_name": "Bench Lecturer",
+              "role": UserRole.lecturer, "is_active": True}],
+        ).scalar_one()
+        student_ids = list(db.execute(
+            insert(User).returning(User.id),
+            [
+                {"email": f"bench-{run}-s{i}@st.knust.edu.gh", "hashed_password": "!", "full_name": f"Student {i}",
+                 "role": UserRole.student, "level": 200, "programme": PROGRAMMES[i % len(PROGRAMMES)], "is_active": True}
+                for i in range(args.students)
+            ],
+        ).scalars())
+        course_ids = list(db.execute(
+            insert(Course).returning(Course.id),
+            [
+                {"code": f"B{run}{j:02d}", "name": f"Bench Course {j}", "semester": "1st Semester", "level": 200, "is_active": True}
+                for j in range(args.courses)
+            ],
+        ).scalars())
+        target_course = course_ids[0]
+        db.execute(insert(CourseProgramme), [
+            {"course_id": course_id, "programme": programme} for course_id in course_ids for programme in PROGRAMMES
+        ])
+        db.execute(insert(CourseLecturer), [{"course_id": course_id, "lecturer_id": lecturer_id} for course_id in course_ids])
+
+        # Everyone takes the lecture under test, plus a few other courses
+        enrolled: dict[int, list[int]] = defaultdict(list)
+        for student_id in student_ids:
+            others = rng.sample(course_ids[1:], min(args.courses_per_student - 1, len(course_ids) - 1))
+            for course_id in [target_course, *others]:
+                enrolled[course_id].append(student_id)
+        db.execute(insert(StudentCourseEnrollment), [
+            {"student_id": student_id, "course_id": course_id}
+            for course_id, students in enrolled.items() for student_id in students
+        ])
+        db.execute(insert(Device), [
+            {"user_id": student_id, "device_id_hash": hash_device_id(f"bench-{run}-device-{student_id}"), "is_active": True}
+            for student_id in student_ids
+        ])
+
+        # Past, ended sessions with ~85% turnout so the hot tables aren't empty
+        now = utcnow()
+        history = []
+        for course_id in course_ids:
+            for week in range(1, args.history_sessions + 1):
+                start = now - timedelta(weeks=week)
+                history.append({
+                    "lecturer_id": lecturer_id, "course_id": course_id, "code": f"H{run}{course_id}{week}"[:16],
+                    "starts_at": start, "ends_at": start + timedelta(hours=1), "is_active": False, "created_at": start,
+                })
+        session_rows = db.execute(
+            insert(AttendanceSession).returning(AttendanceSession.id, AttendanceSession.course_id, AttendanceSession.starts_at),
+            history,
+        ).all()
+        records = [
+            {"session_id": session_id, "student_id": student_id, "device_id_hash": "history",
+             "status": AttendanceStatus.confirmed if rng.random() < 0.9 else AttendanceStatus.flagged,
+             "created_at": starts_at, "updated_at": starts_at}
+            for session_id, course_id, starts_at in session_rows
+            for student_id in enrolled[course_id]
+            if rng.random() < 0.85
+        ]
+        for offset in range(0, len(records), 5000):
+            db.execute(insert(AttendanceRecord), records[offset:offset + 5000])
+        rebuild_all(db)
+        db.commit()
+    finally:
+        db.close()
+
+    reference = _read(args.reference_face) or _read(args.selfie) or PLACEHOLDER_IMAGE
+    faces = FaceVerificationService()
+    for student_id in student_ids:
+        faces.save_reference_face(student_id, reference)
+
+    return {
+        "run": run,
+        "course_id": target_course,
+        "lecturer_token": create_access_token(str(lecturer_id)),
+        "students": [
+            {"id": student_id, "token": create_access_token(str(student_id)), "device": f"bench-{run}-device-{student_id}"}
+            for student_id in student_ids
+        ],
+        "counts": {
+            "students": len(student_ids),
+            "courses": len(course_ids),
+            "enrollments": sum(len(students) for students in enrolled.values()),
+            "history_sessions": len(session_rows),
+            "history_records": len(records),
+        },
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def _read(path: str | None) -> bytes | None:
+    if not path:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# ── Face queue ────────────────────────────────────────────────────
+
+
+def _face_worker(stop: threading.Event) -> None:
+    from app.db.session import SessionLocal
+    from app.services.face_verification_jobs import process_one_job
+
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            processed = process_one_job(db)
+        except Exception:
+            db.rollback()
+            processed = False
+        finally:
+            db.close()
+        if not processed:
+            stop.wait(0.05)
+
+
+def _open_face_jobs() -> int:
+    from sqlalchemy import func
+
+    from app.db.session import SessionLocal
+    from app.models.face_verification_job import FaceVerificationJob, FaceVerificationJobStatus
+
+    db = SessionLocal()
+    try:
+        return db.query(func.count(FaceVerificationJob.id)).filter(
+            FaceVerificationJob.status.in_([FaceVerificationJobStatus.pending, FaceVerificationJobStatus.processing])
+        ).scalar() or 0
+    finally:
+        db.close()
+
+
+# ── Metrics ───────────────────────────────────────────────────────
+
+
+def _parse_route_sums(text: str) -> dict[str, dict[str, float]]:
+    """``{route: {queries, requests, db_seconds}}`` from the Prometheus text."""
+    wanted = {
+        "http_request_db_queries_sum": "queries",
+        "http_request_db_queries_count": "requests",
+        "http_request_db_seconds_sum": "db_seconds",
+    }
+    found: dict[str, dict[str, float]] = defaultdict(dict)
+    for line in text.splitlines():
+        if not line or line.startswith("#") or "{" not in line:
+            continue
+        name, rest = line.split("{", 1)
+        if name not in wanted:
+            continue
+        labels, value = rest.rsplit("} ", 1)
+        route = labels.split('route="', 1)[1].split('"', 1)[0]
+        found[route][wanted[name]] = float(value)
+    return found
+
+
+async def _scrape(client, token: str) -> dict[str, dict[str, float]]:
+    r = await client.get("/metrics", headers={"Authorization": f"Bearer {token}"})
+    if r.status_code != 200:
+        return {}
+    return _parse_route_sums(r.text)
+
+
+def _query_report(before: dict, after: dict) -> dict:
+    report = {}
+    for route, totals in sorted(after.items()):
+        if route == "/metrics":
+            continue
+        base = before.get(route, {})
+        requests = totals.get("requests", 0) - base.get("requests", 0)
+        if requests <= 0:
+            continue
+        queries = totals.get("queries", 0) - base.get("queries", 0)
+        db_seconds = totals.get("db_seconds", 0) - base.get("db_seconds", 0)
+        report[route] = {
+            "requests": int(requests),
+            "queries_per_request": round(queries / requests, 2),
+            "db_ms_per_request": round(db_seconds * 1000 / requests, 2),
+        }
+    return report
+
+
+# ── The burst ─────────────────────────────────────────────────────
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _summarise(samples: list[float], errors: Counter) -> dict:
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "errors": dict(errors),
+        "p50_ms": round(_percentile(values, 50), 2),
+        "p95_ms": round(_percentile(values, 95), 2),
+        "p99_ms": round(_percentile(values, 99), 2),
+        "mean_ms": round(sum(values) / len(values), 2) if values else 0.0,
+        "max_ms": round(values[-1], 2) if values else 0.0,
+    }
+
+
+async def run_burst(args: argparse.Namespace, dataset: dict) -> dict:
+    import httpx
+
+    if args.base_url:
+        transport, base_url = None, args.base_url.rstrip("/")
+    else:
+        from app.main import app
+
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, Counter] = defaultdict(Counter)
+    statuses: Counter = Counter()
+    limiter = asyncio.Semaphore(args.concurrency)
+    selfie = _read(args.selfie) or PLACEHOLDER_IMAGE
+    rng = random.Random(args.seed)
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=120) as client:
+
+        async def call(operation: str, method: str, url: str, **kwargs):
+            async with limiter:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.HTTPError as exc:
+                    errors[operation][type(exc).__name__] += 1
+                    return None
+                latencies[operation].append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors[operation][str(response.status_code)] += 1
+                return None
+            return response.json()
+
+        metrics_before = await _scrape(client, args.metrics_token) if args.metrics_token else {}
+        lecturer = {"Authorization": f"Bearer {dataset['lecturer_token']}"}
+        session = await call("create_session", "POST", "/api/v1/lecturer/sessions", headers=lecturer, json={
+            "course_id": dataset["course_id"], "duration_minutes": 90,
+            "latitude": CLASS_LAT, "longitude": CLASS_LNG, "geofence_radius_m": 150,
+        })
+        if session is None:
+            raise SystemExit(f"create_session failed: {dict(errors['create_session'])}")
+        session_id = session["id"]
+
+        screen = {"nonce": None}
+        first_nonce = asyncio.Event()
+        stop_display = asyncio.Event()
+
+        async def display_screen():
+            while not stop_display.is_set():
+                shown = await call("qr_display", "GET", f"/api/v1/lecturer/qr/{session_id}/display", headers=lecturer)
+                if shown:
+                    screen["nonce"] = shown["qr_payload"]["nonce"]
+                    first_nonce.set()
+                try:
+                    await asyncio.wait_for(stop_display.wait(), timeout=args.qr_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        display = asyncio.create_task(display_screen())
+        await asyncio.wait_for(first_nonce.wait(), timeout=30)
+
+        settled = []
+        last_submit = {"at": 0.0, "done": 0}
+
+        async def student(entry: dict):
+            await asyncio.sleep(rng.uniform(0, args.window))
+            headers = {"Authorization": f"Bearer {entry['token']}"}
+            result = await call(
+                "submit_attendance", "POST", "/api/v1/student/attendance", headers=headers,
+                data={
+                    "qr_session_id": str(session_id), "qr_nonce": screen["nonce"],
+                    "latitude": str(CLASS_LAT + rng.uniform(-0.0004, 0.0004)),
+                    "longitude": str(CLASS_LNG + rng.uniform(-0.0004, 0.0004)),
+                    "device_id": entry["device"],
+                },
+                files={"selfie": ("selfie.jpg", selfie, "image/jpeg")},
+            )
+            last_submit["at"] = time.perf_counter()
+            last_submit["done"] += 1
+            if result is None:
+                return
+            statuses[result["status"]] += 1
+            if not result.get("face_verification_pending"):
+                settled.append(result["status"])
+                return
+            deadline = time.perf_counter() + args.record_poll_timeout
+            while time.perf_counter() < deadline:
+                await asyncio.sleep(args.record_poll_interval)
+                record = await call("record_status", "GET", f"/api/v1/student/attendance/records/{result['record_id']}", headers=headers)
+                if record and not record["face_verification_pending"]:
+                    settled.append(record["status"])
+                    return
+
+        stop_workers = threading.Event()
+        workers = [] if args.base_url else [
+            threading.Thread(target=_face_worker, args=(stop_workers,), daemon=True) for _ in range(args.face_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        burst_started = time.perf_counter()
+        students = asyncio.gather(*(student(entry) for entry in dataset["students"]))
+
+        # Face queue drain: from the last submission until no job is open
+        async def drained_after_last_submit() -> float | None:
+            while True:
+                await asyncio.sleep(0.25)
+                everyone_submitted = last_submit["done"] >= len(dataset["students"])
+                if everyone_submitted and await asyncio.to_thread(_open_face_jobs) == 0:
+                    return time.perf_counter() - last_submit["at"]
+                if time.perf_counter() - burst_started > args.window + args.record_poll_timeout:
+                    return None
+
+        drain_seconds, _ = await asyncio.gather(drained_after_last_submit(), students)
+        submission_seconds = last_submit["at"] - burst_started
+        stop_display.set()
+        await display
+        stop_workers.set()
+        for worker in workers:
+            worker.join(timeout=10)
+        metrics_after = await _scrape(client, args.metrics_token) if args.metrics_token else {}
+
+    if not args.base_url:
+        from app.services.qr_rotation import stop_qr_rotation
+
+        await stop_qr_rotation()
+
+    submitted = sum(statuses.values())
+    return {
+        "operations": {op: _summarise(latencies[op], errors[op]) for op in OPERATIONS},
+        "throughput": {
+            "submission_seconds": round(submission_seconds, 2),
+            "submissions_per_s": round(submitted / submission_seconds, 2) if submission_seconds > 0 else None,
+            "requests_per_s": round(
+                sum(len(v) for v in latencies.values()) / (time.perf_counter() - burst_started), 2
+            ),
+        },
+        "initial_status": dict(statuses),
+        "settled_status": dict(Counter(settled)),
+        "face_queue": {
+            "workers": len(workers) if workers else "external",
+            "drain_seconds_after_last_submit": None if drain_seconds is None else round(drain_seconds, 2),
+        },
+        "db_queries": _query_report(metrics_before, metrics_after),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="default: a scratch SQLite file")
+    parser.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--metrics-token", help="METRICS_TOKEN of the --base-url server (for query counts)")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--window", type=float, default=60.0, help="seconds over which students submit")
+    parser.add_argument("--concurrency", type=int, default=200, help="max requests in flight")
+    parser.add_argument("--courses", type=int, default=10)
+    parser.add_argument("--courses-per-student", type=int, default=5)
+    parser.add_argument("--history-sessions", type=int, default=6, help="past sessions per course")
+    parser.add_argument("--face-workers", type=int, default=2, help="in-process face worker threads")
+    parser.add_argument("--qr-poll-interval", type=float, default=1.0)
+    parser.add_argument("--record-poll-interval", type=float, default=2.0)
+    parser.add_argument("--record-poll-timeout", type=float, default=120.0)
+    parser.add_argument("--selfie", help="image to submit as every selfie")
+    parser.add_argument("--reference-face", help="image to store as every reference face (default: the selfie)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the dataset and arrival times")
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="absense-burst-")
+    _configure_environment(args, scratch)
+
+    import logging
+
+    # Keep the per-request access log off stdout so the report stays parseable
+    logging.getLogger("absense.access").disabled = True
+
+    from app.services.face_verification import _DEEPFACE_AVAILABLE
+    from app.db.session import engine
+
+    # The app prints (QR rotation etc.); keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        dataset = seed(args)
+        results = asyncio.run(run_burst(args, dataset))
+    report = {
+        "benchmark": "lecture_burst",
+        "revision": _git_revision(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("students", "window", "concurrency", "courses", "courses_per_student",
+                        "history_sessions", "face_workers", "qr_poll_interval", "record_poll_interval", "seed")
+        },
+        "environment": {
+            "database": engine.dialect.name,
+            "target": args.base_url or "in-process",
+            "face_engine": "deepface" if _DEEPFACE_AVAILABLE else "unavailable",
+        },
+        "seed": {"counts": dataset["counts"], "seconds": dataset["seconds"]},
+        **results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Measure per-request overhead of the request-ID/logging and security-header middlewares.
+
+Compares the previous ``BaseHTTPMiddleware`` implementations (reproduced
+below, with stdout redirected to /dev/null so ``print`` cost is counted but
+not shown) against the current pure ASGI ones, each wrapped around a trivial
+endpoint so the middleware cost dominates. Requests are driven in-process
+through httpx's ASGI transport; no server or database is needed.
+
+Usage:
+    python benchmarks/bench_middleware_overhead.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Callable
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.core.logging_middleware import (
+    RequestIDLoggingMiddleware,
+    start_request_logging,
+    stop_request_logging,
+)
+from app.core.security_headers_middleware import SecurityHeadersMiddleware
+
+
+class LegacyRequestIDLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        request_id = str(uuid.uuid4())
+        start = time.time()
+        response: Response | None = None
+        try:
+            response = await call_next(request)
+            return response
+        finally:
+            duration_ms = int((time.time() - start) * 1000)
+            status = getattr(response, "status_code", 500)
+            print(f"req_id={request_id} {request.method} {request.url.path} status={status} duration_ms={duration_ms}")
+            if response is not None:
+                response.headers["X-Request-ID"] = request_id
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+        response.headers.setdefault("X-Content-Type-Options", "nosniff")
+        response.headers.setdefault("X-Frame-Options", "DENY")
+        response.headers.setdefault("Referrer-Policy", "no-referrer")
+        response.headers.setdefault("X-XSS-Protection", "0")
+        return response
+
+
+async def _ok(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+
+def _build_app(middlewares: list) -> Starlette:
+    app = Starlette(routes=[Route("/ping", _ok)])
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+async def _per_request_us(app: Starlette, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(200, requests)):
+            await client.get("/ping")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def _run(requests: int) -> dict:
+    baseline = await _per_request_us(_build_app([]), requests)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        legacy = await _per_request_us(
+            _build_app([LegacyRequestIDLoggingMiddleware, LegacySecurityHeadersMiddleware]), requests
+        )
+        start_request_logging()
+        try:
+            asgi = await _per_request_us(_build_app([RequestIDLoggingMiddleware, SecurityHeadersMiddleware]), requests)
+        finally:
+            stop_request_logging()
+    return {
+        "requests": requests,
+        "no_middleware_us": round(baseline, 1),
+        "base_http_middleware_us": round(legacy, 1),
+        "asgi_middleware_us": round(asgi, 1),
+        "base_http_overhead_us": round(legacy - baseline, 1),
+        "asgi_overhead_us": round(asgi - baseline, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(_run(args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
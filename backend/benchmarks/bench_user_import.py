@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Import a cohort of new students and check the user import stays inside its time budgets.
+
+Each new account is given its own random initial password, so importing a
+cohort means one PBKDF2 hash per student: minutes of CPU for 20,000 rows.
+That work runs in a background job (``services.import_jobs``), so this
+benchmark follows what ``POST /admin/imports/users`` and its job do,
+against a scratch SQLite file or ``--database-url``:
+
+1. the request: parse the CSV and record the job (must answer well inside
+   the 120 s Gunicorn/nginx timeouts, ``--request-budget``);
+2. the job: validate every row, hash the new passwords with no transaction
+   open, then write all rows in one transaction. The write phase, the only
+   time the import holds locks, must fit ``--transaction-budget``.
+
+The main thread polls the job as the admin UI would. The report (JSON on
+stdout, and ``--output``) has the request time, the job's phases, the
+hashing rate and the time the hashing would take with the KDF pool workers
+of a production machine. It also counts distinct password hashes, to
+confirm every account has its own. Exit status is 1 when a budget is
+exceeded, the job fails or any hash is shared.
+
+``--kdf-workers`` sets ``KDF_POOL_WORKERS`` for the run (0 hashes in the
+job's thread).
+
+Usage:
+    python benchmarks/bench_user_import.py [--students 20000] [--kdf-workers 2] [--output import.json]
+    python benchmarks/bench_user_import.py --database-url postgresql+psycopg2://... --students 20000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+PROGRAMMES = ("Computer Engineering", "Electrical and Electronics Engineering", "Biomedical Engineering")
+
+
+def _configure_environment(args: argparse.Namespace, scratch: str) -> None:
+    """Settings are read at import time, so this runs before anything from ``app``."""
+    if not args.database_url:
+        args.database_url = f"sqlite:///{os.path.join(scratch, 'import.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["KDF_POOL_WORKERS"] = str(args.kdf_workers)
+
+
+def build_csv(students: int, run: str) -> bytes:
+    lines = ["email,user_id,full_name,role,level,programme"]
+    for i in range(students):
+        lines.append(
+            f"bench-{run}-{i}@st.knust.edu.gh,{90000000 + i:08d},Student {i},student,100,{PROGRAMMES[i % len(PROGRAMMES)]}"
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def run(args: argparse.Namespace) -> dict:
+    from sqlalchemy import func, insert
+
+    from app.db.base import Base, ImportJobStatus, User, UserRole
+    from app.db.session import SessionLocal, engine
+    from app.services.import_jobs import get_import_job, import_job_dict, run_import_job, start_import_job
+    from app.services.imports import read_rows
+    from app.services.password_hashing import kdf_pool
+    from app.services.programmes import ensure_programmes_seeded
+
+    Base.metadata.create_all(bind=engine)
+    run_id = uuid.uuid4().hex[:6]  # keeps repeated runs on one database apart
+    db = SessionLocal()
+    try:
+        ensure_programmes_seeded(db)
+        admin_id = db.execute(
+            insert(User).returning(User.id),
+            [{"email": f"bench-{run_id}-admin@knust.edu.gh", "hashed_password": "!", "full_name": "Bench Admin",
+              "role": UserRole.admin, "is_active": True}],
+        ).scalar_one()
+        db.commit()
+        admin = db.get(User, admin_id)
+        body = build_csv(args.students, run_id)
+
+        # 1. The request: parse, size-check and record the job
+        started = time.perf_counter()
+        rows = list(read_rows(io.BytesIO(body), "users.csv"))
+        job = start_import_job(db, "users", len(rows), admin)
+        request_seconds = time.perf_counter() - started
+        job_id = job.id
+    finally:
+        db.close()
+
+    # 2. The job, polled like the admin UI does
+    worker = threading.Thread(target=run_import_job, args=(engine, job_id, rows), daemon=True)
+    job_started = time.perf_counter()
+    worker.start()
+    polls = []
+    while worker.is_alive():
+        worker.join(args.poll_interval)
+        db = SessionLocal()
+        try:
+            status = import_job_dict(get_import_job(db, job_id))
+        finally:
+            db.close()
+        polls.append({"t": round(time.perf_counter() - job_started, 1), "status": status["status"],
+                      "hashed": status["passwords_hashed"]})
+    job_seconds = time.perf_counter() - job_started
+
+    db = SessionLocal()
+    try:
+        job = get_import_job(db, job_id)
+        result = import_job_dict(job)
+        # The writes start after the last heartbeat and commit just before finished_at
+        write_seconds = (
+            (job.finished_at - job.heartbeat_at).total_seconds() if job.finished_at and job.heartbeat_at else None
+        )
+        accounts, distinct_hashes = db.query(
+            func.count(User.id), func.count(func.distinct(User.hashed_password))
+        ).filter(User.email.like(f"bench-{run_id}-%@st.knust.edu.gh")).one()
+    finally:
+        db.close()
+        kdf_pool.shutdown()
+
+    hashed = result["passwords_hashed"]
+    # Validation is a few seconds at most; the rest before the writes is hashing
+    hashing_seconds = max(job_seconds - (write_seconds or 0), 0.0)
+    rate = hashed / hashing_seconds if hashing_seconds else None
+    report = {
+        "students": args.students,
+        "kdf_pool_workers": args.kdf_workers,
+        "request_seconds": round(request_seconds, 2),
+        "job": {
+            "status": result["status"],
+            "error": result["error"],
+            "seconds": round(job_seconds, 1),
+            "validate_and_hash_seconds": round(hashing_seconds, 1),
+            "write_transaction_seconds": None if write_seconds is None else round(write_seconds, 2),
+            "summary": {k: v for k, v in (result["summary"] or {}).items() if k not in ("errors", "errors_truncated")},
+        },
+        "hashes_per_second": None if rate is None else round(rate, 1),
+        "projected_hashing_seconds": {
+            f"{workers}_workers": round(args.students / (rate / max(args.kdf_workers, 1) * workers), 1)
+            for workers in (1, 2, 4, 8)
+        } if rate else None,
+        "accounts": accounts,
+        "distinct_password_hashes": distinct_hashes,
+        "polls": polls[-5:],
+    }
+    failures = []
+    if result["status"] != ImportJobStatus.done.value:
+        failures.append(f"job {result['status']}: {result['error']}")
+    if request_seconds > args.request_budget:
+        failures.append(f"request took {request_seconds:.1f}s (budget {args.request_budget}s)")
+    if write_seconds is None or write_seconds > args.transaction_budget:
+        failures.append(f"write transaction took {write_seconds}s (budget {args.transaction_budget}s)")
+    if accounts != args.students or distinct_hashes != accounts:
+        failures.append(f"{accounts} accounts with {distinct_hashes} distinct password hashes")
+    report["failures"] = failures
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="default: a scratch SQLite file")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--kdf-workers", type=int, default=0, help="KDF_POOL_WORKERS for the run")
+    parser.add_argument("--request-budget", type=float, default=10.0, help="seconds allowed for the request")
+    parser.add_argument("--transaction-budget", type=float, default=30.0, help="seconds allowed for the write phase")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        _configure_environment(args, scratch)
+        report = run(args)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if report["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Keep attendance_rollups current for the trend analytics endpoints.
+
+Every ATTENDANCE_ROLLUP_INTERVAL_SECONDS it folds records and sessions that
+changed since its watermark into the hourly/daily rollups. Run a single
+instance.
+
+Usage:
+    python scripts/attendance_rollup_worker.py            # run forever
+    python scripts/attendance_rollup_worker.py --once     # one pass, then exit
+    python scripts/attendance_rollup_worker.py --rebuild  # recompute everything, then exit
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+os.chdir(backend_dir)
+
+from app.core.config import Settings
+from app.db.session import SessionLocal
+from app.db.base import *  # Ensure all models are loaded for relationships
+from app.services.attendance_rollups import aggregate_rollups, rebuild_rollups
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+)
+logger = logging.getLogger("rollup_worker")
+
+
+def run_once(rebuild: bool = False) -> None:
+    db = SessionLocal()
+    try:
+        if rebuild:
+            rows = rebuild_rollups(db)
+            db.commit()
+            logger.info("Rebuilt %s attendance rollup rows", rows)
+        else:
+            hours = aggregate_rollups(db)
+            db.commit()
+            if hours:
+                logger.info("Recomputed %s hour buckets", hours)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="run one aggregation pass and exit")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every bucket and exit")
+    args = parser.parse_args()
+    if args.rebuild or args.once:
+        run_once(rebuild=args.rebuild)
+        return
+
+    interval = Settings().attendance_rollup_interval_seconds
+    logger.info("Attendance rollup worker started (interval=%ss)", interval)
+    while True:
+        try:
+            run_once()
+        except Exception:
+            logger.exception("Rollup pass failed")
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ os.chdir(backend_dir)
 
 from app.core.config import Settings
 from app.db.session import SessionLocal
+from app.services.attendance_summaries import install_summary_hooks
 from app.services.face_verification_jobs import process_one_job
 
 logging.basicConfig(
@@ -23,6 +24,8 @@ logger = logging.getLogger("face_worker")
 
 def main() -> None:
     settings = Settings()
+    # Job results change record status, which feeds the dashboard counters
+    install_summary_hooks()
     poll_seconds = settings.face_worker_poll_seconds
     logger.info(
         "Face verification worker started (poll=%ss, concurrency=1)",
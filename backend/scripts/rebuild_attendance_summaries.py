@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Recompute student_attendance_summaries from records, sessions and enrolments.
+
+The app keeps the table current on every write; run this after bulk SQL
+edits, restoring a backup, or if the dashboard counters ever look wrong.
+
+Usage:
+    python scripts/rebuild_attendance_summaries.py
+"""
+import os
+import sys
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend_dir)
+
+from app.db.session import SessionLocal
+from app.db.base import *  # Ensure all models are loaded for relationships
+from app.services.attendance_summaries import rebuild_all
+
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        rows = rebuild_all(db)
+        db.commit()
+        print(f"Rebuilt {rows} attendance summary rows.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
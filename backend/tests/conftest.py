@@ -1,7 +1,10 @@
 import os
 import sys
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 
@@ -59,11 +62,20 @@ def _set_env(tmp_path, monkeypatch):
     from app.db.deps import get_db
     from app.main import app
     from app.services.rate_limit import rate_limiter
+    from app.services.catalogue_cache import catalogue_cache
+    from app.services.school_settings import school_settings_cache
+    from app.services.programmes import programme_registry
+    from app.services.admin_dashboard import admin_dashboard_cache
 
     # Rate limiting off by default (tests hammer auth endpoints);
     # individual tests can re-enable it via monkeypatch.
     monkeypatch.setenv("RATE_LIMIT_ENABLED", "false")
     rate_limiter.reset()
+    # Each test gets a fresh database, so cached catalogue rows must not leak
+    catalogue_cache.invalidate()
+    school_settings_cache.invalidate()
+    programme_registry.invalidate()
+    admin_dashboard_cache.invalidate()
 
     db_path = str(tmp_path / "test.db")
     db_url = f"sqlite:///{db_path}"
@@ -96,6 +108,51 @@ def _set_env(tmp_path, monkeypatch):
     test_engine.dispose()
 
 
+@pytest.fixture(autouse=True)
+def _query_budget(monkeypatch):
+    """Fail any request that repeats one statement too often (N+1) or runs away."""
+    from app.db import instrumentation
+
+    monkeypatch.setattr(
+        instrumentation,
+        "query_budget",
+        instrumentation.QueryBudget(max_queries=100, repeat_threshold=10, mode="raise"),
+    )
+    yield
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture()
+def count_queries():
+    """Context manager recording every SQL statement executed inside it.
+
+    Usage: ``with count_queries() as q: client.get(...)`` then assert ``q.count``.
+    """
+
+    @contextmanager
+    def _count():
+        counter = _QueryCounter()
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            counter.statements.append(statement)
+
+        event.listen(Engine, "after_cursor_execute", _record)
+        try:
+            yield counter
+        finally:
+            event.remove(Engine, "after_cursor_execute", _record)
+
+    return _count
+
+
 @pytest.fixture()
 def client():
     from fastapi.testclient import TestClient
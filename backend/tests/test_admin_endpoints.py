@@ -110,3 +110,396 @@ def test_admin_flagged_list_set_status_and_analytics(client):
 
 
 
+
+
+def test_admin_flagged_queue_pages_filters_and_joins_latest_log(client):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_record import AttendanceRecord, AttendanceStatus
+    from app.models.attendance_session import AttendanceSession
+    from app.models.user import User, UserRole
+    from app.models.verification_log import VerificationLog
+
+    client.post("/api/v1/auth/register", json={
+        "email": "admin9@knust.edu.gh", "password": "pw123456", "full_name": "Admin", "role": "admin",
+    })
+    r = client.post("/api/v1/auth/login", data={"username": "admin9@knust.edu.gh", "password": "pw123456"})
+    admin_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    db = next(app.dependency_overrides[get_db]())
+    lecturer = User(email="l9@knust.edu.gh", hashed_password="x", role=UserRole.lecturer)
+    students = [User(email=f"s{i}@st.knust.edu.gh", hashed_password="x", role=UserRole.student) for i in range(3)]
+    db.add_all([lecturer, *students])
+    db.flush()
+    session = AttendanceSession(lecturer_id=lecturer.id, code="FLAG01")
+    db.add(session)
+    db.flush()
+    reasons = [["outside_geofence"], ["device_mismatch"], ["outside_geofence", "device_mismatch"]]
+    for student, flag_reasons in zip(students, reasons):
+        db.add(AttendanceRecord(
+            session_id=session.id, student_id=student.id, device_id_hash="h" * 64,
+            status=AttendanceStatus.flagged, flag_reasons=flag_reasons,
+        ))
+        for verified in (False, True):  # the newest log (verified) must win
+            db.add(VerificationLog(user_id=student.id, session_id=session.id, verified=verified, distance=0.5))
+    db.commit()
+    student_ids, lecturer_id = [s.id for s in students], lecturer.id
+    db.close()
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/v1/admin/flagged", headers=admin_headers, params=params)
+        assert r.status_code == 200, r.text
+        assert r.headers["X-Total-Count-Estimate"] == "3"
+        pages.append(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [len(p) for p in pages] == [2, 1]
+    items = [item for page in pages for item in page]
+    assert [item["student_id"] for item in items] == student_ids[::-1]
+    assert all(item["face_verified"] is True for item in items)
+    assert all(item["lecturer_id"] == lecturer_id for item in items)
+
+    r = client.get("/api/v1/admin/flagged", headers=admin_headers, params={"flag_reason": "outside_geofence"})
+    assert r.headers["X-Total-Count-Estimate"] == "2"
+    assert sorted(item["student_id"] for item in r.json()) == [student_ids[0], student_ids[2]]
+    r = client.get("/api/v1/admin/flagged", headers=admin_headers, params={"lecturer_id": lecturer_id + 100})
+    assert r.json() == []
+
+
+def test_admin_lists_page_by_cursor_with_offset_fallback(client):
+    from app.services.pagination import encode_cursor
+
+    client.post("/api/v1/auth/register", json={
+        "email": "admin8@knust.edu.gh", "password": "pw123456", "full_name": "Admin", "role": "admin",
+    })
+    r = client.post("/api/v1/auth/login", data={"username": "admin8@knust.edu.gh", "password": "pw123456"})
+    admin_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    for i in range(4):
+        r = client.post("/api/v1/auth/register", json={
+            "email": f"lect{i}@knust.edu.gh", "password": "pw123456", "full_name": f"Lect {i}",
+            "role": "lecturer", "user_id": f"100000{i}",
+        })
+        assert r.status_code == 200, r.text
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/v1/admin/users", headers=admin_headers, params=params)
+        assert r.status_code == 200, r.text
+        assert r.headers["X-Total-Count-Estimate"] == "5"
+        seen += [u["email"] for u in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [f"lect{i}@knust.edu.gh" for i in reversed(range(4))] + ["admin8@knust.edu.gh"]
+
+    r = client.get("/api/v1/admin/users", headers=admin_headers, params={"limit": 2, "offset": 2})
+    assert [u["email"] for u in r.json()] == seen[2:4]
+    r = client.get("/api/v1/admin/users", headers=admin_headers, params={"role": "lecturer", "limit": 10})
+    assert len(r.json()) == 4 and "X-Next-Cursor" not in r.headers
+    assert client.get("/api/v1/admin/users", headers=admin_headers, params={"cursor": "bogus"}).status_code == 400
+    for bad_id in ("7", 7.5, None, True):
+        bad = encode_cursor(created_at=None, id=bad_id)
+        r = client.get("/api/v1/admin/users", headers=admin_headers, params={"cursor": bad})
+        assert r.status_code == 400, r.text
+
+    for url in ("/api/v1/admin/sessions", "/api/v1/admin/courses"):
+        r = client.get(url, headers=admin_headers, params={"limit": 1})
+        assert r.status_code == 200, r.text
+        assert r.headers["X-Total-Count-Estimate"] == "0"
+
+
+def test_admin_dashboard_is_served_from_snapshot_and_folds_in_deltas(client, count_queries):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.user import User, UserRole
+    from app.services.admin_dashboard import admin_dashboard_cache
+
+    client.post("/api/v1/auth/register", json={
+        "email": "admin7@knust.edu.gh", "password": "pw123456", "full_name": "Admin", "role": "admin",
+    })
+    r = client.post("/api/v1/auth/login", data={"username": "admin7@knust.edu.gh", "password": "pw123456"})
+    admin_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = client.get("/api/v1/admin/dashboard", headers=admin_headers)
+    assert r.status_code == 200, r.text
+    first = r.json()
+    assert first["overview"]["total_users"] == 1 and first["generated_at"]
+
+    # Second load comes from memory: no aggregates over the big tables
+    with count_queries() as q:
+        r = client.get("/api/v1/admin/dashboard", headers=admin_headers)
+    assert r.json()["generated_at"] == first["generated_at"]
+    assert not [s for s in q.statements if "count(" in s.lower()]
+
+    db = next(app.dependency_overrides[get_db]())
+    db.add(User(email="s7@st.knust.edu.gh", hashed_password="x", role=UserRole.student))
+    db.commit()
+    snapshot = admin_dashboard_cache.refresh(db)
+    assert snapshot.dashboard()["overview"]["total_students"] == 1
+    assert snapshot.dashboard()["overview"]["total_users"] == 2
+
+    r = client.get("/api/v1/admin/analytics", headers=admin_headers)
+    assert r.json()["total_users"] == 2
+    db.close()
+
+
+def test_admin_dashboard_deltas_recount_recent_rows_and_see_status_changes(client):
+    from datetime import timedelta
+
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_record import AttendanceRecord, AttendanceStatus
+    from app.models.attendance_session import AttendanceSession
+    from app.models.user import User, UserRole
+    from app.services.admin_dashboard import DELTA_OVERLAP, admin_dashboard_cache
+    from app.services.utils import utcnow
+
+    db = next(app.dependency_overrides[get_db]())
+    old = utcnow() - DELTA_OVERLAP - timedelta(minutes=1)
+    lecturer = User(email="l9@knust.edu.gh", hashed_password="x", role=UserRole.lecturer, created_at=old)
+    students = [
+        User(email=f"s9{i}@st.knust.edu.gh", hashed_password="x", role=UserRole.student, created_at=old)
+        for i in range(3)
+    ]
+    db.add_all([lecturer, *students])
+    db.flush()
+    session = AttendanceSession(lecturer_id=lecturer.id, code="DASH01", created_at=old)
+    db.add(session)
+    db.flush()
+    settled = AttendanceRecord(
+        session_id=session.id, student_id=students[0].id, device_id_hash="h",
+        status=AttendanceStatus.flagged, created_at=old,
+    )
+    recent = AttendanceRecord(
+        session_id=session.id, student_id=students[1].id, device_id_hash="h",
+        status=AttendanceStatus.pending_verification,
+    )
+    db.add_all([settled, recent])
+    db.commit()
+
+    snapshot = admin_dashboard_cache.refresh(db, full=True)
+    assert snapshot.status_counts == {"flagged": 1, "pending_verification": 1}
+    assert snapshot.settled_ids.record_id == settled.id
+
+    # A recent record's status change is picked up by the delta's re-count
+    recent.status = AttendanceStatus.confirmed
+    db.commit()
+    delta = admin_dashboard_cache.refresh(db)
+    assert delta.full_refreshed_at == snapshot.full_refreshed_at
+    assert delta.status_counts == {"flagged": 1, "confirmed": 1}
+
+    # Reviewing a settled flagged record forces a full refresh
+    settled.status = AttendanceStatus.confirmed
+    db.commit()
+    refreshed = admin_dashboard_cache.refresh(db)
+    assert refreshed.full_refreshed_at > delta.full_refreshed_at
+    assert refreshed.dashboard()["overview"]["flagged_attendance"] == 0
+    assert refreshed.status_counts == {"confirmed": 2}
+    assert refreshed.dashboard()["overview"]["total_users"] == 4
+    db.close()
+
+
+def test_admin_imports_users_courses_and_enrollments_from_csv(client):
+    import csv
+    import io
+    import json
+
+    client.post("/api/v1/auth/register", json={
+        "email": "admin6@knust.edu.gh", "password": "pw123456", "full_name": "Admin", "role": "admin",
+    })
+    r = client.post("/api/v1/auth/login", data={"username": "admin6@knust.edu.gh", "password": "pw123456"})
+    admin_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    def upload(kind, body, **params):
+        return client.post(
+            f"/api/v1/admin/imports/{kind}", headers=admin_headers, params=params,
+            files={"file": (f"{kind}.csv", body.encode(), "text/csv")},
+        )
+
+    def import_users(body):
+        # Runs as a background job; the test client finishes it before returning
+        r = upload("users", body)
+        assert r.status_code == 202, r.text
+        r = client.get(f"/api/v1/admin/imports/jobs/{r.json()['id']}", headers=admin_headers)
+        assert r.status_code == 200, r.text
+        assert r.json()["status"] == "done", r.json()
+        return r.json()
+
+    users = (
+        "Email,User ID,Full Name,Role,Level,Programme\n"
+        "ama@st.knust.edu.gh,20991001,Ama Mensah,student,200,Computer Engineering\n"
+        "kofi@st.knust.edu.gh,20991002,Kofi Boateng,student,200,Computer Engineering\n"
+        "lect@knust.edu.gh,1234567,Dr Owusu,lecturer,,\n"
+        "bad@gmail.com,20991003,Bad Email,student,200,Computer Engineering\n"
+        "yaw@st.knust.edu.gh,20991004,Yaw,student,200,Basket Weaving\n"
+        "ama2@st.knust.edu.gh,20991001,Ama Again,student,200,Computer Engineering\n"
+    )
+    r = upload("users", users, dry_run=True)
+    assert r.status_code == 200, r.text
+    assert (r.json()["created"], r.json()["failed"], r.json()["credentials"]) == (3, 3, [])
+    assert client.get("/api/v1/admin/users", headers=admin_headers).headers["X-Total-Count-Estimate"] == "1"
+
+    job = import_users(users)
+    body = job["summary"]
+    assert (body["rows"], body["created"], body["failed"]) == (6, 3, 3)
+    assert [(e["row"], e["field"]) for e in body["errors"]] == [(5, "email"), (6, "programme"), (7, "user_id")]
+    assert (job["passwords_total"], job["passwords_hashed"]) == (3, 3)
+    job_url = f"/api/v1/admin/imports/jobs/{job['id']}"
+    r = client.get(job_url, headers=admin_headers, params={"format": "csv"})
+    assert [row[:2] for row in csv.reader(io.StringIO(r.text))][1:] == [["5", "email"], ["6", "programme"], ["7", "user_id"]]
+    # Every new account gets its own initial password, downloadable once
+    assert job["credentials_available"]
+    r = client.get(job_url, headers=admin_headers, params={"format": "credentials"})
+    assert r.status_code == 200 and r.headers["Cache-Control"] == "no-store"
+    assert json.loads(r.headers["X-Import-Summary"])["created"] == 3
+    passwords = {row[2]: row[4] for row in list(csv.reader(io.StringIO(r.text)))[1:]}
+    assert sorted(passwords) == ["1234567", "20991001", "20991002"]
+    assert len(set(passwords.values())) == 3
+    r = client.post("/api/v1/auth/login", data={"username": "20991001", "password": passwords["20991001"]})
+    assert r.status_code == 200, r.text
+    r = client.post("/api/v1/auth/login", data={"username": "20991002", "password": passwords["20991001"]})
+    assert r.status_code == 401
+
+    assert client.get(job_url, headers=admin_headers, params={"format": "credentials"}).status_code == 410
+    assert client.get(job_url, headers=admin_headers).json()["credentials_available"] is False
+
+    # Re-import updates in place and keeps the password
+    job = import_users("email,user_id,full_name,role,level,programme\n"
+                       "ama@st.knust.edu.gh,20991001,Ama K. Mensah,student,200,Computer Engineering\n")
+    assert (job["summary"]["created"], job["summary"]["updated"], job["credentials_available"]) == (0, 1, False)
+    r = client.post("/api/v1/auth/login", data={"username": "20991001", "password": passwords["20991001"]})
+    assert r.status_code == 200
+
+    # A password column is used as given
+    job = import_users("email,user_id,full_name,role,level,programme,password\n"
+                       "esi@st.knust.edu.gh,20991005,Esi,student,200,Computer Engineering,\n"
+                       "kwame@st.knust.edu.gh,20991006,Kwame,student,200,Computer Engineering,Chosen123\n")
+    assert job["summary"]["created"] == 2
+    r = client.get(f"/api/v1/admin/imports/jobs/{job['id']}", headers=admin_headers, params={"format": "credentials"})
+    [header, esi] = list(csv.reader(io.StringIO(r.text)))
+    assert header == ["row", "email", "user_id", "full_name", "initial_password"]
+    assert esi[:4] == ["2", "esi@st.knust.edu.gh", "20991005", "Esi"]
+    assert client.post("/api/v1/auth/login", data={"username": "20991005", "password": esi[4]}).status_code == 200
+    assert client.post("/api/v1/auth/login", data={"username": "20991006", "password": "Chosen123"}).status_code == 200
+
+    r = upload("courses", "code,name,semester,level,programmes\n"
+                          "CE201,Circuits,1st Semester,200,Computer Engineering;Electrical and Electronics Engineering\n"
+                          "CE999,Broken,1st Semester,250,\n")
+    assert (r.json()["created"], r.json()["failed"]) == (1, 1)
+    r = upload("course-lecturers", "course_code,lecturer\nCE201,lect@knust.edu.gh\nCE201,ama@st.knust.edu.gh\n")
+    assert (r.json()["created"], r.json()["failed"]) == (1, 1)
+
+    enrollments = "course_code,student\nCE201,20991001\nCE201,kofi@st.knust.edu.gh\nCE201,20991001\nXX100,20991002\n"
+    r = upload("enrollments", enrollments, format="csv")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    assert json.loads(r.headers["X-Import-Summary"])["created"] == 2
+    assert r.text.splitlines() == ["row,field,value,error", "5,course_code,XX100,Course not found"]
+
+    r = client.post("/api/v1/auth/login", data={"username": "lect@knust.edu.gh", "password": passwords["1234567"]})
+    lect_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    [course] = client.get("/api/v1/lecturer/courses", headers=lect_headers).json()
+    assert course["code"] == "CE201"
+    details = client.get(f"/api/v1/lecturer/courses/{course['id']}", headers=lect_headers).json()
+    assert details["enrolled_count"] == 2
+    assert upload("teachers", "x\n").status_code == 422
+
+
+def test_user_import_job_whose_worker_died_is_reported_failed(client):
+    from datetime import timedelta
+
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.import_job import ImportJob, ImportJobStatus
+    from app.services.utils import utcnow
+
+    client.post("/api/v1/auth/register", json={
+        "email": "admin7@knust.edu.gh", "password": "pw123456", "full_name": "Admin", "role": "admin",
+    })
+    r = client.post("/api/v1/auth/login", data={"username": "admin7@knust.edu.gh", "password": "pw123456"})
+    admin_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    db = next(app.dependency_overrides[get_db]())
+    job = ImportJob(kind="users", status=ImportJobStatus.running, rows=20000, passwords_total=18000,
+                    passwords_hashed=4000, heartbeat_at=utcnow() - timedelta(minutes=10))
+    db.add(job)
+    db.commit()
+    job_url = f"/api/v1/admin/imports/jobs/{job.id}"
+    db.close()
+
+    body = client.get(job_url, headers=admin_headers).json()
+    assert body["status"] == "failed"
+    assert "upload the file again" in body["error"]
+    assert client.get(job_url, headers=admin_headers, params={"format": "credentials"}).status_code == 409
+    assert client.get("/api/v1/admin/imports/jobs/999999", headers=admin_headers).status_code == 404
+
+
+def test_semester_close_runs_as_resumable_job(client, monkeypatch):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_session import AttendanceSession
+    from app.models.course import Course
+    from app.models.school_settings import get_or_create_settings
+    from app.models.student_course_enrollment import StudentCourseEnrollment
+    from app.models.user import User, UserRole
+    from app.services import semester_close
+
+    client.post("/api/v1/auth/register", json={
+        "email": "admin5@knust.edu.gh", "password": "pw123456", "full_name": "Admin", "role": "admin",
+    })
+    r = client.post("/api/v1/auth/login", data={"username": "admin5@knust.edu.gh", "password": "pw123456"})
+    admin_headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    db = next(app.dependency_overrides[get_db]())
+    settings = get_or_create_settings(db)
+    settings.current_semester, settings.academic_year = "2nd Semester", "2024/2025"
+    lecturer = User(email="l5@knust.edu.gh", hashed_password="x", role=UserRole.lecturer)
+    students = [
+        User(email=f"s{level}@st.knust.edu.gh", hashed_password="x", role=UserRole.student, level=level)
+        for level in (100, 300, 400)
+    ]
+    second, first = Course(code="CE202", name="Signals", semester="2nd Semester"), Course(code="CE101", name="Intro", semester="1st Semester")
+    db.add_all([lecturer, *students, second, first])
+    db.flush()
+    db.add_all([StudentCourseEnrollment(student_id=s.id, course_id=second.id) for s in students])
+    db.add(StudentCourseEnrollment(student_id=students[0].id, course_id=first.id))
+    db.add(AttendanceSession(lecturer_id=lecturer.id, course_id=second.id, code="ABC123", is_active=True))
+    db.commit()
+
+    # Small chunks, and the last step fails the first time round
+    monkeypatch.setattr(semester_close, "CLOSE_CHUNK_ROWS", 1)
+    advance = semester_close._STEPS["settings"]
+
+    def crash(db, job):
+        raise RuntimeError("worker died")
+
+    monkeypatch.setitem(semester_close._STEPS, "settings", crash)
+    r = client.post("/api/v1/admin/semester/close", headers=admin_headers)
+    assert r.status_code == 202, r.text
+    job_id = r.json()["id"]
+    job = client.get(f"/api/v1/admin/semester/close/jobs/{job_id}", headers=admin_headers).json()
+    assert (job["status"], job["step"], job["error"]) == ("failed", "settings", "worker died")
+    assert (job["sessions_closed"], job["enrollments_total"], job["students_unenrolled"], job["levels_updated"]) == (1, 3, 3, 2)
+    r = client.get("/api/v1/admin/school-settings", headers=admin_headers).json()
+    assert (r["current_semester"], r["is_on_break"], r["enrollment_open"]) == ("2nd Semester", True, False)
+
+    # Asking again resumes the same job without repeating finished steps
+    monkeypatch.setitem(semester_close._STEPS, "settings", advance)
+    r = client.post("/api/v1/admin/semester/close", headers=admin_headers)
+    assert r.status_code == 202 and r.json()["id"] == job_id
+    job = client.get(f"/api/v1/admin/semester/close/jobs/{job_id}", headers=admin_headers).json()
+    assert (job["status"], job["levels_updated"], job["next_academic_year"]) == ("done", 2, "2025/2026")
+
+    db.expire_all()
+    assert [db.get(User, s.id).level for s in students] == [200, 400, 400]
+    assert db.query(StudentCourseEnrollment.course_id).all() == [(first.id,)]
+    # The closed semester's session moved to the archive
+    assert db.query(AttendanceSession.id).count() == 0
+    assert (job["sessions_archived"], job["records_archived"]) == (1, 0)
+    r = client.get("/api/v1/admin/school-settings", headers=admin_headers).json()
+    assert (r["current_semester"], r["academic_year"]) == ("1st Semester", "2025/2026")
+    assert client.get("/api/v1/admin/semester/close/jobs/999", headers=admin_headers).status_code == 404
+    db.close()
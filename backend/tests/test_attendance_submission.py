@@ -168,3 +168,568 @@ def test_not_enrolled_rejected(client):
     r = _submit(client, outsider, session_id, nonce)
     assert r.status_code == 403
     assert "not enrolled" in r.json()["detail"].lower()
+
+
+def _dashboard(client, student):
+    r = client.get("/api/v1/student/dashboard", headers=student)
+    assert r.status_code == 200, r.text
+    body = r.json()
+    return body["total_sessions"], body["attendance_marked_count"], body["confirmed_count"]
+
+
+def test_dashboard_counters_follow_submissions_and_reviews(client, count_queries):
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    assert _dashboard(client, student) == (1, 0, 0)  # session exists, not yet marked
+
+    # Outside the geofence -> flagged: counted in the total, not as marked
+    r = _submit(client, student, session_id, nonce, lat=CLASS_LAT + 0.05, lng=CLASS_LNG)
+    assert r.json()["status"] == "flagged"
+    record_id = r.json()["record_id"]
+    assert _dashboard(client, student) == (1, 0, 0)
+
+    assert client.post(f"/api/v1/lecturer/attendance/{record_id}/confirm", headers=lecturer).status_code == 200
+    assert _dashboard(client, student) == (1, 1, 1)
+
+    r = client.post("/api/v1/lecturer/sessions", headers=lecturer, json={"course_id": course_id, "duration_minutes": 10})
+    assert r.status_code == 200, r.text
+    assert _dashboard(client, student) == (2, 1, 1)
+
+    with count_queries() as q:
+        _dashboard(client, student)
+    dashboard_reads = [s for s in q.statements if "student_attendance_summaries" in s]
+    assert len(dashboard_reads) == 1
+
+
+def test_rebuild_matches_incrementally_maintained_rows(client):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.student_attendance_summary import StudentAttendanceSummary
+    from app.services.attendance_summaries import rebuild_all
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    assert _submit(client, student, session_id, nonce).status_code == 200
+    client.post("/api/v1/lecturer/sessions", headers=lecturer, json={"course_id": course_id, "duration_minutes": 10})
+
+    db = next(app.dependency_overrides[get_db]())
+    columns = ("student_id", "course_id", "confirmed_count", "flagged_count",
+               "pending_count", "absent_count", "unmarked_count")
+    snapshot = lambda: sorted(tuple(getattr(row, c) for c in columns) for row in db.query(StudentAttendanceSummary))
+    maintained = snapshot()
+    assert rebuild_all(db) == 1
+    db.commit()
+    assert snapshot() == maintained
+    assert maintained[0][2:] == (1, 0, 0, 0, 1)
+    db.close()
+
+
+def test_history_pages_with_cursor_and_merges_absences(client):
+    from datetime import timedelta
+
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_session import AttendanceSession
+    from app.services.utils import utcnow
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    assert _submit(client, student, session_id, nonce).status_code == 200
+    ended_ids = []
+    for _ in range(2):
+        r = client.post("/api/v1/lecturer/sessions", headers=lecturer, json={"course_id": course_id, "duration_minutes": 10})
+        ended_ids.append(r.json()["id"])
+
+    # End the two unattended sessions in the past so they show as absences
+    db = next(app.dependency_overrides[get_db]())
+    for minutes_ago, sid in zip((30, 60), ended_ids):
+        db.get(AttendanceSession, sid).ends_at = utcnow() - timedelta(minutes=minutes_ago)
+    db.commit()
+    db.close()
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 1, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/v1/student/attendance/history", headers=student, params=params)
+        assert r.status_code == 200, r.text
+        pages.append(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    rows = [row for page in pages for row in page]
+    assert [len(p) for p in pages] == [1, 1, 1]
+    assert [(row["session_id"], row["status"]) for row in rows] == [
+        (session_id, "confirmed"), (ended_ids[0], "absent"), (ended_ids[1], "absent"),
+    ]
+
+    r = client.get(
+        "/api/v1/student/attendance/history", headers=student,
+        params={"date_to": (utcnow() - timedelta(minutes=45)).isoformat()},
+    )
+    assert [row["session_id"] for row in r.json()] == [ended_ids[1]]
+    assert client.get("/api/v1/student/attendance/history", headers=student, params={"cursor": "!!"}).status_code == 400
+
+
+def test_absent_list_and_course_counts_use_anti_joins(client, count_queries):
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    assert _submit(client, student, session_id, nonce).status_code == 200
+    for n in range(2):
+        other = _register_and_login(
+            client, f"absent{n}@st.knust.edu.gh", "student",
+            user_id=f"2099010{n}", level=200, programme="Computer Engineering",
+        )
+        assert client.post(f"/api/v1/student/courses/{course_id}/enroll", headers=other).status_code == 200
+
+    with count_queries() as q:
+        r = client.get(f"/api/v1/lecturer/sessions/{session_id}/absent", headers=lecturer)
+    assert r.status_code == 200, r.text
+    assert sorted(s["email"] for s in r.json()) == ["absent0@st.knust.edu.gh", "absent1@st.knust.edu.gh"]
+    record_reads = [s for s in q.statements if "attendance_records" in s]
+    assert len(record_reads) == 1 and "NOT (EXISTS" in record_reads[0]
+
+    r = client.get(f"/api/v1/lecturer/courses/{course_id}", headers=lecturer)
+    assert r.status_code == 200, r.text
+    assert r.json()["recent_sessions"][0]["absent_count"] == 2
+
+
+def test_session_analytics_etag_tracks_record_changes(client):
+    _, session_id, nonce, lecturer, student = _setup(client)
+    r = _submit(client, student, session_id, nonce, lat=CLASS_LAT + 0.05, lng=CLASS_LNG)
+    record_id = r.json()["record_id"]
+    url = f"/api/v1/lecturer/sessions/{session_id}/analytics"
+
+    r = client.get(url, headers=lecturer)
+    assert r.status_code == 200, r.text
+    assert r.json()["analytics"]["flagged_count"] == 1
+    assert len(r.json()["recent_attendance"]) == 1
+    etag = r.headers["ETag"]
+    assert client.get(url, headers={**lecturer, "If-None-Match": etag}).status_code == 304
+
+    assert client.post(f"/api/v1/lecturer/attendance/{record_id}/confirm", headers=lecturer).status_code == 200
+    r = client.get(url, headers={**lecturer, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()["analytics"]["present_count"] == 1
+    assert r.json()["analytics"]["flagged_count"] == 0
+
+
+@pytest.mark.parametrize("who, url", [
+    ("student", "/api/v1/student/sessions/active"),
+    ("student", "/api/v1/student/dashboard"),
+    ("lecturer", "/api/v1/lecturer/sessions"),
+    ("lecturer", "/api/v1/lecturer/sessions/{session_id}/attendance"),
+])
+def test_polled_endpoints_answer_304_until_attendance_changes(client, count_queries, who, url):
+    _, session_id, nonce, lecturer, student = _setup(client)
+    headers = {"student": student, "lecturer": lecturer}[who]
+    url = url.format(session_id=session_id)
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200, first.text
+    assert "X-Server-Time" in first.headers
+    etag = first.headers["ETag"]
+
+    with count_queries() as q:
+        again = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert not any(s.startswith("INSERT INTO audit_logs") for s in q.statements)
+
+    assert _submit(client, student, session_id, nonce).status_code == 200
+    changed = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_lecturer_session_list_loads_sessions_once(client, count_queries):
+    from datetime import timedelta
+
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_session import AttendanceSession
+    from app.services.utils import utcnow
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    for _ in range(2):
+        r = client.post("/api/v1/lecturer/sessions", headers=lecturer, json={"course_id": course_id, "duration_minutes": 10})
+        assert r.status_code == 200, r.text
+    # A session past its end but still flagged active is deactivated by the list
+    db = next(app.dependency_overrides[get_db]())
+    db.get(AttendanceSession, session_id).ends_at = utcnow() - timedelta(minutes=5)
+    db.commit()
+    db.close()
+
+    with count_queries() as q:
+        r = client.get("/api/v1/lecturer/sessions", headers=lecturer)
+    assert r.status_code == 200, r.text
+    assert len(r.json()) == 3
+    assert [s["is_active"] for s in r.json() if s["id"] == session_id] == [False]
+    session_loads = [s for s in q.statements if s.startswith("SELECT attendance_sessions.")]
+    assert len(session_loads) == 1
+
+    db = next(app.dependency_overrides[get_db]())
+    assert db.get(AttendanceSession, session_id).is_active is False
+    db.close()
+
+
+def test_csv_exports_include_absent_students(client):
+    import csv
+    import io
+    from datetime import timedelta
+
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_session import AttendanceSession
+    from app.services.utils import utcnow
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    assert _submit(client, student, session_id, nonce).status_code == 200
+    other = _register_and_login(
+        client, "missing@st.knust.edu.gh", "student",
+        user_id="20990200", level=200, programme="Computer Engineering",
+    )
+    assert client.post(f"/api/v1/student/courses/{course_id}/enroll", headers=other).status_code == 200
+    r = client.post("/api/v1/auth/login", data={"username": "admin@knust.edu.gh", "password": "pw123456"})
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    exports = [
+        (lecturer, f"/api/v1/lecturer/sessions/{session_id}/export"),
+        (lecturer, f"/api/v1/lecturer/courses/{course_id}/export"),
+        (admin, "/api/v1/admin/exports/attendance"),
+    ]
+
+    # Nobody is absent while the session is still open
+    for headers, url in exports:
+        r = client.get(url, headers=headers)
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert [(row["student_id"], row["status"]) for row in rows] == [("20990001", "confirmed")]
+
+    db = next(app.dependency_overrides[get_db]())
+    db.get(AttendanceSession, session_id).ends_at = utcnow() - timedelta(minutes=1)
+    db.commit()
+    db.close()
+
+    for headers, url in exports:
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200, r.text
+        assert r.headers["content-type"].startswith("text/csv")
+        assert "attachment" in r.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert sorted((row["student_id"], row["status"]) for row in rows) == [
+            ("20990001", "confirmed"), ("20990200", "absent"),
+        ]
+        assert {row["course_code"] for row in rows} == {"CE200"}
+
+    r = client.get(f"/api/v1/lecturer/sessions/{session_id}/export", headers=other)
+    assert r.status_code == 403
+    r = client.get(f"/api/v1/lecturer/sessions/{session_id}/export", headers=lecturer, params={"format": "xml"})
+    assert r.status_code == 422
+
+
+def test_parquet_export_streams_one_row_group_per_batch():
+    import io
+
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    from app.services.exports import EXPORT_COLUMNS, _parquet_chunks
+
+    def row(session_id, student_id):
+        item = {name: None for name in EXPORT_COLUMNS}
+        item.update(session_id=session_id, student_id=student_id, status="absent")
+        return item
+
+    batches = [[row(1, "20990001"), row(1, "20990002")], [row(2, "20990001")]]
+    chunks = list(_parquet_chunks(iter(batches)))
+    # Header and first row group go out before the second batch is read; the footer last
+    assert len(chunks) == 3 and chunks[0].startswith(b"PAR1") and chunks[-1].endswith(b"PAR1")
+    table = pq.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.schema.field("session_id").type == pa.int64()
+    assert pq.ParquetFile(io.BytesIO(b"".join(chunks))).num_row_groups == 2
+    assert [(r["session_id"], r["student_id"]) for r in table.to_pylist()] == [
+        (1, "20990001"), (1, "20990002"), (2, "20990001"),
+    ]
+
+
+def test_rollups_aggregate_from_watermark_and_serve_trends(client):
+    from datetime import timedelta
+
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_session import AttendanceSession
+    from app.services.attendance_rollups import aggregate_rollups
+    from app.services.utils import utcnow
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    record_id = _submit(client, student, session_id, nonce).json()["record_id"]
+    other = _register_and_login(
+        client, "rollup@st.knust.edu.gh", "student",
+        user_id="20990099", level=200, programme="Computer Engineering",
+    )
+    assert client.post(f"/api/v1/student/courses/{course_id}/enroll", headers=other).status_code == 200
+    r = client.post("/api/v1/lecturer/sessions", headers=lecturer, json={"course_id": course_id, "duration_minutes": 10})
+    empty_id = r.json()["id"]
+
+    db = next(app.dependency_overrides[get_db]())
+    for sid in (session_id, empty_id):
+        db.get(AttendanceSession, sid).ends_at = utcnow() - timedelta(minutes=1)
+    db.commit()
+    assert aggregate_rollups(db) >= 1
+    db.commit()
+
+    url = f"/api/v1/lecturer/courses/{course_id}/trends"
+    r = client.get(url, headers=lecturer)
+    assert r.status_code == 200, r.text
+    [day] = r.json()
+    # One confirmed; one no-show in the first session, two in the second
+    assert (day["confirmed"], day["absent"], day["total"], day["attendance_rate"]) == (1, 3, 4, 25.0)
+
+    # A later status change is folded in from the watermark
+    assert client.post(f"/api/v1/lecturer/attendance/{record_id}/reject", headers=lecturer).status_code == 200
+    assert aggregate_rollups(db) >= 1
+    db.commit()
+    [day] = client.get(url, headers=lecturer).json()
+    assert (day["confirmed"], day["absent"]) == (0, 4)
+
+    heatmap = client.get(f"/api/v1/lecturer/courses/{course_id}/heatmap", headers=lecturer).json()
+    assert sum(cell["total"] for cell in heatmap) == 4
+    [course] = client.get("/api/v1/lecturer/analytics/week-over-week", headers=lecturer).json()
+    assert course["course_code"] == "CE200" and course["this_week"]["total"] == 4
+    assert course["last_week"]["total"] == 0
+    assert client.get(url, headers=student).status_code == 403
+    db.close()
+
+
+def test_new_session_only_counts_against_students_in_scope(client, count_queries):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.student_attendance_summary import StudentAttendanceSummary
+    from app.services.attendance_summaries import rebuild_all
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    r = client.post("/api/v1/auth/login", data={"username": "admin@knust.edu.gh", "password": "pw123456"})
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.put(f"/api/v1/admin/courses/{course_id}", headers=admin, json={
+        "programmes": ["Computer Engineering", "Telecommunications Engineering"],
+    }).status_code == 200
+    telecom = _register_and_login(
+        client, "tele@st.knust.edu.gh", "student",
+        user_id="20990002", level=200, programme="Telecommunications Engineering",
+    )
+    assert client.post(f"/api/v1/student/courses/{course_id}/enroll", headers=telecom).status_code == 200
+
+    with count_queries() as q:
+        r = client.post("/api/v1/lecturer/sessions", headers=lecturer, json={
+            "course_id": course_id, "duration_minutes": 10, "programme": "Computer Engineering",
+        })
+    assert r.status_code == 200, r.text
+    summary_writes = [s for s in q.statements if "student_attendance_summaries" in s]
+    assert len(summary_writes) == 1 and summary_writes[0].startswith("UPDATE")
+
+    db = next(app.dependency_overrides[get_db]())
+    columns = ("student_id", "course_id", "unmarked_count")
+    snapshot = lambda: sorted(tuple(getattr(row, c) for c in columns) for row in db.query(StudentAttendanceSummary))
+    maintained = snapshot()
+    rebuild_all(db)
+    db.commit()
+    assert snapshot() == maintained
+    # Computer Engineering student: both sessions; Telecom student: only the first
+    assert [row[2] for row in maintained] == [2, 1]
+    db.close()
+
+
+def test_bulk_manual_mark_and_status_report_per_item(client, count_queries):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.student_attendance_summary import StudentAttendanceSummary
+    from app.services.attendance_summaries import rebuild_all
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    assert _submit(client, student, session_id, nonce).status_code == 200
+    student_id = client.get("/api/v1/auth/me", headers=student).json()["id"]
+    r = client.post("/api/v1/auth/login", data={"username": "admin@knust.edu.gh", "password": "pw123456"})
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    others = []
+    for n in range(3):
+        headers = _register_and_login(
+            client, f"bulk{n}@st.knust.edu.gh", "student",
+            user_id=f"2099020{n}", level=200, programme="Computer Engineering",
+        )
+        assert client.post(f"/api/v1/student/courses/{course_id}/enroll", headers=headers).status_code == 200
+        others.append(client.get("/api/v1/auth/me", headers=headers).json()["id"])
+
+    items = [{"session_id": session_id, "student_id": sid} for sid in others] + [
+        {"session_id": session_id, "student_id": student_id},
+        {"session_id": session_id, "student_id": 99999},
+        {"session_id": session_id, "student_id": others[0], "status": "present"},
+        {"session_id": session_id, "student_id": others[0]},
+    ]
+    with count_queries() as q:
+        r = client.post("/api/v1/admin/attendance/bulk-manual-mark", headers=admin, json={"items": items, "reason": "QR down"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["created"], body["failed"]) == (3, 4)
+    assert [res.get("error") for res in body["results"]] == [
+        None, None, None,
+        "Attendance already marked for this student",
+        "Student not found",
+        "Invalid status",
+        "Attendance already marked for this student",
+    ]
+    assert len([s for s in q.statements if s.startswith("INSERT INTO attendance_records")]) == 1
+    record_ids = [res["record_id"] for res in body["results"][:3]]
+
+    r = client.post("/api/v1/lecturer/attendance/bulk-status", headers=lecturer,
+                    json={"record_ids": record_ids + [99999], "status": "absent"})
+    assert r.status_code == 200, r.text
+    assert (r.json()["updated"], r.json()["failed"]) == (3, 1)
+    assert client.post("/api/v1/lecturer/attendance/bulk-status", headers=lecturer,
+                       json={"record_ids": record_ids, "status": "flagged"}).status_code == 400
+    r = client.get(f"/api/v1/lecturer/sessions/{session_id}/attendance", headers=lecturer)
+    assert sorted(row["status"] for row in r.json()) == ["absent", "absent", "absent", "confirmed"]
+
+    # Summaries were refreshed even though the writes bypassed the ORM flush
+    db = next(app.dependency_overrides[get_db]())
+    columns = ("student_id", "course_id", "confirmed_count", "absent_count", "unmarked_count")
+    snapshot = lambda: sorted(tuple(getattr(row, c) for c in columns) for row in db.query(StudentAttendanceSummary))
+    maintained = snapshot()
+    rebuild_all(db)
+    db.commit()
+    assert snapshot() == maintained
+    db.close()
+
+
+def test_lecturer_bulk_manual_mark_only_marks_enrolled_students_in_scope(client):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_record import AttendanceRecord
+    from app.services.utils import hash_device_id
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    r = client.post("/api/v1/auth/login", data={"username": "admin@knust.edu.gh", "password": "pw123456"})
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.put(f"/api/v1/admin/courses/{course_id}", headers=admin, json={
+        "programmes": ["Computer Engineering", "Telecommunications Engineering"],
+    }).status_code == 200
+    telecom = _register_and_login(
+        client, "tele@st.knust.edu.gh", "student",
+        user_id="20990002", level=200, programme="Telecommunications Engineering",
+    )
+    assert client.post(f"/api/v1/student/courses/{course_id}/enroll", headers=telecom).status_code == 200
+    outsider = _register_and_login(
+        client, "outsider@st.knust.edu.gh", "student",
+        user_id="20990003", level=200, programme="Computer Engineering",
+    )
+    ids = [client.get("/api/v1/auth/me", headers=h).json()["id"] for h in (student, telecom, outsider)]
+    r = client.post("/api/v1/lecturer/sessions", headers=lecturer, json={
+        "course_id": course_id, "duration_minutes": 10, "programme": "Computer Engineering",
+    })
+    scoped_id = r.json()["id"]
+
+    r = client.post("/api/v1/lecturer/attendance/bulk-manual-mark", headers=lecturer, json={
+        "items": [{"session_id": scoped_id, "student_id": sid} for sid in ids],
+    })
+    assert r.status_code == 200, r.text
+    not_enrolled = "Student is not enrolled in this session's course"
+    assert [res.get("error") for res in r.json()["results"]] == [None, not_enrolled, not_enrolled]
+
+    # The admin variant is not limited to the roster
+    r = client.post("/api/v1/admin/attendance/bulk-manual-mark", headers=admin, json={
+        "items": [{"session_id": scoped_id, "student_id": ids[2]}],
+    })
+    assert r.json()["created"] == 1
+
+    db = next(app.dependency_overrides[get_db]())
+    hashes = dict(db.query(AttendanceRecord.student_id, AttendanceRecord.device_id_hash).filter(
+        AttendanceRecord.session_id == scoped_id,
+    ))
+    assert hashes == {ids[0]: hash_device_id("LECTURER_MANUAL"), ids[2]: hash_device_id("ADMIN_MANUAL")}
+    db.close()
+
+
+def test_closed_semester_moves_to_archive_and_history_can_include_it(client):
+    import csv
+    import io
+    from datetime import timedelta
+
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.attendance_archive import ArchivedAttendanceRecord, ArchivedVerificationLog
+    from app.models.attendance_record import AttendanceRecord
+    from app.models.attendance_rollup import AttendanceRollup
+    from app.models.attendance_session import AttendanceSession
+    from app.services.attendance_rollups import HOUR, aggregate_rollups, bucket_start, rebuild_rollups
+    from app.services.utils import utcnow
+
+    course_id, session_id, nonce, lecturer, student = _setup(client)
+    assert _submit(client, student, session_id, nonce).status_code == 200
+    r = client.post("/api/v1/lecturer/sessions", headers=lecturer, json={"course_id": course_id, "duration_minutes": 20})
+    later_id = r.json()["id"]
+    r = client.post(f"/api/v1/lecturer/sessions/{later_id}/qr/rotate", headers=lecturer, params={"ttl_seconds": 60})
+    assert _submit(client, student, later_id, r.json()["nonce"]).status_code == 200
+    r = client.post("/api/v1/auth/login", data={"username": "admin@knust.edu.gh", "password": "pw123456"})
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    db = next(app.dependency_overrides[get_db]())
+    assert aggregate_rollups(db) >= 1
+    db.commit()
+    rollup_rows = lambda: sorted(
+        (row.granularity, row.bucket_start, row.status, row.count) for row in db.query(AttendanceRollup)
+    )
+    trends = rollup_rows()
+    assert trends
+    db.close()
+
+    r = client.post("/api/v1/admin/semester/close", headers=admin)
+    assert r.status_code == 202, r.text
+    job = client.get(f"/api/v1/admin/semester/close/jobs/{r.json()['id']}", headers=admin).json()
+    assert (job["status"], job["sessions_archived"], job["records_archived"]) == ("done", 2, 2)
+
+    db = next(app.dependency_overrides[get_db]())
+    assert db.query(AttendanceSession).count() == 0 and db.query(AttendanceRecord).count() == 0
+    archived = db.query(ArchivedAttendanceRecord).filter(ArchivedAttendanceRecord.session_id == session_id).one()
+    assert (archived.status.value, archived.semester, archived.academic_year) == ("confirmed", "1st Semester", "2024/2025")
+    assert db.query(ArchivedVerificationLog.session_id).distinct().count() <= 2
+
+    # A rebuild keeps the archived semester's trends but drops buckets with no session anywhere
+    orphan = bucket_start(utcnow() - timedelta(days=30), HOUR)
+    lecturer_id = client.get("/api/v1/auth/me", headers=lecturer).json()["id"]
+    db.add(AttendanceRollup(granularity=HOUR, bucket_start=orphan, lecturer_id=lecturer_id, status="confirmed", count=3))
+    db.commit()
+    rebuild_rollups(db)
+    db.commit()
+    assert rollup_rows() == trends
+    db.close()
+
+    url = "/api/v1/student/attendance/history"
+    assert client.get(url, headers=student).json() == []
+    pages, cursor = [], None
+    while True:
+        params = {"include_archived": True, "limit": 1, **({"cursor": cursor} if cursor else {})}
+        r = client.get(url, headers=student, params=params)
+        assert r.status_code == 200, r.text
+        pages.append(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [(row["session_id"], row["status"], row["course_code"]) for page in pages for row in page] == [
+        # The second session has no geofence, so that submission was flagged
+        (later_id, "flagged", "CE200"), (session_id, "confirmed", "CE200"),
+    ]
+    assert client.get(url, headers=student, params={"include_archived": True, "course_id": course_id + 1}).json() == []
+
+    for headers, export_url, params in [
+        (lecturer, f"/api/v1/lecturer/courses/{course_id}/export", {}),
+        (admin, "/api/v1/admin/exports/attendance", {"semester": "1st Semester"}),
+    ]:
+        r = client.get(export_url, headers=headers, params=params)
+        assert list(csv.DictReader(io.StringIO(r.text))) == []
+        r = client.get(export_url, headers=headers, params={**params, "include_archived": True})
+        assert r.status_code == 200, r.text
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert sorted((row["session_id"], row["status"]) for row in rows) == sorted([
+            (str(session_id), "confirmed"), (str(later_id), "flagged"),
+        ])
+    # The same semester of another academic year has nothing archived
+    r = client.get(
+        "/api/v1/admin/exports/attendance", headers=admin,
+        params={"semester": "1st Semester", "academic_year": "2023/2024"},
+    )
+    assert r.status_code == 200, r.text
+    assert list(csv.DictReader(io.StringIO(r.text))) == []
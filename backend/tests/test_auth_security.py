@@ -45,6 +45,60 @@ def test_programmes_list_is_public(client):
     assert "Telecommunications Engineering" in names
 
 
+def test_programmes_list_supports_conditional_get(client, count_queries):
+    r = client.get("/api/v1/auth/programmes")
+    etag = r.headers["ETag"]
+    assert "max-age" in r.headers["Cache-Control"]
+
+    with count_queries() as q:
+        r = client.get("/api/v1/auth/programmes", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert q.count == 0
+
+
+def test_admin_programme_changes_refresh_registry(client):
+    r = _register(client, email="admin1@knust.edu.gh", role="admin", user_id=None, level=None, programme=None)
+    assert r.status_code == 200, r.text
+    r = client.post("/api/v1/auth/login", data={"username": "admin1@knust.edu.gh", "password": "pw123456"})
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    before = client.get("/api/v1/auth/programmes")
+
+    r = client.post("/api/v1/admin/programmes", json={"name": "Marine Engineering"}, headers=admin)
+    assert r.status_code == 200, r.text
+    programme_id = r.json()["id"]
+    after = client.get("/api/v1/auth/programmes")
+    assert "Marine Engineering" in after.json()
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert _register(client, programme="Marine Engineering").status_code == 200
+
+    r = client.delete(f"/api/v1/admin/programmes/{programme_id}", headers=admin)
+    assert r.status_code == 400  # in use by the student registered above
+
+    r = client.post("/api/v1/admin/programmes", json={"name": "Naval Engineering"}, headers=admin)
+    r = client.delete(f"/api/v1/admin/programmes/{r.json()['id']}", headers=admin)
+    assert r.status_code == 200, r.text
+    assert "Naval Engineering" not in client.get("/api/v1/auth/programmes").json()
+    assert _register(client, email="other@st.knust.edu.gh", user_id="20880002",
+                     programme="Naval Engineering").status_code == 400
+
+
+def test_programme_change_notification_from_another_worker_drops_registry(client):
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.programme import Programme
+    from app.services.cache_notify import cache_listener
+
+    assert "Marine Engineering" not in client.get("/api/v1/auth/programmes").json()
+    # Another worker adds a programme and NOTIFYs; this worker's LISTEN thread dispatches it
+    db = next(app.dependency_overrides[get_db]())
+    db.add(Programme(name="Marine Engineering"))
+    db.commit()
+    assert "Marine Engineering" not in client.get("/api/v1/auth/programmes").json()
+    cache_listener.dispatch("programmes")
+    assert "Marine Engineering" in client.get("/api/v1/auth/programmes").json()
+
+
 def test_profile_update_rejects_unknown_programme(client):
     assert _register(client).status_code == 200
     r = client.post("/api/v1/auth/login", data={"username": "user@st.knust.edu.gh", "password": "pw123456"})
@@ -0,0 +1,111 @@
+"""Student course catalogue cache: hits skip the course joins, writes invalidate."""
+import time
+
+from app.services.catalogue_cache import CatalogueCache
+
+
+def _register_and_login(client, email, role, user_id=None, level=None, programme=None):
+    payload = {"email": email, "password": "pw123456", "full_name": email.split("@")[0], "role": role}
+    if user_id:
+        payload["user_id"] = user_id
+    if level:
+        payload["level"] = level
+    if programme:
+        payload["programme"] = programme
+    r = client.post("/api/v1/auth/register", json=payload)
+    assert r.status_code == 200, r.text
+    r = client.post("/api/v1/auth/login", data={"username": email, "password": "pw123456"})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _setup(client):
+    admin = _register_and_login(client, "admin@knust.edu.gh", "admin")
+    lecturer = _register_and_login(client, "lect@knust.edu.gh", "lecturer", user_id="1234567")
+    student = _register_and_login(
+        client, "comp@st.knust.edu.gh", "student",
+        user_id="20890001", level=300, programme="Computer Engineering",
+    )
+    r = client.post(
+        "/api/v1/admin/courses",
+        json={
+            "code": "EE301",
+            "name": "EM Fields",
+            "semester": "1st Semester",
+            "level": 300,
+            "programmes": ["Computer Engineering"],
+        },
+        headers=admin,
+    )
+    assert r.status_code == 200, r.text
+    return admin, lecturer, student, r.json()["id"]
+
+
+def test_recommended_courses_served_from_cache(client, count_queries):
+    _, _, student, _ = _setup(client)
+
+    r = client.get("/api/v1/student/courses/recommended", headers=student)
+    assert [c["code"] for c in r.json()] == ["EE301"]
+    with count_queries() as q:
+        r = client.get("/api/v1/student/courses/recommended", headers=student)
+    assert [c["code"] for c in r.json()] == ["EE301"]
+    assert not any("FROM courses" in s for s in q.statements)
+
+
+def test_course_writes_invalidate_catalogue(client):
+    admin, lecturer, student, course_id = _setup(client)
+
+    r = client.get("/api/v1/student/courses/recommended", headers=student)
+    assert r.json()[0]["lecturer_names"] == []
+
+    r = client.post(f"/api/v1/lecturer/courses/{course_id}/claim", headers=lecturer)
+    assert r.status_code == 200, r.text
+    r = client.get("/api/v1/student/courses/recommended", headers=student)
+    assert r.json()[0]["lecturer_names"] == ["lect"]
+
+    r = client.put(f"/api/v1/admin/courses/{course_id}", json={"name": "Electromagnetics"}, headers=admin)
+    assert r.status_code == 200, r.text
+    r = client.get("/api/v1/student/courses/search", params={"q": "electro"}, headers=student)
+    assert [c["name"] for c in r.json()] == ["Electromagnetics"]
+    assert r.json()[0]["is_enrolled"] is False
+
+    r = client.delete(f"/api/v1/admin/courses/{course_id}", headers=admin)
+    assert r.status_code == 200, r.text
+    r = client.get("/api/v1/student/courses/recommended", headers=student)
+    assert r.json() == []
+
+
+def test_cache_entries_expire():
+    cache = CatalogueCache(ttl_seconds=0.01)
+    loads = []
+    loader = lambda: loads.append(1) or [{"id": 1}]
+    key = ("1st Semester", 300, "Computer Engineering")
+    cache.get_or_load(key, loader)
+    cache.get_or_load(key, loader)
+    assert len(loads) == 1
+    time.sleep(0.02)
+    cache.get_or_load(key, loader)
+    assert len(loads) == 2
+
+
+def test_redis_outage_falls_back_to_local_tier_and_logs_once(caplog):
+    class DownRedis:
+        calls = 0
+
+        def get(self, key):
+            DownRedis.calls += 1
+            raise ConnectionError("connection refused")
+
+    cache = CatalogueCache(ttl_seconds=60)
+    cache._redis = DownRedis()
+    loads = []
+    loader = lambda: loads.append(1) or [{"id": 1}]
+    key = ("1st Semester", 300, "Computer Engineering")
+
+    with caplog.at_level("WARNING", logger="app.services.catalogue_cache"):
+        for _ in range(5):
+            assert cache.get_or_load(key, loader) == [{"id": 1}]
+
+    assert len(loads) == 1  # the local tier still caches
+    assert DownRedis.calls == 1  # Redis is skipped while backing off
+    assert len([r for r in caplog.records if "Redis" in r.getMessage()]) == 1
@@ -3,3 +3,26 @@ def test_health(client):
     r = client.get("/api/v1/health")
     assert r.status_code == 200
     assert r.json().get("status") == "ok"
+
+
+def test_response_carries_request_id_and_security_headers(client):
+    r = client.get("/api/v1/health")
+    assert r.headers.get("X-Request-ID")
+    assert r.headers.get("X-Content-Type-Options") == "nosniff"
+    assert r.headers.get("X-Frame-Options") == "DENY"
+    assert r.headers.get("Referrer-Policy") == "no-referrer"
+
+
+def test_access_log_records_route_template_and_db_time(client, monkeypatch):
+    from app.core import logging_middleware
+
+    captured = []
+    monkeypatch.setattr(logging_middleware.logger, "info", lambda msg, extra: captured.append(extra["fields"]))
+    r = client.post("/api/v1/auth/login", data={"username": "nobody@example.com", "password": "pw123456"})
+    assert r.status_code == 401
+    entry = captured[-1]
+    assert entry["route"] == "/api/v1/auth/login"
+    assert entry["status"] == 401
+    assert entry["request_id"] == r.headers["X-Request-ID"]
+    assert entry["db_queries"] >= 1
+    assert entry["db_time_ms"] >= 0
@@ -0,0 +1,70 @@
+"""/metrics endpoint: disabled by default, token-protected, Prometheus text output."""
+import os
+
+from app.core import metrics
+
+
+def test_metrics_disabled_by_default(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_requires_token(client, monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+
+def test_metrics_reports_routes_queue_and_rejections(client, monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    client.get("/api/v1/health")
+    metrics.RATE_LIMIT_REJECTIONS.inc("login")
+
+    r = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert r.status_code == 200
+    body = r.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/health",status="200"}' in body
+    assert 'http_request_db_queries_bucket{route="/api/v1/health",le="0"}' in body
+    assert 'face_verification_jobs{status="pending"} 0' in body
+    assert "face_verification_oldest_pending_age_seconds 0" in body
+    assert 'rate_limit_rejections_total{scope="login"}' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    h = metrics.Histogram("test_latency_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        h.observe(value, "/x")
+    lines = h.render()
+    assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{route="/x"} 4' in lines
+
+
+def test_multiprocess_scrape_adds_other_workers(tmp_path):
+    registry = metrics.Registry()
+    hits = registry.register(metrics.Counter("test_hits_total", "test", ("route",)))
+    pool = registry.register(metrics.Gauge("test_pool", "test", ("state",), multiprocess_mode="livesum"))
+    queue = registry.register(metrics.Gauge("test_queue", "test"))
+    hits.inc("/x", amount=2)
+    pool.set(3, "idle")
+    queue.set(7)
+    # An exited worker and a running one (the test runner's parent)
+    (tmp_path / "metrics-999999999.json").write_text(
+        '{"test_hits_total": [[["/x"], 5]], "test_pool": [[["idle"], 4]]}'
+    )
+    (tmp_path / f"metrics-{os.getppid()}.json").write_text(
+        '{"test_hits_total": [[["/x"], 1]], "test_pool": [[["idle"], 1]]}'
+    )
+
+    registry.start_multiprocess(str(tmp_path), 60)
+    try:
+        body = registry.render()
+    finally:
+        registry.stop_multiprocess()
+
+    assert 'test_hits_total{route="/x"} 8' in body  # exited workers still count
+    assert 'test_pool{state="idle"} 4' in body  # gauges: running workers only
+    assert "test_queue 7" in body  # local gauges are not summed
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
@@ -0,0 +1,59 @@
+"""KDF offload pool and rehash-on-login when hashing parameters change."""
+import pytest
+from fastapi import HTTPException
+
+
+def test_kdf_pool_runs_in_child_processes():
+    from app.services.password_hashing import KdfPool
+    from app.services.security import _hash, _verify
+
+    pool = KdfPool(workers=1, max_pending=2, wait_seconds=1)
+    try:
+        hashed = pool.run(_hash, "pw123456")
+        assert pool.run(_verify, "pw123456", hashed) is True
+        hashes = pool.map(_hash, ["first123", "second123", "third123"])
+        assert [pool.run(_verify, pw, h) for pw, h in zip(["first123", "second123", "third123"], hashes)] == [True] * 3
+        stats = pool.stats()
+        assert stats["completed"] == 6
+        assert stats["in_flight"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_kdf_pool_sheds_load_when_full():
+    from app.services.password_hashing import KdfPool
+
+    pool = KdfPool(workers=1, max_pending=1, wait_seconds=0.01)
+    assert pool._slots.acquire(blocking=False)  # simulate one request already queued
+    with pytest.raises(HTTPException) as exc:
+        pool.run(len, "x")
+    assert exc.value.status_code == 503
+    assert pool.stats()["rejected"] == 1
+
+
+def test_login_rehashes_when_rounds_change(client, monkeypatch):
+    import app.services.security as security
+    from app.db.deps import get_db
+    from app.main import app
+    from app.models.user import User
+
+    r = client.post("/api/v1/auth/register", json={
+        "email": "lect@knust.edu.gh", "password": "pw123456", "full_name": "Lect",
+        "role": "lecturer", "user_id": "1234567",
+    })
+    assert r.status_code == 200, r.text
+
+    monkeypatch.setattr(security, "pwd_context", security.build_password_context(1000))
+    r = client.post("/api/v1/auth/login", data={"username": "lect@knust.edu.gh", "password": "pw123456"})
+    assert r.status_code == 200, r.text
+
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        stored = db.query(User).filter(User.email == "lect@knust.edu.gh").one().hashed_password
+    finally:
+        db.close()
+    assert stored.startswith("$pbkdf2-sha256$1000$")
+
+    # Stored hash still verifies, and is left alone once it matches the policy
+    r = client.post("/api/v1/auth/login", data={"username": "lect@knust.edu.gh", "password": "pw123456"})
+    assert r.status_code == 200
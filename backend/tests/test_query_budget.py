@@ -0,0 +1,184 @@
+"""Per-request SQL budget, N+1 detection and endpoint query counts."""
+import asyncio
+import logging
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.core.logging_middleware import RequestIDLoggingMiddleware
+from app.core.logging_middleware import logger as access_logger
+from app.core.request_context import RequestStats, current_request
+from app.db import instrumentation
+from app.db.instrumentation import QueryBudget, QueryBudgetExceeded
+
+
+def _register_and_login(client, email, role, user_id=None, level=None, programme=None):
+    payload = {"email": email, "password": "pw123456", "full_name": email.split("@")[0], "role": role}
+    if user_id:
+        payload["user_id"] = user_id
+    if level:
+        payload["level"] = level
+    if programme:
+        payload["programme"] = programme
+    r = client.post("/api/v1/auth/register", json=payload)
+    assert r.status_code == 200, r.text
+    r = client.post("/api/v1/auth/login", data={"username": email, "password": "pw123456"})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _create_claimed_courses(client, admin, lecturer, codes):
+    for code in codes:
+        r = client.post(
+            "/api/v1/admin/courses",
+            json={
+                "code": code,
+                "name": f"Course {code}",
+                "semester": "1st Semester",
+                "level": 300,
+                "programmes": ["Computer Engineering", "Telecommunications Engineering"],
+            },
+            headers=admin,
+        )
+        assert r.status_code == 200, r.text
+        r = client.post(f"/api/v1/lecturer/courses/{r.json()['id']}/claim", headers=lecturer)
+        assert r.status_code == 200, r.text
+
+
+def test_student_dashboard_query_count_is_independent_of_enrollments(client, count_queries):
+    admin = _register_and_login(client, "admin@knust.edu.gh", "admin")
+    lecturer = _register_and_login(client, "lect@knust.edu.gh", "lecturer", user_id="1234567")
+    student = _register_and_login(
+        client, "comp@st.knust.edu.gh", "student",
+        user_id="20890001", level=300, programme="Computer Engineering",
+    )
+
+    def enroll(codes):
+        _create_claimed_courses(client, admin, lecturer, codes)
+        for course in client.get("/api/v1/lecturer/courses", headers=lecturer).json():
+            if course["code"] in codes:
+                r = client.post(f"/api/v1/student/courses/{course['id']}/enroll", headers=student)
+                assert r.status_code == 200, r.text
+
+    enroll(["EE301"])
+    with count_queries() as few:
+        r = client.get("/api/v1/student/dashboard", headers=student)
+    assert r.status_code == 200, r.text
+
+    enroll(["EE302", "EE303", "EE304"])
+    with count_queries() as many:
+        r = client.get("/api/v1/student/dashboard", headers=student)
+    assert r.status_code == 200, r.text
+
+    assert many.count == few.count
+
+
+@pytest.mark.parametrize(
+    "role, path",
+    [
+        ("student", "/api/v1/student/courses/recommended"),
+        ("student", "/api/v1/student/courses/search"),
+        ("student", "/api/v1/student/courses"),
+        ("lecturer", "/api/v1/lecturer/courses"),
+        ("lecturer", "/api/v1/lecturer/courses/all"),
+        ("admin", "/api/v1/admin/courses"),
+    ],
+)
+def test_course_lists_do_not_scale_queries_with_courses(client, count_queries, role, path):
+    users = {
+        "admin": _register_and_login(client, "admin@knust.edu.gh", "admin"),
+        "lecturer": _register_and_login(client, "lect@knust.edu.gh", "lecturer", user_id="1234567"),
+        "student": _register_and_login(
+            client, "comp@st.knust.edu.gh", "student",
+            user_id="20890001", level=300, programme="Computer Engineering",
+        ),
+    }
+
+    def add_courses(codes):
+        _create_claimed_courses(client, users["admin"], users["lecturer"], codes)
+        for course in client.get("/api/v1/lecturer/courses", headers=users["lecturer"]).json():
+            if course["code"] in codes:
+                r = client.post(f"/api/v1/student/courses/{course['id']}/enroll", headers=users["student"])
+                assert r.status_code == 200, r.text
+
+    add_courses(["EE301"])
+    with count_queries() as few:
+        r = client.get(path, headers=users[role])
+    assert r.status_code == 200 and len(r.json()) == 1
+    assert r.json()[0]["lecturer_names"] == ["lect"]
+
+    add_courses(["EE302", "EE303", "EE304"])
+    with count_queries() as many:
+        r = client.get(path, headers=users[role])
+    assert r.status_code == 200 and len(r.json()) == 4
+
+    assert many.count == few.count
+
+
+def test_budget_reports_repeated_selects_and_total():
+    stats = RequestStats(request_id="r1")
+    stats.query_count = 8
+    stats.statement_counts = {"SELECT * FROM users WHERE id = ?": 6, "INSERT INTO audit_logs": 1}
+    budget = QueryBudget(max_queries=5, repeat_threshold=5, mode="log")
+    problems = budget.violations(stats)
+    assert problems[0] == "8 queries (budget 5)"
+    assert problems[1].startswith("possible N+1: 6x SELECT * FROM users")
+    assert QueryBudget().violations(stats) == []
+
+
+def test_raise_mode_fails_the_repeated_select(monkeypatch):
+    monkeypatch.setattr(instrumentation, "query_budget", QueryBudget(repeat_threshold=2, mode="raise"))
+    engine = create_engine("sqlite://")
+    token = current_request.set(RequestStats(request_id="r1"))
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+            conn.exec_driver_sql("SELECT 1")
+            with pytest.raises(QueryBudgetExceeded, match="possible N\\+1: 3x SELECT 1"):
+                conn.exec_driver_sql("SELECT 1")
+    finally:
+        current_request.reset(token)
+        engine.dispose()
+
+
+def test_log_mode_reports_the_repeated_select_in_the_access_log(monkeypatch):
+    monkeypatch.setattr(instrumentation, "query_budget", QueryBudget(repeat_threshold=2, mode="log"))
+    engine = create_engine("sqlite://")
+    records: list[logging.LogRecord] = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    access_logger.addHandler(handler)
+
+    async def app(scope, receive, send):
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.exec_driver_sql("SELECT 1")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    try:
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        asyncio.run(RequestIDLoggingMiddleware(app)(scope, receive, send))
+    finally:
+        access_logger.removeHandler(handler)
+        engine.dispose()
+    warnings = [r for r in records if r.getMessage() == "query budget exceeded"]
+    assert len(warnings) == 1
+    assert warnings[0].fields["violations"] == ["possible N+1: 3x SELECT 1"]
+
+
+def test_failed_statement_does_not_leak_its_start_time():
+    engine = create_engine("sqlite://")
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.exec_driver_sql("SELECT * FROM no_such_table")
+            assert conn.info.get("query_start") == []
+    finally:
+        engine.dispose()
@@ -0,0 +1,75 @@
+"""Cached SchoolSettings: read paths skip the table, admin writes refresh it."""
+
+
+def _register_and_login(client, email, role, user_id=None, level=None, programme=None):
+    payload = {"email": email, "password": "pw123456", "full_name": email.split("@")[0], "role": role}
+    if user_id:
+        payload["user_id"] = user_id
+    if level:
+        payload["level"] = level
+    if programme:
+        payload["programme"] = programme
+    r = client.post("/api/v1/auth/register", json=payload)
+    assert r.status_code == 200, r.text
+    r = client.post("/api/v1/auth/login", data={"username": email, "password": "pw123456"})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_student_reads_do_not_query_school_settings(client, count_queries):
+    student = _register_and_login(
+        client, "comp@st.knust.edu.gh", "student",
+        user_id="20890001", level=300, programme="Computer Engineering",
+    )
+    assert client.get("/api/v1/student/dashboard", headers=student).status_code == 200
+
+    with count_queries() as q:
+        for path in ("/api/v1/student/dashboard", "/api/v1/student/courses/recommended", "/api/v1/student/courses/search"):
+            assert client.get(path, headers=student).status_code == 200
+    assert not any("school_settings" in s for s in q.statements)
+
+
+def test_settings_update_and_semester_close_are_visible_immediately(client):
+    admin = _register_and_login(client, "admin@knust.edu.gh", "admin")
+    student = _register_and_login(
+        client, "comp@st.knust.edu.gh", "student",
+        user_id="20890001", level=300, programme="Computer Engineering",
+    )
+    r = client.get("/api/v1/student/dashboard", headers=student)
+    assert r.json()["enrollment_open"] is True
+
+    r = client.put("/api/v1/admin/school-settings", params={"enrollment_open": False}, headers=admin)
+    assert r.status_code == 200, r.text
+    r = client.get("/api/v1/student/dashboard", headers=student)
+    assert r.json()["enrollment_open"] is False
+
+    r = client.post("/api/v1/admin/semester/close", headers=admin)
+    assert r.status_code == 202, r.text
+    r = client.get("/api/v1/student/dashboard", headers=student)
+    assert r.json()["current_semester"] == "2nd Semester"
+    assert r.json()["is_on_break"] is True
+
+
+def test_load_racing_an_invalidation_is_not_cached(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.services import school_settings
+    from app.services.school_settings import SchoolSettingsCache
+
+    cache = SchoolSettingsCache(ttl_seconds=300)
+    rows = iter([
+        SimpleNamespace(current_semester="1st Semester", is_on_break=False, enrollment_open=True,
+                        academic_year="2025/2026", updated_at=None),
+        SimpleNamespace(current_semester="2nd Semester", is_on_break=False, enrollment_open=False,
+                        academic_year="2025/2026", updated_at=None),
+    ])
+
+    def read_then_writer_commits(db):
+        row = next(rows)
+        if row.current_semester == "1st Semester":
+            cache.invalidate()  # an admin's change commits while this read is in flight
+        return row
+
+    monkeypatch.setattr(school_settings, "get_or_create_settings", read_then_writer_commits)
+    assert cache.get(None).current_semester == "1st Semester"
+    assert cache.get(None).current_semester == "2nd Semester"
@@ -0,0 +1,52 @@
+"""Decoded-claims cache in front of jose.jwt.decode."""
+import time
+
+
+def test_cached_claims_are_reused_and_counted():
+    from app.services.security import create_access_token, decode_token, token_cache
+
+    token_cache.clear()
+    token = create_access_token("42")
+    assert decode_token(token) == "42"
+    assert decode_token(token) == "42"
+    stats = token_cache.stats()
+    assert stats["size"] == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_invalid_tokens_are_not_cached():
+    from app.services.security import decode_token, token_cache
+
+    token_cache.clear()
+    assert decode_token("not-a-jwt") is None
+    assert token_cache.stats()["size"] == 0
+
+
+def test_expired_entries_are_dropped():
+    from app.services.security import TokenCache
+
+    cache = TokenCache(max_size=4)
+    cache.put("tok", {"sub": "1", "exp": time.time() - 1})
+    assert cache.get("tok") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_lru_is_bounded():
+    from app.services.security import TokenCache
+
+    cache = TokenCache(max_size=2)
+    exp = time.time() + 60
+    for i in range(3):
+        cache.put(f"tok{i}", {"sub": str(i), "exp": exp})
+    assert cache.get("tok0") is None
+    assert cache.get("tok2")["sub"] == "2"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_access_token_rejected_by_refresh_endpoint(client):
+    from app.services.security import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token('1')}"}
+    r = client.post("/api/v1/auth/refresh", headers=headers)
+    assert r.status_code == 401
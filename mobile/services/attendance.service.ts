@@ -15,7 +15,17 @@ class AttendanceService {
      */
     async getActiveSessions(): Promise<ActiveSession[]> {
         const response = await apiClient.get<ActiveSession[]>('/student/sessions/active');
-        return response.data;
+        // A revalidated (304) response reuses the cached body, whose
+        // time_remaining_seconds may be stale; recompute it from ends_at
+        // and the server clock of this response
+        const serverTime = Date.parse(response.headers['x-server-time'] || '');
+        if (Number.isNaN(serverTime)) return response.data;
+        return response.data.map((s) => ({
+            ...s,
+            time_remaining_seconds: s.ends_at
+                ? Math.max(0, Math.floor((Date.parse(s.ends_at) - serverTime) / 1000))
+                : s.time_remaining_seconds,
+        }));
     }
 
     /**
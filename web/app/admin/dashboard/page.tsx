@@ -4,7 +4,7 @@ import { useState } from 'react';
 import useSWR from 'swr';
 import { ProtectedRoute } from '@/components/ProtectedRoute';
 import { useAuth } from '@/contexts/AuthContext';
-import { apiClient } from '@/lib/api';
+import { apiClient, SemesterCloseJob } from '@/lib/api';
 import toast from 'react-hot-toast';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
@@ -30,6 +30,7 @@ export default function AdminDashboard() {
     const [savingSettings, setSavingSettings] = useState(false);
     const [showCloseSemester, setShowCloseSemester] = useState(false);
     const [closingSemester, setClosingSemester] = useState(false);
+    const [closeJob, setCloseJob] = useState<SemesterCloseJob | null>(null);
 
     const SEMESTER_OPTIONS = ['1st Semester', '2nd Semester'] as const;
 
@@ -61,9 +62,21 @@ export default function AdminDashboard() {
     const handleCloseSemester = async () => {
         try {
             setClosingSemester(true);
-            const result = await apiClient.adminCloseSemester();
-            toast.success(`Semester closed — ${result.students_unenrolled} students unenrolled, ${result.levels_updated} levels advanced`);
+            // The close runs in the background; poll its progress until it settles
+            let job = await apiClient.adminCloseSemester();
+            setCloseJob(job);
+            while (job.status === 'pending' || job.status === 'running') {
+                await new Promise((resolve) => setTimeout(resolve, 2000));
+                job = await apiClient.adminGetSemesterCloseJob(job.id);
+                setCloseJob(job);
+            }
+            if (job.status === 'failed') {
+                toast.error(`Semester close stopped: ${job.error || 'unknown error'}. Try again to resume.`);
+                return;
+            }
+            toast.success(`Semester closed — ${job.students_unenrolled} students unenrolled, ${job.levels_updated} levels advanced`);
             setShowCloseSemester(false);
+            setCloseJob(null);
             await mutateSettings();
         } catch (e: any) {
             toast.error(e?.message || 'Failed to close semester');
@@ -278,6 +291,7 @@ export default function AdminDashboard() {
                                 <ul className="list-disc list-inside space-y-1 text-gray-700">
                                     <li>Close all active attendance sessions</li>
                                     <li>Unenrol all students from this semester's courses</li>
+                                    <li>Move this semester's sessions and attendance records to the archive</li>
                                     {schoolSettings?.current_semester === '2nd Semester' && (
                                         <li>Advance every student's year (Year 1→2, Year 2→3, Year 3→4)</li>
                                     )}
@@ -285,6 +299,19 @@ export default function AdminDashboard() {
                                     <li>Advance to <strong>{schoolSettings?.current_semester === '1st Semester' ? '2nd Semester' : '1st Semester (next year)'}</strong></li>
                                 </ul>
                                 <p className="text-red-600 font-medium">⚠ This cannot be undone. Enrolment records will be permanently deleted.</p>
+                                {closeJob && (
+                                    <p className="text-gray-700">
+                                        {closeJob.status === 'failed'
+                                            ? `Stopped at "${closeJob.step}" — click again to resume.`
+                                            : closeJob.step === 'enrollments'
+                                            ? `Unenrolling students… ${closeJob.students_unenrolled}/${closeJob.enrollments_total ?? '?'}`
+                                            : closeJob.step === 'archive'
+                                            ? `Archiving attendance… ${closeJob.sessions_archived} sessions so far`
+                                            : closeJob.step === 'levels'
+                                            ? `Advancing student levels… ${closeJob.levels_updated} so far`
+                                            : 'Closing sessions and updating the calendar…'}
+                                    </p>
+                                )}
                             </div>
                         </DialogDescription>
                     </DialogHeader>
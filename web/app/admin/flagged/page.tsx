@@ -1,9 +1,9 @@
 'use client';
 
 import { useEffect } from 'react';
-import useSWR from 'swr';
+import useSWRInfinite from 'swr/infinite';
 import { ProtectedRoute } from '@/components/ProtectedRoute';
-import { apiClient } from '@/lib/api';
+import { apiClient, CursorPage, FlaggedRecord } from '@/lib/api';
 import toast from 'react-hot-toast';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -17,24 +17,21 @@ import {
 } from '@/components/ui/table';
 import { Flag, RefreshCw } from 'lucide-react';
 
-type Flagged = {
-    record_id: number;
-    session_id: number;
-    student_id: number;
-    lecturer_id: number | null;
-    device_id_hash: string | null;
-    face_verified: boolean | null;
-    face_distance: number | null;
-    face_threshold: number | null;
-    face_model: string | null;
-};
-
 export default function AdminFlaggedPage() {
-    const { data: flagged = [], error, isLoading, mutate } = useSWR(
-        'admin-flagged',
-        () => apiClient.adminListFlagged(),
+    // Pages are chained by the X-Next-Cursor header; null once the queue is exhausted
+    const { data: pages, error, isLoading, isValidating, size, setSize, mutate } = useSWRInfinite<CursorPage<FlaggedRecord>>(
+        (index, previous) => {
+            if (index === 0) return ['admin-flagged', null];
+            if (!previous?.nextCursor) return null;
+            return ['admin-flagged', previous.nextCursor];
+        },
+        ([, cursor]: [string, string | null]) => apiClient.adminListFlagged(cursor ? { cursor } : {}),
         { dedupingInterval: 30000 }
     );
+    const flagged = pages?.flatMap((page) => page.items) ?? [];
+    const total = pages?.[0]?.totalEstimate ?? flagged.length;
+    const hasMore = Boolean(pages?.[pages.length - 1]?.nextCursor);
+    const loadingMore = isValidating && pages != null && size > pages.length;
 
     useEffect(() => { if (error) toast.error(error?.message || 'Failed to load flagged records'); }, [error]);
 
@@ -59,7 +56,11 @@ export default function AdminFlaggedPage() {
                                 <Flag className="h-4 w-4 text-gray-600" />
                             </div>
                             Flagged Records
-                            {!isLoading && <span className="text-sm font-normal text-gray-400">({flagged.length})</span>}
+                            {!isLoading && (
+                                <span className="text-sm font-normal text-gray-400">
+                                    ({flagged.length < total ? `${flagged.length} of ~${total}` : flagged.length})
+                                </span>
+                            )}
                         </CardTitle>
                     </CardHeader>
                     <CardContent>
@@ -109,6 +110,13 @@ export default function AdminFlaggedPage() {
                                 </Table>
                             </div>
                         )}
+                        {hasMore && (
+                            <div className="flex justify-center pt-4">
+                                <Button variant="outline" size="sm" onClick={() => setSize(size + 1)} disabled={loadingMore}>
+                                    {loadingMore ? 'Loading...' : 'Load more'}
+                                </Button>
+                            </div>
+                        )}
                     </CardContent>
                 </Card>
             </div>
@@ -69,6 +69,44 @@ export interface LoginRequest {
     password: string;
 }
 
+export interface SemesterCloseJob {
+    id: number;
+    status: 'pending' | 'running' | 'done' | 'failed';
+    step: 'sessions' | 'enrollments' | 'archive' | 'levels' | 'settings' | 'done';
+    semester_closed: string;
+    academic_year: string;
+    next_semester: string;
+    next_academic_year: string;
+    sessions_closed: number;
+    enrollments_total: number | null;
+    students_unenrolled: number;
+    levels_updated: number;
+    sessions_archived: number;
+    records_archived: number;
+    error: string | null;
+    created_at: string | null;
+    finished_at: string | null;
+}
+
+export interface FlaggedRecord {
+    record_id: number;
+    session_id: number;
+    student_id: number;
+    lecturer_id: number | null;
+    device_id_hash: string | null;
+    face_verified: boolean | null;
+    face_distance: number | null;
+    face_threshold: number | null;
+    face_model: string | null;
+}
+
+/** One keyset page: `nextCursor` is null on the last page. */
+export interface CursorPage<T> {
+    items: T[];
+    nextCursor: string | null;
+    totalEstimate: number | null;
+}
+
 class ApiClient {
     private baseURL: string;
 
@@ -80,6 +118,14 @@ class ApiClient {
         endpoint: string,
         options: RequestInit = {}
     ): Promise<T> {
+        const response = await this.fetchResponse(endpoint, options);
+        return await response.json();
+    }
+
+    private async fetchResponse(
+        endpoint: string,
+        options: RequestInit = {}
+    ): Promise<Response> {
         const url = `${this.baseURL}${endpoint}`;
         const isFormData = typeof FormData !== 'undefined' && options.body instanceof FormData;
 
@@ -121,7 +167,7 @@ class ApiClient {
             throw new Error(message);
         }
 
-        return await response.json();
+        return response;
     }
 
     // Auth endpoints
@@ -195,18 +241,18 @@ class ApiClient {
     }
 
     // Admin endpoints
-    async adminListFlagged(): Promise<Array<{
-        record_id: number;
-        session_id: number;
-        student_id: number;
-        lecturer_id: number | null;
-        device_id_hash: string | null;
-        face_verified: boolean | null;
-        face_distance: number | null;
-        face_threshold: number | null;
-        face_model: string | null;
-    }>> {
-        return this.request('/admin/flagged');
+    async adminListFlagged(params: { cursor?: string; limit?: number } = {}): Promise<CursorPage<FlaggedRecord>> {
+        const qs = new URLSearchParams();
+        if (params.cursor) qs.set('cursor', params.cursor);
+        if (params.limit != null) qs.set('limit', String(params.limit));
+        const q = qs.toString();
+        const response = await this.fetchResponse(`/admin/flagged${q ? `?${q}` : ''}`);
+        const total = response.headers.get('X-Total-Count-Estimate');
+        return {
+            items: await response.json(),
+            nextCursor: response.headers.get('X-Next-Cursor'),
+            totalEstimate: total != null && total !== '' ? Number(total) : null,
+        };
     }
 
     async adminApproveDeviceReset(userId: number, newDeviceId: string): Promise<{ user_id: number; device_id: string }> {
@@ -564,7 +610,19 @@ class ApiClient {
 
     // Student attendance endpoints
     async studentActiveSessions(): Promise<Array<{ id: number; code: string; course_id: number; course_code?: string; course_name?: string; programme?: string | null; starts_at?: string; ends_at?: string; time_remaining_seconds?: number | null; already_marked?: boolean; attendance_status?: string }>> {
-        return this.request('/student/sessions/active');
+        const response = await this.fetchResponse('/student/sessions/active');
+        const list: Array<{ id: number; code: string; course_id: number; course_code?: string; course_name?: string; programme?: string | null; starts_at?: string; ends_at?: string; time_remaining_seconds?: number | null; already_marked?: boolean; attendance_status?: string }> = await response.json();
+        // The body may come from the browser cache (ETag revalidated with a
+        // 304), so its time_remaining_seconds can be stale; recompute it from
+        // ends_at and the server clock of this response
+        const serverTime = Date.parse(response.headers.get('X-Server-Time') || '');
+        if (Number.isNaN(serverTime)) return list;
+        return list.map((s) => ({
+            ...s,
+            time_remaining_seconds: s.ends_at
+                ? Math.max(0, Math.floor((Date.parse(s.ends_at) - serverTime) / 1000))
+                : s.time_remaining_seconds,
+        }));
     }
 
     async studentDeviceStatus(): Promise<{ has_device: boolean; is_active: boolean; has_face_enrolled: boolean }> {
@@ -679,15 +737,13 @@ class ApiClient {
         return this.request(`/admin/school-settings?${qs.toString()}`, { method: 'PUT' });
     }
 
-    async adminCloseSemester(): Promise<{
-        semester_closed: string;
-        sessions_closed: number;
-        students_unenrolled: number;
-        levels_updated: number;
-        school_status: string;
-    }> {
+    async adminCloseSemester(): Promise<SemesterCloseJob> {
         return this.request('/admin/semester/close', { method: 'POST' });
     }
+
+    async adminGetSemesterCloseJob(jobId: number): Promise<SemesterCloseJob> {
+        return this.request(`/admin/semester/close/jobs/${jobId}`);
+    }
 }
 
 export const apiClient = new ApiClient(API_BASE_URL);